@@ -0,0 +1,163 @@
+import importlib
+import os
+import warnings
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Viscosity as Gas_Visc
+from . import Oil_Visocsity as Oil_Visc
+
+# Backend used when none is asked for, can be set through the PVT_CORRELATIONS_BACKEND variable
+DEFAULT_BACKEND: str = os.environ.get("PVT_CORRELATIONS_BACKEND", "numpy")
+
+# Backends in modules of their own with optional dependencies, only imported when they are asked for, a module that
+# cannot be imported leaves its backend unavailable
+OPTIONAL_BACKENDS: Dict[str, str] = {'numba': 'Numba_Backend'}
+
+# Kernel key: (property, correlation) as in Property_Graph.CORRELATION_NODES. The kernels take the inputs of the
+# matching property graph node, in the same order, and return the property with the broadcast shape of the inputs
+KernelKey = Tuple[str, str]
+
+
+class Backend:
+    """
+    Set of kernels that compute properties of the property graph, keyed by (property, correlation)
+    """
+
+    __slots__ = ('name', 'kernels')
+
+    def __init__(self, name: str, kernels: Dict[KernelKey, Callable]):
+        self.name = name
+        self.kernels = kernels
+
+    def __repr__(self):
+        return f"Backend({self.name!r}, {sorted(self.kernels)!r})"
+
+
+BACKENDS: Dict[str, Backend] = {}
+
+_backend: Optional[str] = None
+
+
+def register_backend(backend: Backend):
+    """
+    Adds a backend to the registry, replacing any backend of the same name
+    """
+    BACKENDS[backend.name] = backend
+
+
+def available_backends() -> List[str]:
+    """
+    Returns the names of the registered backends, loading the optional backends whose dependencies are installed
+    """
+    for name in OPTIONAL_BACKENDS:
+        _load_backend(name)
+    return list(BACKENDS)
+
+
+def set_backend(name: Optional[str]):
+    """
+    Sets the backend used when none is asked for, None goes back to DEFAULT_BACKEND
+    """
+    global _backend
+    if name is not None:
+        get_backend(name)
+    _backend = name
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """
+    Returns the named backend, or the one set by set_backend, or DEFAULT_BACKEND. A backend that is not registered,
+    such as numba when it is not installed, falls back to numpy with a warning
+    """
+    name = name or _backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        _load_backend(name)
+    if name not in BACKENDS:
+        warnings.warn(f"Backend {name!r} is not available, falling back to numpy", RuntimeWarning, stacklevel=2)
+        name = 'numpy'
+    return BACKENDS[name]
+
+
+def check_backends(num_points: int = 10000, rtol: float = 1e-10, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Compares every kernel of every registered backend with the numpy backend on random inputs
+
+    Parameters:
+    ----------
+    num_points : int, optional
+        Number of random points
+    rtol : float, optional
+        Largest relative difference allowed
+    seed : int, optional
+        Seed of the random inputs
+
+    Returns:
+    -------
+    dict
+        Largest relative difference of every kernel of every backend
+
+    Raises:
+    ------
+    ValueError
+        When a kernel differs from numpy by more than rtol, or where one of them is NaN and the other is not
+    """
+    inputs: Dict[KernelKey, tuple] = _random_inputs(num_points, seed)
+    reference: Backend = BACKENDS['numpy']
+    differences: Dict[str, Dict[str, float]] = {}
+    for name in available_backends():
+        backend: Backend = BACKENDS[name]
+        differences[name] = {}
+        for key, kernel in backend.kernels.items():
+            with np.errstate(all='ignore'):
+                expected: np.ndarray = reference.kernels[key](*inputs[key])
+                actual: np.ndarray = kernel(*inputs[key])
+                difference: np.ndarray = np.abs(actual - expected) / np.maximum(np.abs(expected), 1e-300)
+            same_nan: bool = bool(np.array_equal(np.isnan(actual), np.isnan(expected)))
+            largest: float = float(np.nanmax(difference)) if np.any(~np.isnan(difference)) else 0.0
+            differences[name][f"{key[0]}:{key[1]}"] = largest
+            if not same_nan or largest > rtol:
+                raise ValueError(f"{name} backend differs from numpy on {key[0]}:{key[1]} by {largest:.3g}"
+                                 + ("" if same_nan else " and in its NaN values"))
+    return differences
+
+
+def _random_inputs(num_points: int, seed: int) -> Dict[KernelKey, tuple]:
+    # Random inputs of every kernel over the range of the correlations, with a few points at zero pressure
+    rng: np.random.Generator = np.random.default_rng(seed)
+    pressure: np.ndarray = rng.uniform(0.0, 10000.0, num_points)
+    pressure[:10] = 0.0
+    temp: np.ndarray = rng.uniform(520.0, 760.0, num_points)
+    sg_gas: np.ndarray = rng.uniform(0.55, 1.0, num_points)
+    oil_api: np.ndarray = rng.uniform(15.0, 50.0, num_points)
+    p_bubble: np.ndarray = rng.uniform(500.0, 5000.0, num_points)
+    gas_sol: np.ndarray = rng.uniform(0.0, 1500.0, num_points)
+    with np.errstate(all='ignore'):
+        gas_comp_factor: np.ndarray = Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure, temp, sg_gas)
+    inputs: Dict[KernelKey, tuple] = {
+        ('gas_comp_factor', "Carnahan Starling"): (pressure, temp, sg_gas),
+        ('gas_visc', "Lee Gonzalez Eakin"): (pressure, temp, sg_gas, gas_comp_factor),
+        ('oil_visc', "Beggs Robinson"): (pressure, p_bubble, Oil_Visc._dead_oil_viscosity(temp, oil_api), gas_sol)
+    }
+    return inputs
+
+
+def _lee_gonzalez_eakin_numpy(pressure, temp, sg_gas, gas_comp_factor):
+    return Gas_Visc.lee_gonzalez_eakin_vectorized(pressure, temp, sg_gas, gas_comp_factor)
+
+
+register_backend(Backend('numpy', {
+    ('gas_comp_factor', "Carnahan Starling"): Gas_Comp.carnahan_starling_hs_eos_vectorized,
+    ('gas_visc', "Lee Gonzalez Eakin"): _lee_gonzalez_eakin_numpy,
+    ('oil_visc', "Beggs Robinson"): Oil_Visc._beggs_robinson
+}))
+
+
+def _load_backend(name: str):
+    # Imports the module of an optional backend, which registers the backend when its dependencies are installed
+    if name in OPTIONAL_BACKENDS and name not in BACKENDS:
+        try:
+            importlib.import_module(f".{OPTIONAL_BACKENDS[name]}", __package__)
+        except ImportError:
+            pass
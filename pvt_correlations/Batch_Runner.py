@@ -0,0 +1,219 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import Backends
+from . import PVT_Table
+from . import Property_Graph as Prop_Graph
+from . import PVT_Result
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Fields every record needs, and the correlation fields that fall back to the pvt_table defaults
+RECORD_FIELDS: List[str] = ['pressure_max', 'p_bubble', 'temp', 'oil_api', 'sg_gas', 'p_sep', 't_sep', 'num_points']
+CORRELATION_FIELDS: Dict[str, str] = {
+    'gas_sol_corr': "Vasquez Beggs",
+    'gas_comp_corr': "Carnahan Starling",
+    'gas_visc_corr': "Lee Gonzalez Eakin",
+    'oil_fvf_corr': "Vasquez Beggs",
+    'oil_visc_corr': "Beggs Robinson"
+}
+
+# Largest number of records handed to a worker at a time, and the number of chunks every worker gets when there are
+# fewer records, so the workers stay busy until the end of the batch however the tables differ in size
+MAX_CHUNK_SIZE: int = 16
+CHUNKS_PER_WORKER: int = 4
+
+
+class BatchResult:
+    """
+    PVT tables of a batch, stored one after the other in a single 2-D array with one column per table column
+
+    Attributes:
+    ----------
+    values : np.ndarray
+        Rows of every table, table i occupies rows offsets[i] to offsets[i + 1]
+    offsets : np.ndarray
+        Index of the first row of every table, followed by the total number of rows
+    columns : list of str
+        Names of the columns
+    stats : dict
+        Number of tables and points, wall time and throughput of the batch and of every worker process
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray, columns: List[str], stats: Dict):
+        self.values = values
+        self.offsets = offsets
+        self.columns = columns
+        self.stats = stats
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def table(self, index: int) -> "pd.DataFrame":
+        import pandas as pd
+        return pd.DataFrame(self.values[self.offsets[index]:self.offsets[index + 1]], columns=self.columns)
+
+    def tables(self) -> List["pd.DataFrame"]:
+        return [self.table(index) for index in range(len(self))]
+
+
+def run_batch(records: Union[Sequence[Dict], "pd.DataFrame"], workers: Optional[int] = None,
+              chunk_size: Optional[int] = None, columns: Optional[List[str]] = None,
+              start_method: Optional[str] = None) -> BatchResult:
+    """
+    Generates the PVT tables of many fluids and conditions in parallel worker processes
+
+    The records are split into chunks that are handed to a process pool, every worker writes its tables straight into
+    a shared memory block, so only the chunk descriptions and the timing of every chunk are sent between processes.
+    The tables are calculated with the columnar pvt_table, so they are identical to the ones of the serial path. The
+    workers use the backend that is active in this process
+
+    Parameters:
+    ----------
+    records : sequence of dict or pd.DataFrame
+        One record per table with pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep and num_points, and
+        optionally the gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr and oil_visc_corr to use
+    workers : int, optional
+        Number of worker processes, defaults to the number of CPUs. With one worker the batch runs in this process
+    chunk_size : int, optional
+        Number of records handed to a worker at a time, by default the number giving every worker CHUNKS_PER_WORKER
+        chunks, at most MAX_CHUNK_SIZE
+    columns : list of str, optional
+        Columns of pvt_table to calculate, all of them by default
+    start_method : str, optional
+        How the worker processes are started, 'fork', 'forkserver' or 'spawn', the platform default if not given.
+        Once the numba backend has run its parallel kernels, workers forked from this process keep it from exiting,
+        so start them with 'forkserver' or 'spawn', which need the script to be guarded by
+        if __name__ == '__main__'
+
+    Returns:
+    -------
+    BatchResult
+        Tables of all the records, in the order of the records
+
+    Example:
+    --------
+    >>> result = run_batch([{'pressure_max': 3000, 'p_bubble': 1700, 'temp': 620, 'oil_api': 35, 'sg_gas': 0.68, 'p_sep': 120, 't_sep': 520, 'num_points': 301}], workers=1)
+    >>> result.table(0).shape
+    (301, 9)
+    """
+
+    records = _normalize_records(records)
+    table_columns: List[str] = list(Prop_Graph.evaluate_columns(
+        {'pressure': 0.0, 'temp': 600.0, 'oil_api': 35.0, 'sg_gas': 0.7, 'p_bubble': 1000.0, 'p_sep': 114.7,
+         't_sep': 520.0}, columns, {}).keys()) if columns is not None else list(Prop_Graph.COLUMNS)
+    offsets: np.ndarray = np.concatenate([[0], np.cumsum([record['num_points'] for record in records])]).astype(int)
+    shape: Tuple[int, int] = (int(offsets[-1]), len(table_columns))
+    workers = workers if workers is not None else os.cpu_count() or 1
+    backend: str = Backends.get_backend().name
+    chunks: List[List[Tuple[int, Dict]]] = _split_records(records, workers, chunk_size)
+
+    start_time: float = time.perf_counter()
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        if workers <= 1:
+            chunk_stats = [_run_chunk(block.name, shape, offsets, chunk, columns) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(start_method),
+                                     initializer=_init_worker, initargs=(backend,)) as executor:
+                chunk_stats = list(executor.map(_run_chunk, [block.name] * len(chunks), [shape] * len(chunks),
+                                                [offsets] * len(chunks), chunks, [columns] * len(chunks)))
+        values: np.ndarray = np.ndarray(shape, dtype=float, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+    wall_time: float = time.perf_counter() - start_time
+
+    return BatchResult(values, offsets, table_columns, _batch_stats(chunk_stats, wall_time))
+
+
+def _split_records(records: List[Dict], workers: int, chunk_size: Optional[int]) -> List[List[Tuple[int, Dict]]]:
+    # Chunks of (index, record) pairs handed to the workers, by default small enough for every worker to get
+    # CHUNKS_PER_WORKER of them, as a batch of fewer records than workers times MAX_CHUNK_SIZE would leave workers idle
+    if chunk_size is None:
+        chunk_size = min(MAX_CHUNK_SIZE, -(-len(records) // (max(workers, 1) * CHUNKS_PER_WORKER)))
+    chunk_size = max(chunk_size, 1)
+    return [list(zip(range(start, start + chunk_size), records[start:start + chunk_size]))
+            for start in range(0, len(records), chunk_size)]
+
+
+def _normalize_records(records: Union[Sequence[Dict], "pd.DataFrame"]) -> List[Dict]:
+    # Records as dicts with every field present
+    records = records.to_dict('records') if PVT_Result.is_dataframe(records) else list(records)
+    normalized: List[Dict] = []
+    for index, record in enumerate(records):
+        missing: List[str] = [field for field in RECORD_FIELDS if field not in record]
+        if missing:
+            raise ValueError(f"Record {index} is missing {', '.join(missing)}")
+        normalized_record: Dict = {field: record[field] for field in RECORD_FIELDS}
+        normalized_record['num_points'] = int(record['num_points'])
+        normalized_record.update({field: record.get(field) if isinstance(record.get(field), str) else default
+                                  for field, default in CORRELATION_FIELDS.items()})
+        normalized.append(normalized_record)
+    return normalized
+
+
+def _pool_context(start_method: Optional[str]) -> Optional[multiprocessing.context.BaseContext]:
+    # Context that starts the worker processes, the forkserver imports this module once for all of them
+    if start_method is None:
+        return None
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        context.set_forkserver_preload([__name__])
+    return context
+
+
+def _init_worker(backend: str):
+    # Workers that are not forked start with the default backend
+    Backends.set_backend(backend)
+
+
+def _run_chunk(block_name: str, shape: Tuple[int, int], offsets: np.ndarray, chunk: List[Tuple[int, Dict]],
+               columns: Optional[List[str]]) -> Dict:
+    # Calculate the tables of a chunk of records and write them into their rows of the shared block
+    start_time: float = time.perf_counter()
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        values: np.ndarray = np.ndarray(shape, dtype=float, buffer=block.buf)
+        for index, record in chunk:
+            p_range: np.ndarray = np.linspace(0, record['pressure_max'], record['num_points'])
+            table: Dict[str, np.ndarray] = PVT_Table._pvt_columns(
+                p_range, record['p_bubble'], record['temp'], record['oil_api'], record['sg_gas'], record['p_sep'],
+                record['t_sep'], record['gas_sol_corr'], record['gas_comp_corr'], record['gas_visc_corr'],
+                record['oil_fvf_corr'], record['oil_visc_corr'], columns)
+            rows = values[offsets[index]:offsets[index + 1]]
+            for col, column in enumerate(table.values()):
+                rows[:, col] = column
+        del values, rows
+    finally:
+        block.close()
+
+    return {'pid': os.getpid(), 'backend': Backends.get_backend().name, 'tables': len(chunk),
+            'points': int(sum(record['num_points'] for _, record in chunk)), 'time': time.perf_counter() - start_time}
+
+
+def _batch_stats(chunk_stats: List[Dict], wall_time: float) -> Dict:
+    # Totals of the batch and of every worker process
+    per_worker: Dict[int, Dict] = {}
+    for stats in chunk_stats:
+        worker = per_worker.setdefault(stats['pid'], {'backend': stats['backend'], 'tables': 0, 'points': 0,
+                                                      'time': 0.0})
+        worker['tables'] += stats['tables']
+        worker['points'] += stats['points']
+        worker['time'] += stats['time']
+    for worker in per_worker.values():
+        worker['tables_per_second'] = worker['tables'] / worker['time'] if worker['time'] > 0 else float('nan')
+        worker['points_per_second'] = worker['points'] / worker['time'] if worker['time'] > 0 else float('nan')
+
+    tables: int = sum(stats['tables'] for stats in chunk_stats)
+    points: int = sum(stats['points'] for stats in chunk_stats)
+    return {'tables': tables, 'points': points, 'wall_time': wall_time,
+            'tables_per_second': tables / wall_time if wall_time > 0 else float('nan'),
+            'points_per_second': points / wall_time if wall_time > 0 else float('nan'),
+            'workers': per_worker}
@@ -0,0 +1,414 @@
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Compressibility_Table as Gas_Comp_Tab
+from . import PVT_Lookup
+from . import PVT_Table
+from . import Wrappers
+
+# Modules whose correlations are benchmarked
+CORRELATION_MODULES: List[str] = ['Gas_Solubility', 'Gas_Compressibility_Factor', 'Gas_Compressibility_Table',
+                                  'Gas_Viscosity', 'Gas_Formation_Volume_Factor', 'Oil_Formation_Volume_Factor',
+                                  'Oil_Visocsity', 'Oil_Density']
+
+# Correlation options of pvt_table that are benchmarked against each other
+TABLE_CORRELATIONS: Dict[str, List[str]] = {
+    'gas_sol_corr': ["Vasquez Beggs", "Standing"],
+    'gas_comp_corr': ["Carnahan Starling", "Carnahan Starling Tabulated", "Papay", "Beggs Brill",
+                      "Dranchuk Abou Kassem"],
+    'oil_fvf_corr': ["Vasquez Beggs", "Standing"]
+}
+
+TABLE_SIZES: List[int] = [301, 10000, 1000000]
+
+# Reference results every run is compared against by default, from a reduced run over BASELINE_SIZES. Its timings are
+# scaled by how fast the calibration workloads ran on either machine, which leaves run to run noise of up to about
+# 50 % on a shared machine, so the baseline is best rewritten with --update-baseline on the machine the benchmarks run on
+BASELINE_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+BASELINE_SIZES: List[int] = [301, 10000]
+DEFAULT_THRESHOLD: float = 0.5
+
+# Metrics that are not timings, compared as they are rather than scaled by the speed of the machine
+UNSCALED_METRICS: List[str] = ['max_rel_error', 'peak_memory_mb']
+
+# Statements whose import time is measured in a fresh interpreter, from the bare package to the parts that need pandas
+IMPORT_STATEMENTS: Dict[str, str] = {
+    'package': "import pvt_correlations",
+    'scalar_correlations': "from pvt_correlations import Gas_Solubility, Oil_Formation_Volume_Factor",
+    'pvt_table': "from pvt_correlations import pvt_table",
+    'pandas_table': "import pvt_correlations; pvt_correlations.PVTResult.empty(['Pressure'], 1).to_pandas()"
+}
+
+# Conditions every correlation is timed at
+SCALAR_INPUTS: Dict[str, float] = {'pressure': 1000.0, 'temp': 620.0, 'oil_api': 35.0, 'sg_gas': 0.7,
+                                   'p_bubble': 1500.0, 'p_sep': 114.7, 't_sep': 520.0, 'gas_sol': 150.0}
+TABLE_INPUTS: Dict[str, float] = {'pressure_max': 5000.0, 'p_bubble': 1700.0, 'temp': 620.0, 'oil_api': 35.0,
+                                  'sg_gas': 0.68, 'p_sep': 120.0, 't_sep': 520.0}
+
+
+def time_call(func: Callable, min_time: float = 0.2, repeat: int = 3) -> float:
+    """
+    Returns the best time of a call in seconds, over several runs of enough calls to last min_time
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def peak_memory(func: Callable) -> int:
+    """
+    Returns the peak memory in bytes allocated during a call, as seen by tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def correlation_functions() -> Dict[str, Dict[str, Callable]]:
+    """
+    Returns the public correlations of every benchmarked module, paired with their batched version. Functions with
+    a _vectorized counterpart are batched by it, functions that already accept arrays are batched by themselves
+    """
+    functions: Dict[str, Dict[str, Callable]] = {}
+    for module_name in CORRELATION_MODULES:
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        members: Dict[str, Callable] = {name: func for name, func in inspect.getmembers(module, inspect.isfunction)
+                                        if func.__module__ == module.__name__ and not name.startswith('_')}
+        for name, func in members.items():
+            if name.endswith('_vectorized') and name[:-len('_vectorized')] in members:
+                continue
+            if name.endswith('_table') or name.endswith('_error'):
+                continue
+            batched: Optional[Callable] = members.get(name + '_vectorized', func)
+            functions[f"{module_name}.{name}"] = {'scalar': func, 'batched': batched}
+    return functions
+
+
+def benchmark_correlations(num_points: int = 100000, min_time: float = 0.2) -> Dict[str, Dict]:
+    """
+    Times every correlation on one point and on num_points pressures
+
+    Returns:
+    -------
+    dict
+        Time of a scalar call in microseconds and of a batched call per point in nanoseconds, for every correlation
+    """
+    pressure: np.ndarray = np.linspace(10.0, 5000.0, num_points)
+    results: Dict[str, Dict] = {}
+    for name, funcs in correlation_functions().items():
+        scalar_func: Callable = funcs['scalar']
+        batched_func: Callable = funcs['batched']
+        result: Dict[str, Optional[float]] = {'scalar_us': None, 'batched_ns_per_point': None}
+
+        result['scalar_us'] = time_call(lambda: Wrappers.dynamic_wrapper(scalar_func, **SCALAR_INPUTS),
+                                        min_time) * 1e6
+        batched_inputs: Dict = dict(SCALAR_INPUTS, pressure=pressure)
+        try:
+            with np.errstate(all='ignore'):
+                Wrappers.dynamic_wrapper(batched_func, **batched_inputs)
+        except (TypeError, ValueError):
+            # Scalar only correlation
+            pass
+        else:
+            result['batched_ns_per_point'] = time_call(
+                lambda: Wrappers.dynamic_wrapper(batched_func, **batched_inputs), min_time) * 1e9 / num_points
+        results[name] = result
+    return results
+
+
+def benchmark_pvt_table(sizes: Optional[List[int]] = None, min_time: float = 0.2,
+                        row_path_max_points: int = 301) -> Dict[str, Dict]:
+    """
+    Times pvt_table and records its peak memory for every table size and combination of correlation options. The row
+    by row path is only timed up to row_path_max_points
+
+    Returns:
+    -------
+    dict
+        Time in milliseconds, time per point in nanoseconds and peak memory in megabytes, keyed by
+        'num_points|path|correlations'
+    """
+    sizes = sizes if sizes is not None else TABLE_SIZES
+    results: Dict[str, Dict] = {}
+    options: List[Dict[str, str]] = [dict(zip(TABLE_CORRELATIONS, combination)) for combination in
+                                     itertools.product(*TABLE_CORRELATIONS.values())]
+    for num_points, correlations in itertools.product(sizes, options):
+        for columnar in (True, False):
+            if not columnar and num_points > row_path_max_points:
+                continue
+
+            def run():
+                with np.errstate(all='ignore'):
+                    PVT_Table.pvt_table(num_points=num_points, columnar=columnar, **TABLE_INPUTS, **correlations)
+
+            elapsed: float = time_call(run, min_time, repeat=1 if num_points >= 1000000 else 3)
+            key: str = f"{num_points}|{'columnar' if columnar else 'row'}|" + ','.join(correlations.values())
+            results[key] = {'num_points': num_points, 'columnar': columnar, **correlations,
+                            'time_ms': elapsed * 1e3, 'ns_per_point': elapsed * 1e9 / num_points,
+                            'peak_memory_mb': peak_memory(run) / 1e6}
+    return results
+
+
+def benchmark_z_factor(temp_pr: Optional[np.ndarray] = None, pressure_pr: Optional[np.ndarray] = None,
+                       min_time: float = 0.2) -> Dict[str, Dict]:
+    """
+    Compares the accuracy and speed of the compressibility factor correlations over a grid of pseudo-reduced
+    temperatures and pressures. The reference is the Carnahan-Starling equation of state solved to a tight tolerance
+
+    Parameters:
+    ----------
+    temp_pr : np.ndarray, optional
+        Pseudo-reduced temperatures, 1.2 to 3.0 by default
+    pressure_pr : np.ndarray, optional
+        Pseudo-reduced pressures, 0.2 to 15 by default
+
+    Returns:
+    -------
+    dict
+        Maximum and mean absolute relative error, the same over pseudo-reduced pressures up to 8, the fraction of
+        points with a finite result and the time per point in nanoseconds, for every correlation
+    """
+    temp_pr = np.linspace(1.2, 3.0, 37) if temp_pr is None else np.asarray(temp_pr, dtype=float)
+    pressure_pr = np.linspace(0.2, 15.0, 149) if pressure_pr is None else np.asarray(pressure_pr, dtype=float)
+
+    # Lay the grid out on a gas of fixed gravity, so the correlations see the intended reduced conditions
+    sg_gas: float = 0.7
+    temp_pc, pressure_pc = Gas_Comp._standing_pseudo_critical(np.asarray(sg_gas))
+    temp_pr_grid, pressure_pr_grid = np.meshgrid(temp_pr, pressure_pr, indexing='ij')
+    temp: np.ndarray = temp_pr_grid * temp_pc
+    pressure: np.ndarray = pressure_pr_grid * pressure_pc
+    reference: np.ndarray = Gas_Comp_Tab._converged_z_factor(temp_pr_grid, pressure_pr_grid)
+    low_pressure: np.ndarray = pressure_pr_grid <= 8
+
+    methods: Dict[str, Callable] = {
+        "Carnahan Starling": Gas_Comp.carnahan_starling_hs_eos_vectorized,
+        "Carnahan Starling Tabulated": Gas_Comp_Tab.tabulated_z_factor,
+        "Papay": Gas_Comp.papay,
+        "Beggs Brill": Gas_Comp.beggs_brill,
+        "Dranchuk Abou Kassem": Gas_Comp.dranchuk_abou_kassem
+    }
+    results: Dict[str, Dict] = {}
+    for name, func in methods.items():
+        with np.errstate(all='ignore'):
+            compressibility: np.ndarray = func(pressure, temp, sg_gas)
+            error: np.ndarray = np.abs(compressibility / reference - 1)
+        finite: np.ndarray = np.isfinite(error)
+        results[name] = {
+            'max_rel_error': float(np.max(error[finite])),
+            'mean_rel_error': float(np.mean(error[finite])),
+            'max_rel_error_ppr_8': float(np.max(error[finite & low_pressure])),
+            'mean_rel_error_ppr_8': float(np.mean(error[finite & low_pressure])),
+            'finite_fraction': float(np.mean(finite)),
+            'ns_per_point': time_call(lambda: func(pressure, temp, sg_gas), min_time) * 1e9 / pressure.size
+        }
+    return results
+
+
+def benchmark_lookup(num_queries: int = 1000000, min_time: float = 0.2) -> Dict[str, Dict]:
+    """
+    Measures the query rate of PVTLookup built from a 301 point pvt_table, for random and sorted pressures
+
+    Returns:
+    -------
+    dict
+        Millions of single column lookups per second and of values per second when all the columns are looked up at
+        once, for every interpolation method and query order
+    """
+    table = PVT_Table.pvt_table(num_points=301, **TABLE_INPUTS)
+    queries: np.ndarray = np.random.default_rng(0).uniform(0.0, TABLE_INPUTS['pressure_max'], num_queries)
+    results: Dict[str, Dict] = {}
+    for method, order in itertools.product(PVT_Lookup.METHODS, ('random', 'sorted')):
+        lookup: PVT_Lookup.PVTLookup = PVT_Lookup.PVTLookup.from_table(table, TABLE_INPUTS['p_bubble'], method)
+        pressure: np.ndarray = queries if order == 'random' else np.sort(queries)
+        single: float = time_call(lambda: lookup.interpolate(pressure, 'Oil FVF'), min_time)
+        every: float = time_call(lambda: lookup(pressure), min_time)
+        results[f"{method}|{order}"] = {'single_column_mlookups_per_s': num_queries / single / 1e6,
+                                        'all_columns_mvalues_per_s': num_queries * len(lookup.columns) / every / 1e6}
+    return results
+
+
+def benchmark_calibration(min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Times fixed numpy and pure Python workloads, whose ratio between two runs is how much faster one machine is
+
+    Returns:
+    -------
+    dict
+        Time of the numpy and of the Python workload in microseconds
+    """
+    values: np.ndarray = np.linspace(1.0, 2.0, 100000)
+    return {'numpy_us': time_call(lambda: np.exp(np.sqrt(values)).sum(), min_time) * 1e6,
+            'python_us': time_call(lambda: sum(i * i for i in range(10000)), min_time) * 1e6}
+
+
+def benchmark_import(repeat: int = 5) -> Dict[str, Dict]:
+    """
+    Measures the time of every IMPORT_STATEMENTS in a fresh interpreter, which is what a short-lived worker process
+    pays on start-up
+
+    Returns:
+    -------
+    dict
+        Best and median time in milliseconds over repeat interpreters, and whether numpy and pandas were loaded, for
+        every statement
+    """
+    # The package is imported from the directory that holds it, whether it is installed or not
+    env: Dict[str, str] = dict(os.environ)
+    root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([root] + [env['PYTHONPATH']] if env.get('PYTHONPATH') else [root])
+
+    results: Dict[str, Dict] = {}
+    for name, statement in IMPORT_STATEMENTS.items():
+        script: str = ("import sys, time\nstart = time.perf_counter()\n" + statement + "\n"
+                       "print(time.perf_counter() - start, 'numpy' in sys.modules, 'pandas' in sys.modules)")
+        times: List[float] = []
+        for _ in range(repeat):
+            output: List[str] = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                               capture_output=True, text=True).stdout.split()
+            times.append(float(output[0]) * 1e3)
+        results[name] = {'ms': min(times), 'median_ms': statistics.median(times), 'numpy': output[1] == 'True',
+                         'pandas': output[2] == 'True'}
+    return results
+
+
+def run_benchmarks(sizes: Optional[List[int]] = None, num_points: int = 100000, min_time: float = 0.2) -> Dict:
+    """
+    Runs the whole benchmark suite
+
+    Returns:
+    -------
+    dict
+        Environment of the run, and the results of benchmark_calibration, benchmark_import, benchmark_correlations,
+        benchmark_z_factor, benchmark_lookup and benchmark_pvt_table
+    """
+    return {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'sizes': sizes if sizes is not None else TABLE_SIZES,
+                 'points': num_points, 'min_time': min_time},
+        'calibration': benchmark_calibration(min_time),
+        'import': benchmark_import(),
+        'correlations': benchmark_correlations(num_points, min_time),
+        'z_factor': benchmark_z_factor(min_time=min_time),
+        'lookup': benchmark_lookup(min_time=min_time),
+        'pvt_table': benchmark_pvt_table(sizes, min_time)
+    }
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Lists the timings that are slower than the baseline by more than the threshold fraction, once the timings of the
+    baseline are scaled by how much slower its calibration workloads ran than the ones of the results
+
+    Returns:
+    -------
+    list of dict
+        Section, benchmark, metric, scaled baseline and current value of every regression
+    """
+    regressions: List[Dict] = []
+    scale: float = machine_scale(results, baseline)
+    # Batched timings per point depend on the number of points, so they are only compared between runs of as many
+    same_points: bool = results.get('meta', {}).get('points') == baseline.get('meta', {}).get('points')
+    metrics: Dict[str, List[str]] = {'import': ['ms'],
+                                     'correlations': ['scalar_us', 'batched_ns_per_point'],
+                                     'z_factor': ['ns_per_point', 'max_rel_error'],
+                                     'pvt_table': ['ns_per_point', 'peak_memory_mb']}
+    for section, section_metrics in metrics.items():
+        for name, result in results.get(section, {}).items():
+            reference: Optional[Dict] = baseline.get(section, {}).get(name)
+            if reference is None:
+                continue
+            for metric in section_metrics:
+                if metric == 'batched_ns_per_point' and not same_points:
+                    continue
+                current, previous = result.get(metric), reference.get(metric)
+                if current is None or previous is None or previous <= 0:
+                    continue
+                if metric not in UNSCALED_METRICS:
+                    previous *= scale
+                if current > previous * (1 + threshold):
+                    regressions.append({'section': section, 'benchmark': name, 'metric': metric,
+                                        'baseline': previous, 'current': current,
+                                        'change': current / previous - 1})
+    return regressions
+
+
+def machine_scale(results: Dict, baseline: Dict) -> float:
+    """
+    Returns how much slower the machine of the results is than the one of the baseline, the geometric mean of the
+    ratios of their calibration timings, 1 when either has no calibration
+
+    Example:
+    --------
+    >>> machine_scale({'calibration': {'numpy_us': 200, 'python_us': 800}}, {'calibration': {'numpy_us': 100, 'python_us': 100}})
+    4.0
+    """
+    current: Dict[str, float] = results.get('calibration', {})
+    reference: Dict[str, float] = baseline.get('calibration', {})
+    ratios: List[float] = [current[name] / reference[name] for name in current
+                           if reference.get(name, 0) > 0 and current[name] > 0]
+    return float(np.exp(np.mean(np.log(ratios)))) if ratios else 1.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PVT correlations and pvt_table")
+    parser.add_argument('--output', help="File to write the JSON results to, printed when not given")
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help="JSON results of an earlier run to compare against, the stored baseline by default")
+    parser.add_argument('--no-baseline', action='store_true', help="Do not compare against any baseline")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Write the results to the baseline file instead of comparing against it, run with "
+                             "--sizes " + ' '.join(str(size) for size in BASELINE_SIZES) + " for the stored baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Fraction a timing may exceed the baseline by before it counts as a regression")
+    parser.add_argument('--sizes', type=int, nargs='+', default=TABLE_SIZES, help="pvt_table sizes to time")
+    parser.add_argument('--points', type=int, default=100000, help="Number of points of the batched calls")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum duration of a timing run in seconds")
+    args = parser.parse_args(argv)
+
+    results: Dict = run_benchmarks(args.sizes, args.points, args.min_time)
+
+    exit_code: int = 0
+    if args.update_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+            baseline_file.write('\n')
+    elif not args.no_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline: Dict = json.load(baseline_file)
+        results['regressions'] = compare_to_baseline(results, baseline, args.threshold)
+        exit_code = 1 if results['regressions'] else 0
+        for regression in results['regressions']:
+            sys.stderr.write(f"Regression of {regression['section']} {regression['benchmark']} {regression['metric']}: "
+                             f"{regression['baseline']:.4g} -> {regression['current']:.4g} "
+                             f"(+{100 * regression['change']:.0f} %)\n")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
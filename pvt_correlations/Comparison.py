@@ -0,0 +1,166 @@
+import itertools
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import Property_Graph as Prop_Graph
+
+
+class CorrelationComparison:
+    """
+    Columns of the PVT table for every variant of the correlations they depend on, with the deviations between the
+    variants of every column
+
+    Attributes:
+    ----------
+    pressure : np.ndarray
+        Pressures of the table
+    variants : dict
+        Values of every variant of every column, by column and then by the label of the correlations of the variant
+    deviations : list of dict
+        Largest absolute, and largest and mean relative, deviation of every pair of variants of every column
+    stats : dict
+        Number of combinations of correlations, number of properties calculated, number that one graph per
+        combination would have calculated, and wall time
+    """
+
+    def __init__(self, pressure: np.ndarray, variants: Dict[str, Dict[str, np.ndarray]], deviations: List[Dict],
+                 stats: Dict):
+        self.pressure = pressure
+        self.variants = variants
+        self.deviations = deviations
+        self.stats = stats
+
+    def __repr__(self):
+        num_variants: int = sum(len(variants) for variants in self.variants.values())
+        return (f"CorrelationComparison({len(self.pressure)} pressures, {num_variants} variants of "
+                f"{len(self.variants)} columns)")
+
+    def to_pandas(self):
+        """
+        Returns the variants as a DataFrame indexed by pressure, with (property, correlation) columns
+        """
+        import pandas as pd
+        labels: List[Tuple[str, str]] = [(column, label) for column, variants in self.variants.items()
+                                         for label in variants]
+        values: np.ndarray = np.column_stack([values for variants in self.variants.values()
+                                              for values in variants.values()])
+        return pd.DataFrame(values, index=pd.Index(self.pressure, name='Pressure'),
+                            columns=pd.MultiIndex.from_tuples(labels, names=['property', 'correlation']))
+
+    def deviation_table(self):
+        """
+        Returns the deviations as a DataFrame indexed by (property, correlation_a, correlation_b)
+        """
+        import pandas as pd
+        return pd.DataFrame(self.deviations).set_index(['property', 'correlation_a', 'correlation_b'])
+
+
+def compare_correlations(pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float,
+                         p_sep: float, t_sep: float, num_points: int,
+                         correlations: Optional[Dict[str, Sequence[str]]] = None, columns: Optional[List[str]] = None,
+                         derivatives: bool = False) -> CorrelationComparison:
+    """
+    Calculates the PVT table for every combination of correlations in one pass, and compares the variants of every
+    column
+
+    The graphs of all the combinations share one cache of properties, keyed by how each property is calculated, so a
+    property is calculated once for every distinct way of calculating it rather than once per combination: the
+    separator gas gravity and the dead oil viscosity once in all, Z once per compressibility factor correlation
+
+    Parameters:
+    ----------
+    pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, num_points
+        Conditions of the table, as in pvt_table
+    correlations : dict, optional
+        Correlations to compare for each of gas_sol, gas_comp_factor, gas_visc, oil_fvf and oil_visc, every
+        registered correlation of the properties left out
+    columns : list of str, optional
+        Columns of pvt_table to compare, all of them by default
+    derivatives : bool, optional
+        Include the DERIVATIVE_COLUMNS in the default columns
+
+    Returns:
+    -------
+    CorrelationComparison
+        Variants of every column, labelled with the correlation of the column followed by the correlations of the
+        other properties it depends on, and their pairwise deviations
+
+    Example:
+    --------
+    >>> comparison = compare_correlations(3000, 1700, 620, 35, 0.68, 120, 520, 31)
+    >>> list(comparison.variants['Oil FVF'])
+    ['Standing (gas_sol: Standing)', 'Vasquez Beggs', 'Standing (gas_sol: Vasquez Beggs)']
+    >>> comparison.stats['combinations'], comparison.stats['calculated'] < comparison.stats['without_sharing']
+    (20, True)
+    """
+    start_time: float = time.perf_counter()
+    table_columns: Dict[str, str] = {**Prop_Graph.COLUMNS, **Prop_Graph.DERIVATIVE_COLUMNS}
+    if columns is None:
+        columns = list(Prop_Graph.COLUMNS) + (list(Prop_Graph.DERIVATIVE_COLUMNS) if derivatives else [])
+    columns = [col for col in columns if col != 'Pressure']
+    unknown: List[str] = [col for col in columns if col not in table_columns]
+    if unknown:
+        raise ValueError(f"Unknown columns {', '.join(unknown)}")
+
+    choices: Dict[str, List[str]] = {prop: list((correlations or {}).get(prop) or Prop_Graph.CORRELATION_NODES[prop])
+                                     for prop in Prop_Graph.DEFAULT_CORRELATIONS}
+    pressure: np.ndarray = np.linspace(0, pressure_max, num_points)
+    inputs: Dict[str, np.ndarray] = {'pressure': pressure, 'temp': temp, 'oil_api': oil_api, 'sg_gas': sg_gas,
+                                     'p_bubble': p_bubble, 'p_sep': p_sep, 't_sep': t_sep}
+    outputs: List[str] = [table_columns[col] for col in columns]
+
+    # Every variant of a column is kept once, the first combination that calculates it names it
+    cache: Dict[Tuple, np.ndarray] = {}
+    seen: Dict[str, Dict[Tuple, str]] = {col: {} for col in columns}
+    variants: Dict[str, Dict[str, np.ndarray]] = {col: {} for col in columns}
+    without_sharing: int = 0
+    combinations: List[Tuple[str, ...]] = list(itertools.product(*choices.values()))
+    for combination in combinations:
+        graph: Prop_Graph.PropertyGraph = Prop_Graph.PropertyGraph(dict(zip(choices, combination)))
+        keys: Dict[str, Tuple] = graph.node_keys(outputs)
+        without_sharing += len(keys) - len(Prop_Graph.INPUTS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values: Dict[str, np.ndarray] = graph.evaluate(inputs, outputs, cache)
+        for col, prop in zip(columns, outputs):
+            if keys[prop] not in seen[col]:
+                label: str = _variant_label(graph, prop)
+                seen[col][keys[prop]] = label
+                variants[col][label] = np.broadcast_to(values[prop], pressure.shape)
+
+    deviations: List[Dict] = _pairwise_deviations(variants)
+    stats: Dict = {'combinations': len(combinations), 'calculated': len(cache), 'without_sharing': without_sharing,
+                   'wall_time': time.perf_counter() - start_time}
+    return CorrelationComparison(pressure, variants, deviations, stats)
+
+
+def _variant_label(graph: Prop_Graph.PropertyGraph, prop: str) -> str:
+    # Correlation of the property, followed by the correlations of the other properties it depends on
+    dependencies: List[str] = graph.dependencies([prop])
+    relevant: List[str] = []
+    for other, corr in graph.correlations.items():
+        derivative: Optional[Prop_Graph.Node] = Prop_Graph.CORRELATION_DERIVATIVE_NODES.get(other, {}).get(corr)
+        if other in dependencies or (derivative is not None and derivative.name in dependencies):
+            relevant.append(other)
+    others: str = ", ".join(f"{other}: {graph.correlations[other]}" for other in relevant if other != prop)
+    if prop not in graph.correlations:
+        return others or "Any"
+    return graph.correlations[prop] + (f" ({others})" if others else "")
+
+
+def _pairwise_deviations(variants: Dict[str, Dict[str, np.ndarray]]) -> List[Dict]:
+    # Deviations of every pair of variants of a column, relative to the mean magnitude of the pair. Points where a
+    # variant is undefined, such as the gas properties at zero pressure, are left out
+    deviations: List[Dict] = []
+    for col, column_variants in variants.items():
+        for (label_a, a), (label_b, b) in itertools.combinations(column_variants.items(), 2):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                absolute: np.ndarray = np.abs(a - b)
+                relative: np.ndarray = absolute / (0.5 * (np.abs(a) + np.abs(b)))
+            defined: np.ndarray = np.isfinite(absolute)
+            relative = np.where(absolute == 0, 0.0, relative)[defined]
+            deviations.append({'property': col, 'correlation_a': label_a, 'correlation_b': label_b,
+                               'max_abs': float(np.max(absolute[defined])) if defined.any() else float('nan'),
+                               'max_rel': float(np.max(relative)) if relative.size else float('nan'),
+                               'mean_rel': float(np.mean(relative)) if relative.size else float('nan')})
+    return deviations
@@ -1,4 +1,204 @@
+import functools
+import numpy as np
+from typing import Dict, Optional
+
+from . import Constants as const
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Solubility as Gas_Sol
+from . import Gas_Viscosity as Gas_Visc
+from . import Oil_Formation_Volume_Factor as Oil_FVF
+from . import Oil_Visocsity as Oil_Visc
+
+
 class Fluid:
-    def __init__(self, oil_api, sg_gas):
+    def __init__(self, oil_api, sg_gas, p_bubble=None, p_sep=None, t_sep=None):
         self.oil_api = oil_api
         self.sg_gas = sg_gas
+        self.p_bubble = p_bubble
+        self.p_sep = p_sep
+        self.t_sep = t_sep
+
+    def compile(self, temp: float, p_sep: Optional[float] = None, t_sep: Optional[float] = None,
+                p_bubble: Optional[float] = None) -> "FluidModel":
+        """
+        Returns the model of the fluid at the given temperature, the separator conditions and the bubble point
+        default to the ones of the fluid
+        """
+        conditions: Dict[str, Optional[float]] = {
+            'p_bubble': p_bubble if p_bubble is not None else self.p_bubble,
+            'p_sep': p_sep if p_sep is not None else self.p_sep,
+            't_sep': t_sep if t_sep is not None else self.t_sep}
+        missing = [name for name, value in conditions.items() if value is None]
+        if missing:
+            raise ValueError(f"Missing {', '.join(missing)}, set them on the fluid or pass them to compile")
+        return compile_fluid_model(self.oil_api, self.sg_gas, conditions['p_bubble'], temp, conditions['p_sep'],
+                                   conditions['t_sep'])
+
+
+class FluidModel:
+    """
+    Fluid at a fixed temperature and separator condition, with every pressure independent quantity of the default
+    correlations (Vasquez-Beggs solubility and oil FVF, Beggs-Robinson oil viscosity, Carnahan-Starling compressibility
+    factor and Lee-Gonzalez-Eakin gas viscosity) calculated once when the model is built
+
+    The property methods accept a pressure or an array of pressures in psia and return the same values as the
+    vectorized correlations. The model is a standalone API for evaluating one fluid at many pressures, pvt_table,
+    pvt_cube and run_batch do not use it, as they take any registered correlation. A model cannot be changed once it
+    is built, so the models shared by compile_fluid_model stay as they were built
+    """
+
+    __slots__ = ('oil_api', 'sg_gas', 'p_bubble', 'temp', 'p_sep', 't_sep', 'sg_oil', 'sg_gas_sep',
+                 'gas_sol_coeff', 'gas_sol_exp', 'gas_sol_bp', 'oil_fvf_coeff', 'oil_fvf_pb', 'a_coeff',
+                 'oil_visc_dead', 'oil_visc_pb', 'pressure_pc', 'theta', 'alpha', 'mw_gas', 'k_param', 'x_param',
+                 'y_param', '_frozen')
+
+    def __init__(self, oil_api: float, sg_gas: float, p_bubble: float, temp: float, p_sep: float, t_sep: float):
+        self.oil_api = float(oil_api)
+        self.sg_gas = float(sg_gas)
+        self.p_bubble = float(p_bubble)
+        self.temp = float(temp)
+        self.p_sep = float(p_sep)
+        self.t_sep = float(t_sep)
+        self.sg_oil = 141.5 / (131.5 + self.oil_api)
+
+        # Vasquez-Beggs gas solubility, Rs = gas_sol_coeff * min(p, p_bubble) ^ gas_sol_exp
+        self.sg_gas_sep = float(Gas_Sol._separator_gas_gravity(self.sg_gas, self.oil_api, self.p_sep, self.t_sep))
+        rs_coeff = [float(c) for c in Gas_Sol._vasquez_beggs_coefficients(self.oil_api)]
+        self.gas_sol_coeff = rs_coeff[0] * self.sg_gas_sep * float(np.exp(rs_coeff[2] * self.oil_api / self.temp))
+        self.gas_sol_exp = rs_coeff[1]
+        self.gas_sol_bp = self.gas_sol_coeff * float(np.power(self.p_bubble, self.gas_sol_exp))
+
+        # Vasquez-Beggs oil FVF, saturated Bo = 1 + c0 * Rs + c1 + c2 * Rs with the temperature terms folded in
+        bo_coeff = [float(c) for c in Oil_FVF._vasquez_beggs_coefficients(self.oil_api)]
+        temp_term = (self.temp - 520) * (self.oil_api / self.sg_gas_sep)
+        self.oil_fvf_coeff = (bo_coeff[0], temp_term * bo_coeff[1], temp_term * bo_coeff[2])
+        self.oil_fvf_pb = self._saturated_oil_fvf(self.gas_sol_bp)
+        self.a_coeff = float(np.power(10.0, -5) * (-1433 + 5 * self.gas_sol_bp + 17.2 * (self.temp - 460) -
+                                                   1180 * self.sg_gas_sep + 12.61 * self.oil_api))
+
+        # Beggs-Robinson dead oil viscosity and the viscosity at bubble point
+        self.oil_visc_dead = float(Oil_Visc._dead_oil_viscosity(self.temp, self.oil_api))
+        self.oil_visc_pb = float(Oil_Visc._live_oil_viscosity(self.oil_visc_dead, self.gas_sol_bp))
+
+        # Pseudo-critical properties of the gas and the Lee-Gonzalez-Eakin parameters
+        pressure_pc, theta, alpha = Gas_Comp._carnahan_starling_invariants(self.temp, self.sg_gas)
+        self.pressure_pc, self.theta, self.alpha = float(pressure_pc), float(theta), float(alpha)
+        self.mw_gas, self.k_param, self.x_param, self.y_param = (
+            float(param) for param in Gas_Visc._lee_gonzalez_eakin_parameters(self.temp, self.sg_gas))
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"FluidModel is immutable, compile a new model to change {name}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"FluidModel is immutable, {name} cannot be deleted")
+
+    def __repr__(self):
+        return (f"FluidModel(oil_api={self.oil_api}, sg_gas={self.sg_gas}, p_bubble={self.p_bubble}, "
+                f"temp={self.temp}, p_sep={self.p_sep}, t_sep={self.t_sep})")
+
+    def _saturated_oil_fvf(self, gas_sol):
+        return 1 + self.oil_fvf_coeff[0] * gas_sol + (self.oil_fvf_coeff[1] + self.oil_fvf_coeff[2] * gas_sol)
+
+    def gas_solubility(self, pressure: np.ndarray) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        return self.gas_sol_coeff * np.power(np.minimum(pressure, self.p_bubble), self.gas_sol_exp)
+
+    def oil_fvf(self, pressure: np.ndarray, gas_sol: Optional[np.ndarray] = None) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        gas_sol = gas_sol if gas_sol is not None else self.gas_solubility(pressure)
+        with np.errstate(divide='ignore'):
+            oil_fvf_undersat = self.oil_fvf_pb * np.exp(-self.a_coeff * np.log(pressure / self.p_bubble))
+        return np.where(pressure < self.p_bubble, self._saturated_oil_fvf(gas_sol), oil_fvf_undersat)
+
+    def oil_viscosity(self, pressure: np.ndarray, gas_sol: Optional[np.ndarray] = None) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        gas_sol = gas_sol if gas_sol is not None else self.gas_solubility(pressure)
+        return np.where(pressure <= self.p_bubble, Oil_Visc._live_oil_viscosity(self.oil_visc_dead, gas_sol),
+                        self.oil_visc_pb * Oil_Visc._undersaturated_viscosity_ratio(pressure, self.p_bubble))
+
+    def gas_comp_factor(self, pressure: np.ndarray) -> np.ndarray:
+        pressure_pr = np.asarray(pressure, dtype=float) / self.pressure_pc
+        rho_h, _, _ = Gas_Comp._solve_reduced_density(pressure_pr, np.full(pressure_pr.shape, self.theta),
+                                                      np.full(pressure_pr.shape, self.alpha))
+        return self.alpha * pressure_pr / rho_h
+
+    def gas_density(self, pressure: np.ndarray) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        return pressure * self.mw_gas / (const.gas_const * self.temp)
+
+    def gas_fvf(self, pressure: np.ndarray, gas_comp_factor: Optional[np.ndarray] = None) -> np.ndarray:
+        gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else self.gas_comp_factor(pressure)
+        return 0.02827 * gas_comp_factor * self.temp / np.asarray(pressure, dtype=float)
+
+    def gas_viscosity(self, pressure: np.ndarray, gas_comp_factor: Optional[np.ndarray] = None) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else self.gas_comp_factor(pressure)
+        gas_density = pressure * self.mw_gas / (gas_comp_factor * const.gas_const * self.temp)
+        return 0.0001 * self.k_param * np.exp(self.x_param * np.power(gas_density / 62.4, self.y_param))
+
+    def oil_density(self, pressure: np.ndarray, gas_sol: Optional[np.ndarray] = None,
+                    oil_fvf: Optional[np.ndarray] = None) -> np.ndarray:
+        pressure = np.asarray(pressure, dtype=float)
+        gas_sol = gas_sol if gas_sol is not None else self.gas_solubility(pressure)
+        oil_fvf = oil_fvf if oil_fvf is not None else self.oil_fvf(pressure, gas_sol)
+        return (62.4 * self.sg_oil + 0.0136 * gas_sol * self.sg_gas) / oil_fvf
+
+    def pvt_columns(self, pressure: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calculates every column of the PVT table at the given pressures, sharing the intermediate results
+        """
+        pressure = np.asarray(pressure, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gas_sol = self.gas_solubility(pressure)
+            gas_comp_factor = self.gas_comp_factor(pressure)
+            oil_fvf = self.oil_fvf(pressure, gas_sol)
+            return {
+                'Pressure': pressure,
+                'Gas Solubility': gas_sol,
+                'Gas Compressibility Factor': gas_comp_factor,
+                'Gas Density': self.gas_density(pressure),
+                'Gas FVF': self.gas_fvf(pressure, gas_comp_factor),
+                'Gas Viscosity': self.gas_viscosity(pressure, gas_comp_factor),
+                'Oil FVF': oil_fvf,
+                'Oil Viscosity': self.oil_viscosity(pressure, gas_sol),
+                'Oil Density': self.oil_density(pressure, gas_sol, oil_fvf)
+            }
+
+
+@functools.lru_cache(maxsize=256)
+def compile_fluid_model(oil_api: float, sg_gas: float, p_bubble: float, temp: float, p_sep: float,
+                        t_sep: float) -> FluidModel:
+    """
+    Builds the model of a fluid at the given temperature and separator conditions, the most recently used models are
+    kept so repeated calls with the same inputs return the same model, which is immutable so it can be shared
+
+    Parameters:
+    ----------
+    oil_api : float
+        API gravity of the oil, indicating its density (°API)
+    sg_gas : float
+        Specific gravity of the gas relative to air
+    p_bubble: float
+        Bubble point pressure of the oil in psia
+    temp : float
+        Temperature of the fluid in degrees Rankine
+    p_sep : float
+         Actual pressure of the separator in psia
+    t_sep : float
+        Actual temperature of the separator in degrees Rankine
+
+    Returns:
+    -------
+    FluidModel
+        Model of the fluid
+
+    Example:
+    --------
+    >>> model = compile_fluid_model(oil_api=35, sg_gas=0.7, p_bubble=1500, temp=620, p_sep=114.7, t_sep=520)
+    >>> model.oil_fvf(np.array([1000, 2000]))
+    array([1.13793064, 1.18117934])
+    """
+    return FluidModel(oil_api, sg_gas, p_bubble, temp, p_sep, t_sep)
@@ -1,5 +1,7 @@
 import numpy as np
 
+from . import Instrumentation as Instr
+
 
 def carnahan_starling_hs_eos(pressure: float, temp: float, sg_gas: float) -> float:
     """
@@ -54,6 +56,7 @@ def carnahan_starling_hs_eos(pressure: float, temp: float, sg_gas: float) -> flo
     rho_h_i: float = 0.01
     tol: float = 0.001  # Tolerance
     rho_h: float = rho_h_i
+    converged: bool = False
     for i in range(100):
         # Calculate the reduced density functions using the Hall-Yarborough Method
         f1_rho_h: float = -alpha * pressure_pr + (
@@ -78,8 +81,361 @@ def carnahan_starling_hs_eos(pressure: float, temp: float, sg_gas: float) -> flo
         rho_h_next = rho_h - f_rho_h / f_dash_rho_h
         if abs(rho_h_next - rho_h) < tol:
             rho_h_conv = rho_h_next
+            converged = True
             break
         rho_h = rho_h_next
+    if Instr.ENABLED:
+        Instr.record_newton(i + 1, converged, pressure_pr, temp_pr)
     compressibility: float = alpha * pressure_pr / rho_h_conv
 
     return compressibility
+
+
+def carnahan_starling_hs_eos_vectorized(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    """
+    Calculates the compressibility of the gas for arrays of pressures and temperatures using the Hall-Yarborough method
+
+    Batched version of carnahan_starling_hs_eos. The inputs are broadcast against each other and the Newton-Raphson
+    iteration is run on the whole array at once, every element following exactly the same iteration as the scalar
+    function and dropping out of the iteration as soon as it has converged
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the gas in psia
+    temp : array_like
+        Temperature of the gas in degree Rankine
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+
+    Returns:
+    -------
+    np.ndarray
+        Compressibility of the gas, with the broadcast shape of the inputs
+
+    Notes:
+    ------
+    - The method is not recommended for application if the pseudo-reduced temperature is less than one
+    - As in the scalar function, points that fail to converge in 100 iterations fall back to a reduced density of one
+
+    Example:
+    --------
+    >>> carnahan_starling_hs_eos_vectorized(pressure=np.array([1000, 2000]), temp=500, sg_gas=0.7)
+    array([0.73836224, 0.60927306])
+    """
+
+    pressure, temp, sg_gas = np.broadcast_arrays(np.asarray(pressure, dtype=float), np.asarray(temp, dtype=float),
+                                                 np.asarray(sg_gas, dtype=float))
+
+    pressure_pc, theta, alpha = _carnahan_starling_invariants(temp, sg_gas)
+    pressure_pr: np.ndarray = pressure / pressure_pc
+
+    rho_h, _, _ = _solve_reduced_density(pressure_pr, theta, alpha)
+    compressibility: np.ndarray = alpha * pressure_pr / rho_h
+
+    return compressibility[()]
+
+
+def papay(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    """
+    Calculates the compressibility of the gas using the explicit Papay correlation
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the gas in psia
+    temp : array_like
+        Temperature of the gas in degree Rankine
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+
+    Returns:
+    -------
+    np.ndarray
+        Compressibility of the gas, with the broadcast shape of the inputs
+
+    Notes:
+    ------
+    The correlation is a quadratic in pseudo-reduced pressure and is only reliable up to a pseudo-reduced pressure of
+    about 8
+
+    Example:
+    --------
+    >>> papay(pressure=np.array([1000, 2000]), temp=600, sg_gas=0.7)
+    array([0.87020504, 0.81021847])
+    """
+
+    temp = np.asarray(temp, dtype=float)
+    temp_pc, pressure_pc = _standing_pseudo_critical(np.asarray(sg_gas, dtype=float))
+    temp_pr: np.ndarray = temp / temp_pc
+    pressure_pr: np.ndarray = np.asarray(pressure, dtype=float) / pressure_pc
+
+    compressibility: np.ndarray = (1 - 3.53 * pressure_pr / np.power(10, 0.9813 * temp_pr)
+                                   + 0.274 * np.square(pressure_pr) / np.power(10, 0.8157 * temp_pr))
+    return compressibility[()]
+
+
+def beggs_brill(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    """
+    Calculates the compressibility of the gas using the explicit Beggs-Brill fit of the Standing-Katz chart
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the gas in psia
+    temp : array_like
+        Temperature of the gas in degree Rankine
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+
+    Returns:
+    -------
+    np.ndarray
+        Compressibility of the gas, with the broadcast shape of the inputs
+
+    Notes:
+    ------
+    The correlation is not defined for pseudo-reduced temperatures below 0.92
+
+    Example:
+    --------
+    >>> beggs_brill(pressure=np.array([1000, 2000]), temp=600, sg_gas=0.7)
+    array([0.87420735, 0.79604799])
+    """
+
+    temp = np.asarray(temp, dtype=float)
+    temp_pc, pressure_pc = _standing_pseudo_critical(np.asarray(sg_gas, dtype=float))
+    temp_pr: np.ndarray = temp / temp_pc
+    pressure_pr: np.ndarray = np.asarray(pressure, dtype=float) / pressure_pc
+
+    a: np.ndarray = 1.39 * np.sqrt(temp_pr - 0.92) - 0.36 * temp_pr - 0.10
+    b: np.ndarray = ((0.62 - 0.23 * temp_pr) * pressure_pr
+                     + (0.066 / (temp_pr - 0.86) - 0.037) * np.square(pressure_pr)
+                     + 0.32 * np.power(pressure_pr, 6) / np.power(10, 9 * (temp_pr - 1)))
+    c: np.ndarray = 0.132 - 0.32 * np.log10(temp_pr)
+    d: np.ndarray = np.power(10, 0.3106 - 0.49 * temp_pr + 0.1824 * np.square(temp_pr))
+    compressibility: np.ndarray = a + (1 - a) * np.exp(-b) + c * np.power(pressure_pr, d)
+    return compressibility[()]
+
+
+def dranchuk_abou_kassem(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray, tol: float = 1e-12,
+                         max_iter: int = 100) -> np.ndarray:
+    """
+    Calculates the compressibility of the gas using the Dranchuk-Abou-Kassem equation of state
+
+    The eleven constant fit of the Standing-Katz chart is solved for the reduced density with a Newton-Raphson
+    iteration started from the ideal gas density, on the whole array at once
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the gas in psia
+    temp : array_like
+        Temperature of the gas in degree Rankine
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+    tol : float, optional
+        Relative tolerance on the reduced density
+    max_iter : int, optional
+        Maximum number of iterations
+
+    Returns:
+    -------
+    np.ndarray
+        Compressibility of the gas, with the broadcast shape of the inputs
+
+    Notes:
+    ------
+    The equation is fitted for 1.0 < Tpr < 3.0 and 0.2 < Ppr < 30, points that do not converge are NaN
+
+    Example:
+    --------
+    >>> dranchuk_abou_kassem(pressure=np.array([1000, 2000]), temp=600, sg_gas=0.7)
+    array([0.8717321 , 0.79789453])
+    """
+
+    pressure, temp, sg_gas = np.broadcast_arrays(np.asarray(pressure, dtype=float), np.asarray(temp, dtype=float),
+                                                 np.asarray(sg_gas, dtype=float))
+    temp_pc, pressure_pc = _standing_pseudo_critical(sg_gas)
+    temp_pr: np.ndarray = (temp / temp_pc).ravel()
+    pressure_pr: np.ndarray = (pressure / pressure_pc).ravel()
+
+    c1, c2, c3, c4, a11 = _dranchuk_abou_kassem_coefficients(temp_pr)
+    ideal: np.ndarray = 0.27 * pressure_pr / temp_pr
+
+    rho_r: np.ndarray = ideal.copy()
+    converged: np.ndarray = ideal == 0
+    active: np.ndarray = np.flatnonzero(~converged)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        for i in range(max_iter):
+            if active.size == 0:
+                break
+            r = rho_r[active]
+            r_sq = np.square(r)
+            exp_term = np.exp(-a11 * r_sq)
+
+            f_rho_r = (1 + c1[active] * r + c2[active] * r_sq - c3[active] * np.power(r, 5)
+                       + c4[active] * r_sq * (1 + a11 * r_sq) * exp_term - ideal[active] / r)
+            f_dash_rho_r = (c1[active] + 2 * c2[active] * r - 5 * c3[active] * np.power(r, 4)
+                            + 2 * c4[active] * r * (1 + a11 * r_sq - np.square(a11 * r_sq)) * exp_term
+                            + ideal[active] / r_sq)
+
+            r_next = r - f_rho_r / f_dash_rho_r
+            # Keep the density positive by halving it when a step would cross zero
+            r_next = np.where(r_next > 0, r_next, 0.5 * r)
+            done = np.abs(r_next - r) <= tol * r_next
+
+            rho_r[active] = r_next
+            converged[active[done]] = True
+            active = active[~done]
+
+        compressibility: np.ndarray = np.where(ideal == 0, 1.0, ideal / rho_r)
+    compressibility[~converged] = np.nan
+    return compressibility.reshape(pressure.shape)[()]
+
+
+def _standing_pseudo_critical(sg_gas: np.ndarray):
+    # Standing's equation to calculate critical pressure and temperature, element-wise for dry and wet gases
+    sg_gas_sq: np.ndarray = np.square(sg_gas)
+    dry_gas: np.ndarray = sg_gas < 0.75
+    temp_pc: np.ndarray = np.where(dry_gas, 168 + 325 * sg_gas - 12.5 * sg_gas_sq, 187 + 330 * sg_gas - 71.5 * sg_gas_sq)
+    pressure_pc: np.ndarray = np.where(dry_gas, 667 + 15 * sg_gas - 37.5 * sg_gas_sq,
+                                       706 - 51.7 * sg_gas - 11.1 * sg_gas_sq)
+    return temp_pc, pressure_pc
+
+
+def _carnahan_starling_invariants(temp: np.ndarray, sg_gas: np.ndarray):
+    # Pressure independent terms of the Hall-Yarborough method
+    temp_pc, pressure_pc = _standing_pseudo_critical(sg_gas)
+    theta: np.ndarray = 1 / (temp / temp_pc)
+    alpha: np.ndarray = 0.06125 * theta * np.exp(-1.2 * np.square(1 - theta))
+    return pressure_pc, theta, alpha
+
+
+def _dranchuk_abou_kassem_coefficients(temp_pr: np.ndarray):
+    # Density independent coefficients of the Dranchuk-Abou-Kassem equation of state
+    c1: np.ndarray = (0.3265 - 1.0700 / temp_pr - 0.5339 / np.power(temp_pr, 3) + 0.01569 / np.power(temp_pr, 4)
+                      - 0.05165 / np.power(temp_pr, 5))
+    c2: np.ndarray = 0.5475 - 0.7361 / temp_pr + 0.1844 / np.square(temp_pr)
+    c3: np.ndarray = 0.1056 * (-0.7361 / temp_pr + 0.1844 / np.square(temp_pr))
+    c4: np.ndarray = 0.6134 / np.power(temp_pr, 3)
+    return c1, c2, c3, c4, 0.7210
+
+
+def _reduced_density_function_derivative(rho_h: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    # Derivative of the Hall-Yarborough reduced density function with respect to the reduced density
+    f2_coeff: np.ndarray = -(14.76 * theta - 9.76 * np.square(theta) + 4.58 * np.power(theta, 3))
+    f3_coeff: np.ndarray = 90.7 * theta - 242.2 * theta ** 2 + 42.4 * theta ** 3
+    f3_exp: np.ndarray = 2.18 + 2.82 * theta
+    return ((1 + 4 * rho_h + 4 * np.square(rho_h) - 4 * np.power(rho_h, 3) + np.power(rho_h, 4))
+            / np.power(1 - rho_h, 4) + 2 * f2_coeff * rho_h + f3_exp * f3_coeff * rho_h ** (f3_exp - 1))
+
+
+def _hall_yarborough_derivative(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray,
+                                gas_comp_factor: np.ndarray) -> np.ndarray:
+    # Derivative of the compressibility with respect to pressure at a solution of the Hall-Yarborough equation. The
+    # reduced density follows from Z = alpha * Ppr / rho_h, and differentiating f(rho_h) = alpha * Ppr implicitly gives
+    # dZ/dP = Z / P * (1 - alpha * Ppr / (rho_h * f'(rho_h)))
+    pressure_pc, theta, alpha = _carnahan_starling_invariants(temp, sg_gas)
+    alpha_ppr: np.ndarray = alpha * pressure / pressure_pc
+    rho_h: np.ndarray = alpha_ppr / gas_comp_factor
+    return gas_comp_factor / pressure * (1 - alpha_ppr / (rho_h * _reduced_density_function_derivative(rho_h, theta)))
+
+
+def _papay_derivative(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    # Derivative of the Papay compressibility with respect to pressure
+    temp_pc, pressure_pc = _standing_pseudo_critical(np.asarray(sg_gas, dtype=float))
+    temp_pr: np.ndarray = temp / temp_pc
+    pressure_pr: np.ndarray = pressure / pressure_pc
+    return (-3.53 / np.power(10, 0.9813 * temp_pr) + 0.548 * pressure_pr / np.power(10, 0.8157 * temp_pr)) / pressure_pc
+
+
+def _beggs_brill_derivative(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    # Derivative of the Beggs-Brill compressibility with respect to pressure
+    temp_pc, pressure_pc = _standing_pseudo_critical(np.asarray(sg_gas, dtype=float))
+    temp_pr: np.ndarray = temp / temp_pc
+    pressure_pr: np.ndarray = pressure / pressure_pc
+
+    a: np.ndarray = 1.39 * np.sqrt(temp_pr - 0.92) - 0.36 * temp_pr - 0.10
+    b_quad: np.ndarray = 0.066 / (temp_pr - 0.86) - 0.037
+    b_sixth: np.ndarray = 0.32 / np.power(10, 9 * (temp_pr - 1))
+    b: np.ndarray = (0.62 - 0.23 * temp_pr) * pressure_pr + b_quad * np.square(pressure_pr) + b_sixth * np.power(
+        pressure_pr, 6)
+    b_dash: np.ndarray = (0.62 - 0.23 * temp_pr) + 2 * b_quad * pressure_pr + 6 * b_sixth * np.power(pressure_pr, 5)
+    c: np.ndarray = 0.132 - 0.32 * np.log10(temp_pr)
+    d: np.ndarray = np.power(10, 0.3106 - 0.49 * temp_pr + 0.1824 * np.square(temp_pr))
+    return (-(1 - a) * np.exp(-b) * b_dash + c * d * np.power(pressure_pr, d - 1)) / pressure_pc
+
+
+def _dranchuk_abou_kassem_derivative(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray,
+                                     gas_comp_factor: np.ndarray) -> np.ndarray:
+    # Derivative of the Dranchuk-Abou-Kassem compressibility with respect to pressure at a solution of the equation,
+    # from implicit differentiation of F(rho_r) = 0 with Z = 0.27 * Ppr / (Tpr * rho_r)
+    temp_pc, pressure_pc = _standing_pseudo_critical(np.asarray(sg_gas, dtype=float))
+    temp_pr: np.ndarray = temp / temp_pc
+    ideal: np.ndarray = 0.27 * pressure / pressure_pc / temp_pr
+    rho_r: np.ndarray = ideal / gas_comp_factor
+    r_sq: np.ndarray = np.square(rho_r)
+
+    c1, c2, c3, c4, a11 = _dranchuk_abou_kassem_coefficients(temp_pr)
+    f_dash_rho_r: np.ndarray = (c1 + 2 * c2 * rho_r - 5 * c3 * np.power(rho_r, 4)
+                                + 2 * c4 * rho_r * (1 + a11 * r_sq - np.square(a11 * r_sq)) * np.exp(-a11 * r_sq)
+                                + ideal / r_sq)
+    return gas_comp_factor / pressure * (1 - ideal / (r_sq * f_dash_rho_r))
+
+
+def _solve_reduced_density(pressure_pr: np.ndarray, theta: np.ndarray, alpha: np.ndarray, max_iter: int = 100,
+                           tol: float = 0.001, rho_h_init=0.01):
+    # Newton-Raphson iteration for the reduced density, run on flat index sets of the points that have not converged.
+    # Returns the converged reduced density, the number of iterations and the convergence mask for every element
+    shape = np.shape(pressure_pr)
+    pressure_pr = np.ravel(pressure_pr)
+    theta = np.ravel(theta)
+    alpha = np.ravel(alpha)
+
+    # Coefficients of the reduced density functions, these do not change from one iteration to the next
+    f2_coeff: np.ndarray = -(14.76 * theta - 9.76 * np.square(theta) + 4.58 * np.power(theta, 3))
+    f3_coeff: np.ndarray = 90.7 * theta - 242.2 * theta ** 2 + 42.4 * theta ** 3
+    f3_exp: np.ndarray = 2.18 + 2.82 * theta
+    alpha_ppr: np.ndarray = alpha * pressure_pr
+
+    rho_h_conv: np.ndarray = np.ones(pressure_pr.shape)
+    iterations: np.ndarray = np.zeros(pressure_pr.shape, dtype=int)
+    converged: np.ndarray = np.zeros(pressure_pr.shape, dtype=bool)
+    rho_h: np.ndarray = np.broadcast_to(np.asarray(rho_h_init, dtype=float), shape).astype(float).ravel()
+    active: np.ndarray = np.arange(pressure_pr.size)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        for i in range(max_iter):
+            if active.size == 0:
+                break
+            r = rho_h[active]
+            exp_a = f3_exp[active]
+
+            # Reduced density functions and their derivatives
+            f1_rho_h = -alpha_ppr[active] + (r + np.square(r) + np.power(r, 3) - np.power(r, 4)) / np.power(1 - r, 3)
+            f2_rho_h = f2_coeff[active] * np.square(r)
+            f3_rho_h = f3_coeff[active] * r ** exp_a
+            f1_dash_rho_h = (1 + 4 * r + 4 * np.square(r) - 4 * np.power(r, 3) + np.power(r, 4)) / np.power(1 - r, 4)
+            f2_dash_rho_h = 2 * f2_rho_h / r
+            f3_dash_rho_h = exp_a * f3_rho_h / r
+
+            f_rho_h = f1_rho_h + f2_rho_h + f3_rho_h
+            f_dash_rho_h = f1_dash_rho_h + f2_dash_rho_h + f3_dash_rho_h
+
+            r_next = r - f_rho_h / f_dash_rho_h
+            done = np.abs(r_next - r) < tol
+            # An iterate that turned NaN stays NaN and never converges, so the point ends with the fallback density and
+            # max_iter iterations either way. Dropping it at once saves running the remaining iterations on it alone
+            diverged = np.isnan(r_next)
+
+            iterations[active] = i + 1
+            iterations[active[diverged]] = max_iter
+            rho_h_conv[active[done]] = r_next[done]
+            converged[active[done]] = True
+            rho_h[active] = r_next
+            active = active[~(done | diverged)]
+
+    if Instr.ENABLED:
+        Instr.record_newton(iterations, converged, pressure_pr, 1 / theta)
+    return rho_h_conv.reshape(shape), iterations.reshape(shape), converged.reshape(shape)
@@ -0,0 +1,275 @@
+import os
+import tempfile
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from . import Gas_Compressibility_Factor as Gas_Comp
+
+# Range and resolution of the pseudo-reduced temperature and pressure grid the compressibility factor is tabulated on
+TEMP_PR_RANGE: Tuple[float, float] = (1.2, 3.0)
+PRESSURE_PR_RANGE: Tuple[float, float] = (0.0, 15.0)
+GRID_SHAPE: Tuple[int, int] = (201, 601)
+
+# Location the table is persisted to, the directory can be changed through the PVT_CORRELATIONS_CACHE variable
+CACHE_DIR: str = os.environ.get("PVT_CORRELATIONS_CACHE", os.path.join(os.path.expanduser("~"), ".cache",
+                                                                         "pvt_correlations"))
+TABLE_FILE: str = "z_factor_table.npz"
+
+# Largest difference between the interpolated compressibility factor and the converged root on the default grid. The
+# largest error z_factor_table_error measures is 5.1e-5, the bound leaves a margin over it
+INTERPOLATION_ERROR: float = 6e-5
+
+_z_factor_table: Optional["ZFactorTable"] = None
+
+
+class ZFactorTable:
+    """
+    Compressibility factor of the Carnahan-Starling equation of state tabulated on a uniform grid of pseudo-reduced
+    temperature and pressure, queried by vectorized bicubic (Catmull-Rom) interpolation
+
+    With the default grid of 201 x 601 points the interpolated compressibility factor is within INTERPOLATION_ERROR
+    (6e-5, 5.1e-5 measured) of the fully converged Hall-Yarborough solution everywhere on the grid (1.2 <= Tpr <= 3.0,
+    0 <= Ppr <= 15). The iterative solver stops once the reduced density changes by less than 0.001, which moves its own
+    result by up to about 1.6e-3, so that is the largest difference to expect against carnahan_starling_hs_eos.
+    z_factor_table_error measures both.
+    """
+
+    def __init__(self, temp_pr: np.ndarray, pressure_pr: np.ndarray, z_factor: np.ndarray):
+        self.temp_pr = temp_pr
+        self.pressure_pr = pressure_pr
+        self.z_factor = z_factor
+
+        # Grid padded with one linearly extrapolated node on every side, so every cell has its 4 x 4 neighbourhood
+        self._padded = np.pad(z_factor, 1, mode='reflect', reflect_type='odd')
+        self._step_temp_pr = temp_pr[1] - temp_pr[0]
+        self._step_pressure_pr = pressure_pr[1] - pressure_pr[0]
+
+    def in_range(self, temp_pr: np.ndarray, pressure_pr: np.ndarray) -> np.ndarray:
+        return ((temp_pr >= self.temp_pr[0]) & (temp_pr <= self.temp_pr[-1]) & (pressure_pr >= self.pressure_pr[0]) &
+                (pressure_pr <= self.pressure_pr[-1]))
+
+    def interpolate(self, temp_pr: np.ndarray, pressure_pr: np.ndarray) -> np.ndarray:
+        # Cell of every query and the position within it
+        x: np.ndarray = (np.asarray(temp_pr, dtype=float) - self.temp_pr[0]) / self._step_temp_pr
+        y: np.ndarray = (np.asarray(pressure_pr, dtype=float) - self.pressure_pr[0]) / self._step_pressure_pr
+        i: np.ndarray = np.clip(np.floor(x).astype(np.intp), 0, self.temp_pr.size - 2)
+        j: np.ndarray = np.clip(np.floor(y).astype(np.intp), 0, self.pressure_pr.size - 2)
+        weights_x = _catmull_rom_weights(x - i)
+        weights_y = _catmull_rom_weights(y - j)
+
+        # Sum of the 16 neighbouring nodes, the padded node (i + a, j + b) is the grid node (i + a - 1, j + b - 1)
+        num_cols: int = self._padded.shape[1]
+        nodes: np.ndarray = self._padded.ravel()
+        z_factor = 0
+        for a in range(4):
+            row: np.ndarray = (i + a) * num_cols + j
+            z_factor = z_factor + weights_x[a] * (weights_y[0] * nodes[row] + weights_y[1] * nodes[row + 1] +
+                                                  weights_y[2] * nodes[row + 2] + weights_y[3] * nodes[row + 3])
+        return z_factor
+
+    def save(self, path: str):
+        # Written to a temporary file next to the table and renamed into place, so a process killed while writing, or
+        # another process writing at the same time, never leaves a truncated table for later runs to load
+        directory: str = os.path.dirname(os.path.abspath(path))
+        descriptor, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as tmp_file:
+                np.savez(tmp_file, temp_pr=self.temp_pr, pressure_pr=self.pressure_pr, z_factor=self.z_factor)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "ZFactorTable":
+        with np.load(path) as data:
+            return cls(data['temp_pr'], data['pressure_pr'], data['z_factor'])
+
+
+def build_z_factor_table(temp_pr_range: Tuple[float, float] = TEMP_PR_RANGE,
+                         pressure_pr_range: Tuple[float, float] = PRESSURE_PR_RANGE,
+                         grid_shape: Tuple[int, int] = GRID_SHAPE) -> ZFactorTable:
+    """
+    Tabulates the compressibility factor of the Carnahan-Starling equation of state on a grid of pseudo-reduced
+    temperatures and pressures
+
+    The reduced density is solved to a tolerance of 1e-12 from a low pressure starting estimate, so the table holds the
+    converged root rather than the result of the default solver tolerance
+
+    Parameters:
+    ----------
+    temp_pr_range : tuple of float, optional
+        Lowest and highest pseudo-reduced temperature of the grid
+    pressure_pr_range : tuple of float, optional
+        Lowest and highest pseudo-reduced pressure of the grid
+    grid_shape : tuple of int, optional
+        Number of pseudo-reduced temperatures and pressures in the grid
+
+    Returns:
+    -------
+    ZFactorTable
+        Tabulated compressibility factor
+    """
+
+    temp_pr: np.ndarray = np.linspace(*temp_pr_range, grid_shape[0])
+    pressure_pr: np.ndarray = np.linspace(*pressure_pr_range, grid_shape[1])
+    temp_pr_grid, pressure_pr_grid = np.meshgrid(temp_pr, pressure_pr, indexing='ij')
+
+    z_factor: np.ndarray = _converged_z_factor(temp_pr_grid, pressure_pr_grid)
+    # The gas is ideal in the limit of zero pressure
+    z_factor[pressure_pr_grid == 0] = 1.0
+
+    return ZFactorTable(temp_pr, pressure_pr, z_factor)
+
+
+def get_z_factor_table(path: Optional[str] = None) -> ZFactorTable:
+    """
+    Returns the tabulated compressibility factor, loading it from disk or building and persisting it on first use
+
+    Parameters:
+    ----------
+    path : str, optional
+        File the table is persisted to, defaults to z_factor_table.npz in the cache directory
+
+    Returns:
+    -------
+    ZFactorTable
+        Tabulated compressibility factor
+    """
+
+    global _z_factor_table
+    if path is None and _z_factor_table is not None:
+        return _z_factor_table
+
+    table_path: str = path if path is not None else os.path.join(CACHE_DIR, TABLE_FILE)
+    table: Optional[ZFactorTable] = None
+    if os.path.exists(table_path):
+        try:
+            table = ZFactorTable.load(table_path)
+        except (OSError, ValueError, KeyError):
+            table = None
+    # Rebuild the table if it is missing, unreadable or tabulated on a different grid
+    if table is None or not _matches_grid(table):
+        table = build_z_factor_table()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(table_path)), exist_ok=True)
+            table.save(table_path)
+        except OSError:
+            pass
+
+    if path is None:
+        _z_factor_table = table
+    return table
+
+
+def tabulated_z_factor(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray) -> np.ndarray:
+    """
+    Calculates the compressibility of the gas by interpolating the tabulated Carnahan-Starling equation of state
+
+    Drop-in replacement for carnahan_starling_hs_eos and carnahan_starling_hs_eos_vectorized. Points outside the
+    tabulated range of pseudo-reduced temperature and pressure are solved with the iterative method
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the gas in psia
+    temp : array_like
+        Temperature of the gas in degree Rankine
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+
+    Returns:
+    -------
+    np.ndarray
+        Compressibility of the gas, with the broadcast shape of the inputs
+
+    Notes:
+    ------
+    - The interpolated values are within INTERPOLATION_ERROR (6e-5) of the converged root of the equation of state,
+      see ZFactorTable
+    - At zero pressure the table returns the ideal gas limit of one
+
+    Example:
+    --------
+    >>> round(float(tabulated_z_factor(pressure=1000, temp=600, sg_gas=0.7)), 4)
+    0.8709
+    """
+
+    pressure, temp, sg_gas = np.broadcast_arrays(np.asarray(pressure, dtype=float), np.asarray(temp, dtype=float),
+                                                 np.asarray(sg_gas, dtype=float))
+    temp_pc, pressure_pc = Gas_Comp._standing_pseudo_critical(sg_gas)
+    temp_pr: np.ndarray = temp / temp_pc
+    pressure_pr: np.ndarray = pressure / pressure_pc
+
+    table: ZFactorTable = get_z_factor_table()
+    z_factor: np.ndarray = table.interpolate(temp_pr, pressure_pr)
+
+    # Fall back to the iterative solver outside the table
+    outside: np.ndarray = ~table.in_range(temp_pr, pressure_pr)
+    if outside.any():
+        z_factor = np.array(z_factor, dtype=float)
+        z_factor[outside] = Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure[outside], temp[outside],
+                                                                         sg_gas[outside])
+
+    return z_factor[()]
+
+
+def z_factor_table_error(table: Optional[ZFactorTable] = None, num_samples: int = 200000,
+                         seed: int = 0) -> Dict[str, float]:
+    """
+    Measures the interpolation error of the tabulated compressibility factor at random points of the grid range
+
+    Parameters:
+    ----------
+    table : ZFactorTable, optional
+        Table to check, defaults to the table used by tabulated_z_factor
+    num_samples : int, optional
+        Number of random points
+    seed : int, optional
+        Seed of the random points
+
+    Returns:
+    -------
+    dict
+        Largest absolute error against the converged root ('max_error_converged') and against the default iterative
+        solver ('max_error_iterative'), the latter taken over the points where the iterative solver converges
+    """
+
+    table = table if table is not None else get_z_factor_table()
+    rng = np.random.default_rng(seed)
+    temp_pr: np.ndarray = rng.uniform(table.temp_pr[0], table.temp_pr[-1], num_samples)
+    pressure_pr: np.ndarray = rng.uniform(table.pressure_pr[0], table.pressure_pr[-1], num_samples)
+
+    z_factor: np.ndarray = table.interpolate(temp_pr, pressure_pr)
+    z_factor_converged: np.ndarray = _converged_z_factor(temp_pr, pressure_pr)
+
+    theta: np.ndarray = 1 / temp_pr
+    alpha: np.ndarray = 0.06125 * theta * np.exp(-1.2 * np.square(1 - theta))
+    rho_h, _, converged = Gas_Comp._solve_reduced_density(pressure_pr, theta, alpha)
+    z_factor_iterative: np.ndarray = alpha * pressure_pr / rho_h
+
+    return {'max_error_converged': float(np.max(np.abs(z_factor - z_factor_converged))),
+            'max_error_iterative': float(np.max(np.abs(z_factor - z_factor_iterative)[converged]))}
+
+
+def _converged_z_factor(temp_pr: np.ndarray, pressure_pr: np.ndarray) -> np.ndarray:
+    # Hall-Yarborough solution to a tight tolerance, started from the ideal gas density at low pressures
+    theta: np.ndarray = 1 / temp_pr
+    alpha: np.ndarray = 0.06125 * theta * np.exp(-1.2 * np.square(1 - theta))
+    rho_h, _, _ = Gas_Comp._solve_reduced_density(pressure_pr, theta, alpha, tol=1e-12,
+                                                  rho_h_init=np.minimum(alpha * pressure_pr, 0.01))
+    with np.errstate(invalid='ignore'):
+        return alpha * pressure_pr / rho_h
+
+
+def _matches_grid(table: ZFactorTable) -> bool:
+    return (table.z_factor.shape == GRID_SHAPE and np.isclose(table.temp_pr[0], TEMP_PR_RANGE[0]) and
+            np.isclose(table.temp_pr[-1], TEMP_PR_RANGE[1]) and np.isclose(table.pressure_pr[0], PRESSURE_PR_RANGE[0])
+            and np.isclose(table.pressure_pr[-1], PRESSURE_PR_RANGE[1]))
+
+
+def _catmull_rom_weights(t: np.ndarray):
+    # Weights of the four nodes around a point at fraction t of the cell between the middle two
+    t2: np.ndarray = t * t
+    t3: np.ndarray = t2 * t
+    return [0.5 * (-t3 + 2 * t2 - t), 0.5 * (3 * t3 - 5 * t2 + 2), 0.5 * (-3 * t3 + 4 * t2 + t), 0.5 * (t3 - t2)]
@@ -1,4 +1,4 @@
-import Constants as const
+from . import Constants as const
 
 
 def gas_density(pressure: float, temp: float, sg_gas: float) -> float:
@@ -1,8 +1,10 @@
-import Gas_Compressibility_Factor as Gas_Comp
-from typing import Optional
+from . import Gas_Compressibility_Factor as Gas_Comp
+import numpy as np
+from typing import Callable, Optional
 
 
-def gas_formation_volume_factor(pressure: float, temp: float, sg_gas: float, gas_comp_factor: Optional[float] = None) -> float:
+def gas_formation_volume_factor(pressure: float, temp: float, sg_gas: float, gas_comp_factor: Optional[float] = None,
+                                gas_comp_func: Optional[Callable] = None) -> float:
     """
         Calculates the formation volume factor of the gas at the given conditions.
 
@@ -16,6 +18,9 @@ def gas_formation_volume_factor(pressure: float, temp: float, sg_gas: float, gas
             Compressibility factor of the gas
         gas_comp_factor : float, optional
             Compressibility Factor of the gas
+        gas_comp_func : callable, optional
+            Function of pressure, temperature and gas gravity used to calculate the compressibility factor when it is
+            not provided, defaults to carnahan_starling_hs_eos
 
         Returns:
         -------
@@ -33,7 +38,49 @@ def gas_formation_volume_factor(pressure: float, temp: float, sg_gas: float, gas
         np.float64(0.015449190149601931)
         """
     # Calculate compressibility factor of the gas if not provided by the user
-    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else Gas_Comp.carnahan_starling_hs_eos(pressure, temp, sg_gas)
+    gas_comp_func = gas_comp_func if gas_comp_func is not None else Gas_Comp.carnahan_starling_hs_eos
+    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else gas_comp_func(pressure, temp, sg_gas)
 
     gas_fvf: float = 0.02827 * gas_comp_factor * temp / pressure
     return gas_fvf
+
+
+def gas_formation_volume_factor_vectorized(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray,
+                                           gas_comp_factor: Optional[np.ndarray] = None,
+                                           gas_comp_func: Optional[Callable] = None) -> np.ndarray:
+    """
+        Calculates the formation volume factor of the gas for arrays of pressures and temperatures.
+
+        Batched version of gas_formation_volume_factor, all the inputs are broadcast against each other
+
+        Parameters:
+        ----------
+        pressure : array_like
+            Pressure of the gas in psia
+        temp : array_like
+            Temperature of the gas in degrees Rankine
+        sg_gas : array_like
+            Specific gravity of the gas relative to air
+        gas_comp_factor : array_like, optional
+            Compressibility Factor of the gas
+        gas_comp_func : callable, optional
+            Vectorized function of pressure, temperature and gas gravity used to calculate the compressibility factor
+            when it is not provided, defaults to carnahan_starling_hs_eos_vectorized
+
+        Returns:
+        -------
+        np.ndarray
+            Formation Volume Factor of the gas at the given conditions, expressed in reservoir cubic feet per
+            cubic feet of gas at standard conditions (rcf/scf)
+
+        Example:
+        --------
+        >>> gas_formation_volume_factor_vectorized(pressure=np.array([1000, 2000]), temp=617.67, sg_gas=0.7)
+        array([0.01544919, 0.00714914])
+        """
+    # Calculate compressibility factor of the gas if not provided by the user
+    gas_comp_func = gas_comp_func if gas_comp_func is not None else Gas_Comp.carnahan_starling_hs_eos_vectorized
+    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else gas_comp_func(pressure, temp, sg_gas)
+
+    gas_fvf: np.ndarray = 0.02827 * gas_comp_factor * temp / np.asarray(pressure, dtype=float)
+    return gas_fvf
@@ -103,3 +103,88 @@ def vasquez_beggs_gas_solubility(pressure: float, temp: float, oil_api: float, s
         coeff[2] * oil_api / temp)
 
     return gas_sol
+
+
+def vasquez_beggs_gas_solubility_vectorized(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray,
+                                            sg_gas: np.ndarray, p_bubble: np.ndarray, p_sep: np.ndarray,
+                                            t_sep: np.ndarray) -> np.ndarray:
+    """
+        Calculates the gas solubility (Rs) in oil for arrays of inputs using Vasquez-Begg's Correlation.
+
+        Batched version of vasquez_beggs_gas_solubility, all the inputs are broadcast against each other and the
+        choice of heavy or light oil coefficients is made element-wise
+
+        Parameters:
+        ----------
+        pressure : array_like
+            Pressure of the oil in psia
+        temp : array_like
+            Temperature of the oil in degrees Rankine
+        oil_api : array_like
+            API gravity of the oil, indicating its density (°API)
+        sg_gas : array_like
+            Specific gravity of the gas relative to air
+        p_bubble: array_like
+            Bubble point pressure of the oil in psia
+        p_sep : array_like
+             Actual pressure of the separator in psia
+        t_sep : array_like
+            Actual temperature of the separator in degrees Rankine
+
+        Returns:
+        -------
+        np.ndarray
+            Gas solubility (Rs) in the oil at the given conditions, expressed in standard cubic
+            feet of gas per barrel of oil (scf/bbl)
+
+        Example:
+        --------
+        >>> vasquez_beggs_gas_solubility_vectorized(pressure=np.array([1000, 2000]), temp=620, oil_api=35, sg_gas=0.7, p_bubble=1500, p_sep=114.7, t_sep=520)
+        array([175.07549815, 283.29942643])
+    """
+
+    oil_api = np.asarray(oil_api, dtype=float)
+
+    # Adjust the gas gravity for separator conditions
+    sg_gas_sep: np.ndarray = _separator_gas_gravity(sg_gas, oil_api, p_sep, t_sep)
+
+    gas_sol: np.ndarray = _vasquez_beggs_gas_solubility(pressure, temp, oil_api, p_bubble, sg_gas_sep)
+
+    return gas_sol
+
+
+def _vasquez_beggs_gas_solubility(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, p_bubble: np.ndarray,
+                                  sg_gas_sep: np.ndarray) -> np.ndarray:
+    # Coefficients used in Vasquez-Beggs Correlation, chosen element-wise
+    coeff: List[np.ndarray] = _vasquez_beggs_coefficients(oil_api)
+
+    # Use given pressure for saturated oil and bubble point pressure for under-saturated oil
+    return coeff[0] * sg_gas_sep * np.power(np.minimum(pressure, p_bubble), coeff[1]) * np.exp(
+        coeff[2] * oil_api / temp)
+
+
+def _vasquez_beggs_gas_solubility_derivative(pressure: np.ndarray, oil_api: np.ndarray, p_bubble: np.ndarray,
+                                             gas_sol: np.ndarray) -> np.ndarray:
+    # Derivative of the Vasquez-Beggs solubility with respect to pressure, zero above the bubble point where the
+    # solubility is held at its bubble point value
+    coeff: List[np.ndarray] = _vasquez_beggs_coefficients(oil_api)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(pressure < p_bubble, coeff[1] * gas_sol / pressure, 0.0)
+
+
+def _standings_gas_solubility_derivative(pressure: np.ndarray, gas_sol: np.ndarray) -> np.ndarray:
+    # Derivative of Standing's solubility with respect to pressure
+    return 1.2048 * gas_sol / (pressure + 1.4 * 18.2)
+
+
+def _vasquez_beggs_coefficients(oil_api: np.ndarray) -> List[np.ndarray]:
+    # Coefficients of the Vasquez-Beggs solubility correlation for heavy and light oils
+    heavy_oil: np.ndarray = np.asarray(oil_api) <= 30
+    return [np.where(heavy_oil, heavy, light) for heavy, light in zip([0.0362, 1.0937, 25.724],
+                                                                      [0.0178, 1.187, 23.931])]
+
+
+def _separator_gas_gravity(sg_gas: np.ndarray, oil_api: np.ndarray, p_sep: np.ndarray,
+                           t_sep: np.ndarray) -> np.ndarray:
+    # Gas gravity adjusted to the reference separator pressure of 114.7 psia
+    return sg_gas * (1 + 5.912 * 0.00001 * oil_api * (t_sep - 460.67) * np.log10(p_sep / 114.7))
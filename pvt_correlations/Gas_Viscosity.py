@@ -1,10 +1,11 @@
 import numpy as np
-import Gas_Compressibility_Factor as Gas_Comp
-import Constants as const
-from typing import Optional
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Constants as const
+from typing import Callable, Optional
 
 
-def lee_gonzalez_eakin(pressure: float, temp: float, sg_gas: float, gas_comp_factor: Optional[float] = None) -> float:
+def lee_gonzalez_eakin(pressure: float, temp: float, sg_gas: float, gas_comp_factor: Optional[float] = None,
+                       gas_comp_func: Optional[Callable] = None) -> float:
     """
         Calculates the viscosity of the gas at a given pressure and temperature using the Lee-Gonzalez-Eakin method
 
@@ -21,6 +22,9 @@ def lee_gonzalez_eakin(pressure: float, temp: float, sg_gas: float, gas_comp_fac
             Specific gravity of the gas relative to air
         gas_comp_factor : float, optional
             Compressibility Factor of the gas
+        gas_comp_func : callable, optional
+            Function of pressure, temperature and gas gravity used to calculate the compressibility factor when it is
+            not provided, defaults to carnahan_starling_hs_eos
 
         Returns:
         -------
@@ -42,9 +46,8 @@ def lee_gonzalez_eakin(pressure: float, temp: float, sg_gas: float, gas_comp_fac
     mw_gas: float = sg_gas * const.mw_air
 
     # Gas Compressibility
-    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else Gas_Comp.carnahan_starling_hs_eos(pressure,
-                                                                                                            temp,
-                                                                                                            sg_gas)
+    gas_comp_func = gas_comp_func if gas_comp_func is not None else Gas_Comp.carnahan_starling_hs_eos
+    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else gas_comp_func(pressure, temp, sg_gas)
 
     # Density of the gas mixture calculated using the Real Gas Equation
     gas_density: float = pressure * mw_gas / (gas_comp_factor * const.gas_const * temp)
@@ -58,3 +61,71 @@ def lee_gonzalez_eakin(pressure: float, temp: float, sg_gas: float, gas_comp_fac
     gas_visc: float = 0.0001 * k_param * np.exp(x_param * np.power(gas_density / 62.4, y_param))
 
     return gas_visc
+
+
+def lee_gonzalez_eakin_vectorized(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray,
+                                  gas_comp_factor: Optional[np.ndarray] = None,
+                                  gas_comp_func: Optional[Callable] = None) -> np.ndarray:
+    """
+        Calculates the viscosity of the gas for arrays of pressures and temperatures using the Lee-Gonzalez-Eakin method
+
+        Batched version of lee_gonzalez_eakin, all the inputs are broadcast against each other
+
+        Parameters:
+        ----------
+        pressure : array_like
+            Pressure of the gas in psia
+        temp : array_like
+            Temperature of the gas in degree Rankine
+        sg_gas : array_like
+            Specific gravity of the gas relative to air
+        gas_comp_factor : array_like, optional
+            Compressibility Factor of the gas
+        gas_comp_func : callable, optional
+            Vectorized function of pressure, temperature and gas gravity used to calculate the compressibility factor
+            when it is not provided, defaults to carnahan_starling_hs_eos_vectorized
+
+        Returns:
+        -------
+        np.ndarray
+            Viscosity of the gas in cp
+
+        Example:
+        --------
+        >>> lee_gonzalez_eakin_vectorized(pressure=np.array([1000, 2000]), temp=600, sg_gas=0.78)
+        array([0.01352135, 0.01774658])
+        """
+
+    # Apparent Molecular Weight of the gas mixture and the parameters used in the equation
+    mw_gas, k_param, x_param, y_param = _lee_gonzalez_eakin_parameters(temp, sg_gas)
+
+    # Gas Compressibility
+    gas_comp_func = gas_comp_func if gas_comp_func is not None else Gas_Comp.carnahan_starling_hs_eos_vectorized
+    gas_comp_factor = gas_comp_factor if gas_comp_factor is not None else gas_comp_func(pressure, temp, sg_gas)
+
+    # Density of the gas mixture calculated using the Real Gas Equation
+    gas_density: np.ndarray = pressure * mw_gas / (gas_comp_factor * const.gas_const * temp)
+
+    # Viscosity equation
+    gas_visc: np.ndarray = 0.0001 * k_param * np.exp(x_param * np.power(gas_density / 62.4, y_param))
+
+    return gas_visc
+
+
+def _lee_gonzalez_eakin_parameters(temp: np.ndarray, sg_gas: np.ndarray):
+    # Pressure independent terms of the Lee-Gonzalez-Eakin method: molecular weight and the K, X and Y parameters
+    mw_gas: np.ndarray = np.asarray(sg_gas, dtype=float) * const.mw_air
+    k_param: np.ndarray = (9.4 + 0.02 * mw_gas) * np.power(temp, 1.5) / (209 + 19 * mw_gas + temp)
+    x_param: np.ndarray = 3.5 + 986 / temp + 0.01 * mw_gas
+    y_param: np.ndarray = 2.4 - 0.2 * x_param
+    return mw_gas, k_param, x_param, y_param
+
+
+def _lee_gonzalez_eakin_derivative(pressure: np.ndarray, temp: np.ndarray, sg_gas: np.ndarray,
+                                   gas_comp_factor: np.ndarray, gas_visc: np.ndarray,
+                                   gas_comp: np.ndarray) -> np.ndarray:
+    # Derivative of the gas viscosity with respect to pressure. The gas density changes as d(rho)/dP = rho * cg, which
+    # gives d(mu)/dP = mu * X * Y * (rho / 62.4) ** Y * cg
+    mw_gas, k_param, x_param, y_param = _lee_gonzalez_eakin_parameters(temp, sg_gas)
+    gas_density: np.ndarray = pressure * mw_gas / (gas_comp_factor * const.gas_const * temp)
+    return gas_visc * x_param * y_param * np.power(gas_density / 62.4, y_param) * gas_comp
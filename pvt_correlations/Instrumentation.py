@@ -0,0 +1,180 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Instrumentation is off unless a block runs inside instrument() in some thread, the hot paths only check this flag
+# when it is off
+ENABLED: bool = False
+
+# Non-converged points kept with their location, beyond this only the count grows
+MAX_RECORDED_POINTS: int = 1000
+
+
+class InstrumentationStats:
+    """
+    Call counts, cumulative times and Newton iteration statistics collected while instrumentation is on
+
+    Example:
+    --------
+    >>> from pvt_correlations import Gas_Compressibility_Factor as Gas_Comp
+    >>> with instrument() as stats:
+    ...     z = Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure=np.array([1000, 2000]), temp=600, sg_gas=0.7)
+    >>> stats.z_solves, stats.non_converged
+    (2, 0)
+    """
+
+    def __init__(self):
+        # The same statistics can be collected by several threads at once
+        self._lock: threading.Lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.points: Dict[str, int] = {}
+        self.time: Dict[str, float] = {}
+        self.z_solves: int = 0
+        self.newton_iterations: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.non_converged: int = 0
+        self.non_converged_points: List[Tuple[float, float]] = []
+
+    def record_call(self, name: str, elapsed: float, num_points: int = 1):
+        """
+        Adds a call of the named correlation over num_points points that took elapsed seconds
+        """
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.points[name] = self.points.get(name, 0) + num_points
+            self.time[name] = self.time.get(name, 0.0) + elapsed
+
+    def record_newton(self, iterations, converged, pressure_pr, temp_pr):
+        """
+        Adds the Newton iterations of a Z solve and the pseudo-reduced pressure and temperature of the points that did
+        not converge
+        """
+        iterations = np.ravel(iterations).astype(np.int64)
+        counts: np.ndarray = np.bincount(iterations)
+        failed: np.ndarray = np.flatnonzero(~np.ravel(converged))
+        with self._lock:
+            if counts.size > self.newton_iterations.size:
+                self.newton_iterations = np.pad(self.newton_iterations,
+                                                (0, counts.size - self.newton_iterations.size))
+            self.newton_iterations[:counts.size] += counts
+            self.z_solves += iterations.size
+
+            self.non_converged += failed.size
+            room: int = MAX_RECORDED_POINTS - len(self.non_converged_points)
+            if failed.size and room > 0:
+                failed = failed[:room]
+                pressure_pr = np.broadcast_to(pressure_pr, np.shape(converged)).ravel()[failed]
+                temp_pr = np.broadcast_to(temp_pr, np.shape(converged)).ravel()[failed]
+                self.non_converged_points.extend(zip(pressure_pr.tolist(), temp_pr.tolist()))
+
+    def reset(self):
+        """
+        Clears all the statistics
+        """
+        self.__init__()
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the statistics as plain Python types, ready to be serialized or sent to a metrics system
+
+        Returns:
+        -------
+        dict
+            Per correlation calls, points, total and mean time in seconds, the histogram of Newton iterations as
+            {iterations: number of points}, and the count and pseudo-reduced (pressure, temperature) of the
+            non-converged points
+        """
+        return {
+            'correlations': {name: {'calls': self.calls[name], 'points': self.points[name],
+                                    'time': self.time[name], 'mean_time': self.time[name] / self.calls[name]}
+                             for name in self.calls},
+            'z_solves': self.z_solves,
+            'newton_iterations': {int(i): int(n) for i, n in enumerate(self.newton_iterations) if n},
+            'non_converged': self.non_converged,
+            'non_converged_points': [{'pressure_pr': p, 'temp_pr': t} for p, t in self.non_converged_points]
+        }
+
+
+# Statistics of the instrument() blocks the current thread or task is inside of, innermost last. Every block gets the
+# records of the code it runs, so a nested block does not hide them from the outer one, and blocks running in other
+# threads get none of them
+_COLLECTORS: contextvars.ContextVar = contextvars.ContextVar('pvt_correlations_collectors', default=())
+
+# Number of instrument() blocks open in all threads, ENABLED is on while there is any
+_open_blocks: int = 0
+_open_blocks_lock: threading.Lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def instrument(stats: Optional[InstrumentationStats] = None) -> Iterator[InstrumentationStats]:
+    """
+    Turns instrumentation on for the duration of the block
+
+    The statistics of the block get everything the code inside it records, including the records of nested blocks.
+    They only get the records of the thread that opened the block, threads started inside it are not followed
+
+    Parameters:
+    ----------
+    stats : InstrumentationStats, optional
+        Statistics to add to, a new object by default
+
+    Returns:
+    -------
+    InstrumentationStats
+        Statistics collected inside the block
+    """
+    global ENABLED, _open_blocks
+    stats = stats if stats is not None else InstrumentationStats()
+    collectors: Tuple[InstrumentationStats, ...] = _COLLECTORS.get()
+    # Statistics that an outer block already collects into are not added twice
+    token = _COLLECTORS.set(collectors if any(stats is collector for collector in collectors)
+                            else collectors + (stats,))
+    with _open_blocks_lock:
+        _open_blocks += 1
+        ENABLED = True
+    try:
+        yield stats
+    finally:
+        _COLLECTORS.reset(token)
+        with _open_blocks_lock:
+            _open_blocks -= 1
+            ENABLED = _open_blocks > 0
+
+
+def record_call(name: str, elapsed: float, num_points: int = 1):
+    """
+    Adds a call of the named correlation to the statistics of every instrument() block the caller is inside of
+    """
+    for stats in _COLLECTORS.get():
+        stats.record_call(name, elapsed, num_points)
+
+
+def record_newton(iterations, converged, pressure_pr, temp_pr):
+    """
+    Adds the Newton iterations of a Z solve to the statistics of every instrument() block the caller is inside of
+    """
+    for stats in _COLLECTORS.get():
+        stats.record_newton(iterations, converged, pressure_pr, temp_pr)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator recording the calls and time of a correlation under the given name while instrumentation is on
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start: float = time.perf_counter()
+            result = func(*args, **kwargs)
+            record_call(name, time.perf_counter() - start, int(np.size(result)))
+            return result
+
+        return wrapper
+
+    return decorator
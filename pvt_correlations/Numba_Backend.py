@@ -0,0 +1,100 @@
+import math
+import os
+import numba
+import numpy as np
+from typing import Callable, List
+
+from . import Constants as const
+from .Backends import Backend, register_backend
+
+# Constants of the correlations, module level floats are frozen into the compiled kernels
+_GAS_CONST: float = const.gas_const
+_MW_AIR: float = const.mw_air
+
+# The compiled kernels are only cached on disk when NUMBA_CACHE_DIR names a directory for them. numba caches next to
+# the module by default, in the package directory, which can be read-only once the package is installed
+CACHE: bool = bool(os.environ.get('NUMBA_CACHE_DIR'))
+
+
+def _fused(kernel: Callable) -> Callable:
+    # Broadcasts the inputs to flat contiguous arrays, runs the compiled loop over them into one output array and gives
+    # the output the broadcast shape
+    def run(*args):
+        arrays: List[np.ndarray] = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in args])
+        shape = arrays[0].shape
+        flat: List[np.ndarray] = [np.ascontiguousarray(array).ravel() for array in arrays]
+        out: np.ndarray = np.empty(flat[0].size)
+        kernel(*flat, out)
+        return out.reshape(shape)[()]
+
+    run.__name__ = kernel.__name__
+    return run
+
+
+# The kernels are the scalar forms of the numpy correlations in one loop, with division by zero giving inf and NaN
+# like numpy rather than raising
+@numba.njit(parallel=True, cache=CACHE, error_model='numpy')
+def _carnahan_starling_kernel(pressure, temp, sg_gas, out):
+    for i in numba.prange(pressure.size):
+        # Standing's pseudo-critical properties and the pressure independent terms
+        sg = sg_gas[i]
+        if sg < 0.75:
+            temp_pc = 168 + 325 * sg - 12.5 * sg * sg
+            pressure_pc = 667 + 15 * sg - 37.5 * sg * sg
+        else:
+            temp_pc = 187 + 330 * sg - 71.5 * sg * sg
+            pressure_pc = 706 - 51.7 * sg - 11.1 * sg * sg
+        theta = 1 / (temp[i] / temp_pc)
+        alpha = 0.06125 * theta * math.exp(-1.2 * (1 - theta) * (1 - theta))
+        alpha_ppr = alpha * (pressure[i] / pressure_pc)
+        f2_coeff = -(14.76 * theta - 9.76 * theta * theta + 4.58 * theta ** 3)
+        f3_coeff = 90.7 * theta - 242.2 * theta ** 2 + 42.4 * theta ** 3
+        f3_exp = 2.18 + 2.82 * theta
+
+        # Newton-Raphson iteration of carnahan_starling_hs_eos, falling back to a reduced density of one
+        rho_h_conv = 1.0
+        r = 0.01
+        for _ in range(100):
+            f3_rho_h = f3_coeff * r ** f3_exp
+            f_rho_h = (-alpha_ppr + (r + r * r + r ** 3 - r ** 4) / (1 - r) ** 3 + f2_coeff * r * r + f3_rho_h)
+            f_dash_rho_h = ((1 + 4 * r + 4 * r * r - 4 * r ** 3 + r ** 4) / (1 - r) ** 4 + 2 * f2_coeff * r
+                            + f3_exp * f3_rho_h / r)
+            r_next = r - f_rho_h / f_dash_rho_h
+            if math.isnan(r_next):
+                break
+            if abs(r_next - r) < 0.001:
+                rho_h_conv = r_next
+                break
+            r = r_next
+        out[i] = alpha_ppr / rho_h_conv
+
+
+@numba.njit(parallel=True, cache=CACHE, error_model='numpy')
+def _lee_gonzalez_eakin_kernel(pressure, temp, sg_gas, gas_comp_factor, out):
+    for i in numba.prange(pressure.size):
+        mw_gas = sg_gas[i] * _MW_AIR
+        k_param = (9.4 + 0.02 * mw_gas) * temp[i] ** 1.5 / (209 + 19 * mw_gas + temp[i])
+        x_param = 3.5 + 986 / temp[i] + 0.01 * mw_gas
+        y_param = 2.4 - 0.2 * x_param
+        gas_density = pressure[i] * mw_gas / (gas_comp_factor[i] * _GAS_CONST * temp[i])
+        out[i] = 0.0001 * k_param * math.exp(x_param * (gas_density / 62.4) ** y_param)
+
+
+@numba.njit(parallel=True, cache=CACHE, error_model='numpy')
+def _beggs_robinson_kernel(pressure, p_bubble, oil_visc_dead, gas_sol, out):
+    for i in numba.prange(pressure.size):
+        a_param = 10.715 * (gas_sol[i] + 100) ** -0.515
+        b_param = 5.44 * (gas_sol[i] + 150) ** -0.338
+        oil_visc_sat = a_param * oil_visc_dead[i] ** b_param
+        if pressure[i] <= p_bubble[i]:
+            out[i] = oil_visc_sat
+        else:
+            m_param = 2.6 * pressure[i] ** 1.187 * 10.0 ** (-3.9 * 0.00001 * pressure[i] - 5)
+            out[i] = oil_visc_sat * (pressure[i] / p_bubble[i]) ** m_param
+
+
+register_backend(Backend('numba', {
+    ('gas_comp_factor', "Carnahan Starling"): _fused(_carnahan_starling_kernel),
+    ('gas_visc', "Lee Gonzalez Eakin"): _fused(_lee_gonzalez_eakin_kernel),
+    ('oil_visc', "Beggs Robinson"): _fused(_beggs_robinson_kernel)
+}))
@@ -1,5 +1,6 @@
-import Gas_Solubility as Gas_Sol
-import Oil_Formation_Volume_Factor as Oil_FVF
+import numpy as np
+from . import Gas_Solubility as Gas_Sol
+from . import Oil_Formation_Volume_Factor as Oil_FVF
 from typing import Optional
 
 
@@ -54,3 +55,60 @@ def oil_density(pressure: float, temp: float, oil_api: float, sg_gas: float, p_b
     oil_den: float = (62.4 * sg_oil + 0.0136 * gas_sol * sg_gas) / oil_fvf
 
     return oil_den
+
+
+def oil_density_vectorized(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, sg_gas: np.ndarray,
+                           p_bubble: np.ndarray, gas_sol: Optional[np.ndarray] = None,
+                           oil_fvf: Optional[np.ndarray] = None, p_sep: Optional[np.ndarray] = None,
+                           t_sep: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+        Calculates the density of the oil for arrays of inputs.
+
+        Batched version of oil_density, all the inputs are broadcast against each other. The gas solubility is
+        calculated only once when neither it nor the formation volume factor is provided
+
+        Parameters:
+        ----------
+        pressure : array_like
+            Pressure of the oil in psia
+        temp : array_like
+            Temperature of the oil in degrees Rankine
+        oil_api : array_like
+            API gravity of the oil, indicating its density (°API)
+        sg_gas : array_like
+            Specific gravity of the gas relative to air
+        p_bubble: array_like
+            Bubble point pressure of the oil in psia
+        gas_sol: array_like, optional
+            Solubility of gas in the oil in scf/bbl
+        oil_fvf: array_like, optional
+            Formation Volume Factor of the oil in rb/stb
+        p_sep : array_like, optional
+             Actual pressure of the separator in psia
+        t_sep : array_like, optional
+            Actual temperature of the separator in degrees Rankine
+
+        Returns:
+        -------
+        np.ndarray
+            Density of the oil in lbm/ft3
+
+        Example:
+        --------
+        >>> oil_density_vectorized(pressure=np.array([1000, 2000]), temp=620, oil_api=35, sg_gas=0.7, p_bubble=1500, p_sep=114.7, t_sep=520)
+        array([48.06738441, 47.17966127])
+    """
+
+    # Gas Solubility and Formation Volume Factor of oil
+    gas_sol = gas_sol if gas_sol is not None else Gas_Sol.vasquez_beggs_gas_solubility_vectorized(
+        pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
+    oil_fvf = oil_fvf if oil_fvf is not None else Oil_FVF.vasquez_beggs_oil_fvf_vectorized(
+        pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep, gas_sol=gas_sol)
+
+    # Specific Gravity of the oil
+    sg_oil: np.ndarray = 141.5 / (131.5 + np.asarray(oil_api, dtype=float))
+
+    # Density of the oil
+    oil_den: np.ndarray = (62.4 * sg_oil + 0.0136 * gas_sol * sg_gas) / oil_fvf
+
+    return oil_den
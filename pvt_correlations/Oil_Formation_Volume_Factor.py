@@ -1,6 +1,6 @@
-import Gas_Solubility as Gas_Sol
+from . import Gas_Solubility as Gas_Sol
 import numpy as np
-from typing import List
+from typing import List, Optional
 
 
 def standings_oil_fvf(gas_sol: float, temp: float, oil_api: float, sg_gas: float) -> float:
@@ -118,3 +118,110 @@ def vasquez_beggs_oil_fvf(pressure: float, temp: float, oil_api: float, sg_gas:
         oil_fvf: float = oil_fvf_pb * np.exp(-a_coeff * np.log(pressure / p_bubble))
 
     return oil_fvf
+
+
+def vasquez_beggs_oil_fvf_vectorized(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, sg_gas: np.ndarray,
+                                     p_bubble: np.ndarray, p_sep: np.ndarray, t_sep: np.ndarray,
+                                     gas_sol: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+       Calculates the formation volume factor of the oil for arrays of inputs using Vasquez-Begg's Correlation.
+
+       Batched version of vasquez_beggs_oil_fvf, all the inputs are broadcast against each other and the saturated or
+       under-saturated branch is selected element-wise
+
+       Parameters:
+        ----------
+        pressure : array_like
+            Pressure of the oil in psia
+        temp : array_like
+            Temperature of the oil in degrees Rankine
+        oil_api : array_like
+            API gravity of the oil, indicating its density (°API)
+        sg_gas : array_like
+            Specific gravity of the gas relative to air
+        p_bubble: array_like
+            Bubble point pressure of the oil in psia
+        p_sep : array_like
+             Actual pressure of the separator in psia
+        t_sep : array_like
+            Actual temperature of the separator in degrees Rankine
+        gas_sol : array_like, optional
+            Solubility of gas in the oil in scf/bbl calculated using Vasquez-Begg's Correlation
+
+       Returns:
+       -------
+       np.ndarray
+           Formation Volume Factor of the oil at the given conditions, expressed in reservoir barrel per barrel of oil
+           at standard conditions (rb/stb)
+
+       Example:
+       --------
+       >>> vasquez_beggs_oil_fvf_vectorized(pressure=np.array([1000, 2000]), temp=620, oil_api=35, sg_gas=0.7, p_bubble=1500, p_sep=114.7, t_sep=520)
+       array([1.13793064, 1.18117934])
+    """
+
+    oil_api = np.asarray(oil_api, dtype=float)
+
+    # Adjust the gas gravity for separator conditions
+    sg_gas_sep: np.ndarray = Gas_Sol._separator_gas_gravity(sg_gas, oil_api, p_sep, t_sep)
+
+    # Calculate the solubility of gas at the given pressures and the solubility and oil FVF at bubble point
+    gas_sol = gas_sol if gas_sol is not None else Gas_Sol._vasquez_beggs_gas_solubility(pressure, temp, oil_api,
+                                                                                        p_bubble, sg_gas_sep)
+    gas_sol_bp: np.ndarray = Gas_Sol._vasquez_beggs_gas_solubility(p_bubble, temp, oil_api, p_bubble, sg_gas_sep)
+    oil_fvf_pb: np.ndarray = _vasquez_beggs_saturated_oil_fvf(temp, oil_api, sg_gas_sep, gas_sol_bp)
+
+    oil_fvf: np.ndarray = _vasquez_beggs_oil_fvf(pressure, temp, oil_api, p_bubble, sg_gas_sep, gas_sol, gas_sol_bp,
+                                                 oil_fvf_pb)
+
+    return oil_fvf
+
+
+def _vasquez_beggs_oil_fvf(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, p_bubble: np.ndarray,
+                           sg_gas_sep: np.ndarray, gas_sol: np.ndarray, gas_sol_bp: np.ndarray,
+                           oil_fvf_pb: np.ndarray) -> np.ndarray:
+    # Saturated and under-saturated branches of the Vasquez-Beggs oil FVF from the solubilities and the bubble point FVF
+    oil_fvf_sat: np.ndarray = _vasquez_beggs_saturated_oil_fvf(temp, oil_api, sg_gas_sep, gas_sol)
+    a_coeff: np.ndarray = np.power(10.0, -5) * (
+            -1433 + 5 * gas_sol_bp + 17.2 * (temp - 460) - 1180 * sg_gas_sep + 12.61 * oil_api)
+    with np.errstate(divide='ignore'):
+        oil_fvf_undersat: np.ndarray = oil_fvf_pb * np.exp(-a_coeff * np.log(pressure / p_bubble))
+    return np.where(pressure < p_bubble, oil_fvf_sat, oil_fvf_undersat)
+
+
+def _vasquez_beggs_oil_fvf_derivative(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray,
+                                      p_bubble: np.ndarray, sg_gas_sep: np.ndarray, gas_sol_bp: np.ndarray,
+                                      oil_fvf: np.ndarray, gas_sol_derivative: np.ndarray) -> np.ndarray:
+    # Derivative of the Vasquez-Beggs oil FVF with respect to pressure, through the solubility below the bubble point
+    # and through the exponential compression above it
+    coeff: List[np.ndarray] = _vasquez_beggs_coefficients(oil_api)
+    oil_fvf_sat_derivative: np.ndarray = (coeff[0] + (temp - 520) * (oil_api / sg_gas_sep) * coeff[2]
+                                          ) * gas_sol_derivative
+    a_coeff: np.ndarray = np.power(10.0, -5) * (
+            -1433 + 5 * gas_sol_bp + 17.2 * (temp - 460) - 1180 * sg_gas_sep + 12.61 * oil_api)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        oil_fvf_undersat_derivative: np.ndarray = -a_coeff * oil_fvf / pressure
+    return np.where(pressure < p_bubble, oil_fvf_sat_derivative, oil_fvf_undersat_derivative)
+
+
+def _standings_oil_fvf_derivative(gas_sol: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, sg_gas: np.ndarray,
+                                  gas_sol_derivative: np.ndarray) -> np.ndarray:
+    # Derivative of Standing's oil FVF with respect to pressure, through the solubility
+    gravity_ratio: np.ndarray = np.sqrt(sg_gas / (141.5 / (oil_api + 131.5)))
+    return (0.00012 * 1.2 * np.power(gas_sol * gravity_ratio + 1.25 * (temp - 460.67), 0.2) * gravity_ratio
+            * gas_sol_derivative)
+
+
+def _vasquez_beggs_saturated_oil_fvf(temp: np.ndarray, oil_api: np.ndarray, sg_gas_sep: np.ndarray,
+                                     gas_sol: np.ndarray) -> np.ndarray:
+    # Vasquez-Beggs oil FVF of oil saturated with the given amount of gas
+    coeff: List[np.ndarray] = _vasquez_beggs_coefficients(oil_api)
+    return 1 + coeff[0] * gas_sol + (temp - 520) * (oil_api / sg_gas_sep) * (coeff[1] + coeff[2] * gas_sol)
+
+
+def _vasquez_beggs_coefficients(oil_api: np.ndarray) -> List[np.ndarray]:
+    # Coefficients of the Vasquez-Beggs oil formation volume factor correlation for heavy and light oils
+    heavy_oil: np.ndarray = np.asarray(oil_api) <= 30
+    return [np.where(heavy_oil, heavy, light) for heavy, light in
+            zip([4.677 * np.power(10.0, -4), 1.751 * np.power(10.0, -5), -1.811 * np.power(10.0, -8)],
+                [4.67 * np.power(10.0, -4), 1.1 * np.power(10.0, -5), 1.337 * np.power(10.0, -9)])]
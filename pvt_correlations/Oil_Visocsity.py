@@ -1,5 +1,5 @@
 import numpy as np
-import Gas_Solubility as Gas_Sol
+from . import Gas_Solubility as Gas_Sol
 from typing import Optional
 
 
@@ -75,3 +75,105 @@ def beggs_robinson(pressure: float, temp: float, oil_api: float, sg_gas: float,
         oil_visc: float = oil_visc_pb * np.power(pressure / p_bubble, m_param)
 
     return oil_visc
+
+
+def beggs_robinson_vectorized(pressure: np.ndarray, temp: np.ndarray, oil_api: np.ndarray, sg_gas: np.ndarray,
+                              p_bubble: np.ndarray, gas_sol: Optional[np.ndarray] = None,
+                              p_sep: Optional[np.ndarray] = None, t_sep: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculates the viscosity of oil for arrays of inputs using Beggs-Robinson Correlation, viscosity above bubble point
+    is calculated using Vasquez-Beggs Correlation
+
+    Batched version of beggs_robinson, all the inputs are broadcast against each other and the saturated or
+    under-saturated branch is selected element-wise. As in the scalar function, a given gas solubility is also used as
+    the bubble point solubility for the under-saturated points
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Pressure of the oil in psia
+    temp : array_like
+        Temperature of the oil in degrees Rankine
+    oil_api : array_like
+        API gravity of the oil, indicating its density (°API)
+    sg_gas : array_like
+        Specific gravity of the gas relative to air
+    p_bubble: array_like
+        Bubble point pressure of the oil in psia
+    gas_sol: array_like, optional
+        Solubility of gas in the oil in scf/bbl
+    p_sep : array_like, optional
+         Actual pressure of the separator in psia
+    t_sep : array_like, optional
+        Actual temperature of the separator in degrees Rankine
+
+    Returns:
+    -------
+    np.ndarray
+        Viscosity of the oil at the given conditions, expressed in centipoise (cp)
+
+    Example:
+    --------
+    >>> beggs_robinson_vectorized(pressure=np.array([1000, 2000]), temp=620, oil_api=35, sg_gas=0.7, p_bubble=1500, p_sep=114.7, t_sep=520)
+    array([1.30261678, 1.07528886])
+    """
+
+    # Viscosity of dead oil
+    oil_visc_dead: np.ndarray = _dead_oil_viscosity(temp, oil_api)
+
+    # Vasquez-Beggs solubility is capped at the bubble point, so it is also the bubble point solubility above it
+    gas_sol = gas_sol if gas_sol is not None else Gas_Sol.vasquez_beggs_gas_solubility_vectorized(
+        pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
+
+    oil_visc: np.ndarray = _beggs_robinson(pressure, p_bubble, oil_visc_dead, gas_sol)
+
+    return oil_visc
+
+
+def _beggs_robinson(pressure: np.ndarray, p_bubble: np.ndarray, oil_visc_dead: np.ndarray,
+                    gas_sol: np.ndarray) -> np.ndarray:
+    # Beggs-Robinson Correlation for the viscosity of saturated oil
+    oil_visc_sat: np.ndarray = _live_oil_viscosity(oil_visc_dead, gas_sol)
+
+    # Vasquez-Beggs Correlation for the viscosity of under-saturated oil
+    return np.where(pressure <= p_bubble, oil_visc_sat,
+                    oil_visc_sat * _undersaturated_viscosity_ratio(pressure, p_bubble))
+
+
+def _beggs_robinson_derivative(pressure: np.ndarray, p_bubble: np.ndarray, oil_visc_dead: np.ndarray,
+                               gas_sol: np.ndarray, oil_visc: np.ndarray, gas_sol_derivative: np.ndarray) -> np.ndarray:
+    # Derivative of the oil viscosity with respect to pressure. The saturated viscosity changes with the solubility
+    # and above the bubble point the Vasquez-Beggs ratio (p / pb) ** m adds the change of its exponent m(p)
+    oil_visc_sat: np.ndarray = _live_oil_viscosity(oil_visc_dead, gas_sol)
+    b_param: np.ndarray = 5.44 * np.power(gas_sol + 150, -0.338)
+    oil_visc_sat_derivative: np.ndarray = oil_visc_sat * (
+            -0.515 / (gas_sol + 100) - 0.338 * b_param / (gas_sol + 150) * np.log(oil_visc_dead)) * gas_sol_derivative
+
+    n_param: np.ndarray = -3.9 * 0.00001 * pressure - 5
+    m_param: np.ndarray = 2.6 * np.power(pressure, 1.187) * np.power(10.0, n_param)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m_derivative: np.ndarray = m_param * (1.187 / pressure - 3.9 * 0.00001 * np.log(10.0))
+        oil_visc_undersat_derivative: np.ndarray = (oil_visc / oil_visc_sat * oil_visc_sat_derivative + oil_visc * (
+                m_derivative * np.log(pressure / p_bubble) + m_param / pressure))
+    return np.where(pressure <= p_bubble, oil_visc_sat_derivative, oil_visc_undersat_derivative)
+
+
+def _dead_oil_viscosity(temp: np.ndarray, oil_api: np.ndarray) -> np.ndarray:
+    # Beggs-Robinson viscosity of the gas free oil
+    y_param: np.ndarray = np.power(10.0, 3.0324 - 0.02023 * np.asarray(oil_api, dtype=float))
+    x_param: np.ndarray = y_param * np.power(temp - 460, -1.163)
+    return np.power(10.0, x_param) - 1
+
+
+def _live_oil_viscosity(oil_visc_dead: np.ndarray, gas_sol: np.ndarray) -> np.ndarray:
+    # Beggs-Robinson viscosity of the oil saturated with the given amount of gas
+    a_param: np.ndarray = 10.715 * np.power(gas_sol + 100, -0.515)
+    b_param: np.ndarray = 5.44 * np.power(gas_sol + 150, -0.338)
+    return a_param * np.power(oil_visc_dead, b_param)
+
+
+def _undersaturated_viscosity_ratio(pressure: np.ndarray, p_bubble: np.ndarray) -> np.ndarray:
+    # Vasquez-Beggs ratio of the under-saturated oil viscosity to the viscosity at bubble point
+    n_param: np.ndarray = -3.9 * 0.00001 * pressure - 5
+    m_param: np.ndarray = 2.6 * np.power(pressure, 1.187) * np.power(10.0, n_param)
+    return np.power(pressure / p_bubble, m_param)
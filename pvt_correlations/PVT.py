@@ -1,18 +1,252 @@
-import Fluid
-import PVT_Table
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
 
-if __name__ == '__main__':
-    oil = Fluid.Fluid(35, 0.68)
+from . import Batch_Runner
+from . import PVT_Stream
+
+# Columns of a catalog, the fluid and conditions of every table. pressure_max and num_points can be left out of the
+# catalog and given on the command line instead, the correlation columns fall back to the pvt_table defaults
+CATALOG_FIELDS: List[str] = ['oil_api', 'sg_gas', 'p_bubble', 'temp', 'p_sep', 't_sep']
+DEFAULT_NUM_POINTS: int = 301
+
+# Output formats of a directory of tables, and of a single consolidated file by its extension
+DIRECTORY_FORMATS: List[str] = ['csv', 'npy']
+FILE_FORMATS: List[str] = ['.csv', '.npz']
+
+
+def read_catalog(path: str, pressure_max: Optional[float] = None,
+                 num_points: int = DEFAULT_NUM_POINTS) -> Tuple[List[str], List[Dict]]:
+    """
+    Reads a CSV catalog of fluids and conditions, one table per row
+
+    Parameters:
+    ----------
+    path : str
+        CSV file with a header row holding oil_api, sg_gas, p_bubble, temp, p_sep and t_sep, and optionally name,
+        pressure_max, num_points and the gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr and oil_visc_corr
+    pressure_max : float, optional
+        Highest pressure of the tables whose row leaves pressure_max empty
+    num_points : int, optional
+        Number of points of the tables whose row leaves num_points empty
+
+    Returns:
+    -------
+    tuple of (list of str, list of dict)
+        Name of every table, the name column or the row number, and the records of run_batch
+
+    Raises:
+    ------
+    ValueError
+        When a row misses a field or holds a value that is not a number, two rows have the same name or names that
+        give the same file name, or a name gives no usable file name, such as '..'
+    """
+    names: List[str] = []
+    file_names: Dict[str, str] = {}
+    records: List[Dict] = []
+    with open(path, newline='') as catalog_file:
+        for line, row in enumerate(csv.DictReader(catalog_file), start=2):
+            # Empty cells count as missing, so the defaults apply to them
+            row = {field.strip(): value.strip() for field, value in row.items() if field and value and value.strip()}
+            record: Dict = {'pressure_max': pressure_max, 'num_points': num_points}
+            for field in CATALOG_FIELDS + ['pressure_max', 'num_points']:
+                if field in row:
+                    try:
+                        record[field] = float(row[field])
+                    except ValueError:
+                        raise ValueError(f"{path}, line {line}: {field} is not a number: {row[field]!r}")
+            missing: List[str] = [field for field in CATALOG_FIELDS + ['pressure_max'] if record.get(field) is None]
+            if missing:
+                raise ValueError(f"{path}, line {line}: missing {', '.join(missing)}")
+            record['num_points'] = int(record['num_points'])
+            record.update({field: row[field] for field in Batch_Runner.CORRELATION_FIELDS if field in row})
+
+            name: str = row.get('name', str(len(records)))
+            if name in names:
+                raise ValueError(f"{path}, line {line}: duplicate name {name!r}")
+            if not _usable_file_name(name):
+                raise ValueError(f"{path}, line {line}: name {name!r} gives no usable file name")
+            other: str = file_names.setdefault(_file_key(name), name)
+            if other != name:
+                raise ValueError(f"{path}, line {line}: name {name!r} gives the same file name as {other!r}")
+            names.append(name)
+            records.append(record)
+    return names, records
+
+
+def run_catalog(names: Sequence[str], records: Sequence[Dict], jobs: int = 1, output_dir: Optional[str] = None,
+                output: Optional[str] = None, file_format: str = "csv",
+                columns: Optional[List[str]] = None) -> Dict:
+    """
+    Generates the tables of a catalog, in parallel worker processes when jobs is above one, and writes them out
+
+    Parameters:
+    ----------
+    names : sequence of str
+        Name of every table, used for its file in output_dir and for its rows in output
+    records : sequence of dict
+        Records of run_batch, as returned by read_catalog
+    jobs : int, optional
+        Number of worker processes
+    output_dir : str, optional
+        Directory to write one table per file to, <name>.csv for the csv format or a <name> directory of .npy columns
+        read by read_pvt_table for the npy format
+    output : str, optional
+        Single file to write every table to, a .csv file with the name of the table in its first column or a .npz
+        file holding values, offsets, columns and names as in BatchResult
+    file_format : str, optional
+        Format of the tables in output_dir, csv or npy
+    columns : list of str, optional
+        Columns of pvt_table to calculate, all of them by default
+
+    Returns:
+    -------
+    dict
+        Stats of the batch from run_batch, with the time of every stage in seconds under 'stages' and the throughput
+        of the whole run under 'tables_per_second' and 'points_per_second'
+
+    Example:
+    --------
+    >>> record = {'pressure_max': 3000, 'p_bubble': 1700, 'temp': 620, 'oil_api': 35, 'sg_gas': 0.68, 'p_sep': 120, 't_sep': 520, 'num_points': 301}
+    >>> stats = run_catalog(['a', 'b'], [record, record])
+    >>> stats['tables'], stats['points'], sorted(stats['stages'])
+    (2, 602, ['generate', 'write'])
+    """
+    if file_format not in DIRECTORY_FORMATS:
+        raise ValueError(f"Unknown file format {file_format!r}, choose from {', '.join(DIRECTORY_FORMATS)}")
+    if output is not None and os.path.splitext(output)[1] not in FILE_FORMATS:
+        raise ValueError(f"Unknown extension of {output!r}, choose from {', '.join(FILE_FORMATS)}")
+    if output_dir is not None:
+        # Tables whose names give the same file name would overwrite each other
+        file_names: Dict[str, str] = {}
+        for name in names:
+            if not _usable_file_name(name):
+                raise ValueError(f"Name {name!r} gives no usable file name")
+            other: str = file_names.setdefault(_file_key(name), name)
+            if other != name:
+                raise ValueError(f"Names {other!r} and {name!r} give the same file name")
+
+    start_time: float = time.perf_counter()
+    result: Batch_Runner.BatchResult = Batch_Runner.run_batch(records, workers=jobs, columns=columns)
+    generate_time: float = time.perf_counter() - start_time
+
+    write_start: float = time.perf_counter()
+    if output_dir is not None:
+        _write_directory(output_dir, names, result, file_format)
+    if output is not None:
+        _write_file(output, names, result)
+    write_time: float = time.perf_counter() - write_start
+
+    stats: Dict = result.stats
+    stats['stages'] = {'generate': generate_time, 'write': write_time}
+    total_time: float = generate_time + write_time
+    stats['tables_per_second'] = stats['tables'] / total_time if total_time > 0 else float('nan')
+    stats['points_per_second'] = stats['points'] / total_time if total_time > 0 else float('nan')
+    return stats
 
-    pressure_max = 3000
-    p_bubble = 1700
-    temp = 620
-    oil_api = oil.oil_api
-    sg_gas = oil.sg_gas
-    p_sep = 120
-    t_sep = 520
 
-    table = PVT_Table.pvt_table(pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, 301)
-    print(table)
+def _file_name(name: str) -> str:
+    # Name of a table made safe to use as a file name
+    return re.sub(r'[^\w.-]+', '_', name)
 
 
+def _usable_file_name(name: str) -> bool:
+    # A name of nothing but dots gives the output directory itself or its parent, which the tables must not escape
+    return bool(_file_name(name).strip('.'))
+
+
+def _file_key(name: str) -> str:
+    # File names that are the same file on a case insensitive file system have the same key
+    return _file_name(name).casefold()
+
+
+def _write_directory(output_dir: str, names: Sequence[str], result: Batch_Runner.BatchResult, file_format: str):
+    os.makedirs(output_dir, exist_ok=True)
+    for index, name in enumerate(names):
+        rows: np.ndarray = result.values[result.offsets[index]:result.offsets[index + 1]]
+        path: str = os.path.join(output_dir, _file_name(name))
+        if file_format == "npy":
+            PVT_Stream.write_columns(path, {column: rows[:, col] for col, column in enumerate(result.columns)})
+        else:
+            np.savetxt(path + ".csv", rows, delimiter=',', fmt='%.17g', header=','.join(result.columns), comments='')
+
+
+def _write_file(output: str, names: Sequence[str], result: Batch_Runner.BatchResult):
+    directory: str = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if output.endswith(".npz"):
+        np.savez(output, values=result.values, offsets=result.offsets, columns=np.array(result.columns),
+                 names=np.array(names))
+        return
+
+    with open(output, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Fluid'] + result.columns)
+        for index, name in enumerate(names):
+            # The name is written once as the start of the row format, escaped for csv and for the % of the format
+            cell: str = name if not re.search(r'[",\n]', name) else '"' + name.replace('"', '""') + '"'
+            row_format: str = cell.replace('%', '%%') + ',' + ','.join(['%.17g'] * len(result.columns))
+            np.savetxt(csv_file, result.values[result.offsets[index]:result.offsets[index + 1]], fmt=row_format)
+
+
+def _report(stats: Dict, stream=sys.stdout):
+    # Throughput of the run, then the time of every stage and the throughput of every worker process
+    stream.write(f"{stats['tables']} tables, {stats['points']} points in {sum(stats['stages'].values()):.3f} s: "
+                 f"{stats['tables_per_second']:.1f} tables/s, {stats['points_per_second']:.0f} points/s\n")
+    for stage, seconds in stats['stages'].items():
+        stream.write(f"  {stage:<10}{seconds:10.4f} s\n")
+    for pid, worker in stats['workers'].items():
+        stream.write(f"  worker {pid}: {worker['tables']} tables in {worker['time']:.4f} s, "
+                     f"{worker['tables_per_second']:.1f} tables/s, {worker['points_per_second']:.0f} points/s\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="pvt_correlations",
+                                     description="Generate the PVT table of every fluid of a CSV catalog")
+    parser.add_argument('catalog', help="CSV file with one fluid and its conditions per row: "
+                                        + ", ".join(CATALOG_FIELDS) + ", and optionally name, pressure_max, "
+                                        "num_points and the correlation columns")
+    parser.add_argument('--pressure-max', type=float, help="Highest pressure of rows without pressure_max")
+    parser.add_argument('--num-points', type=int, default=DEFAULT_NUM_POINTS,
+                        help="Number of points of rows without num_points")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--output-dir', '-d', help="Directory to write one table per fluid to")
+    parser.add_argument('--format', default="csv", choices=DIRECTORY_FORMATS, help="Format of the tables in the "
+                                                                                   "output directory")
+    parser.add_argument('--output', '-o', help="Single .csv or .npz file to write every table to")
+    parser.add_argument('--columns', help="Comma separated pvt_table columns to calculate, all of them by default")
+    parser.add_argument('--json', action='store_true', help="Print the stats as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        start_time: float = time.perf_counter()
+        names, records = read_catalog(args.catalog, args.pressure_max, args.num_points)
+        read_time: float = time.perf_counter() - start_time
+        columns: Optional[List[str]] = args.columns.split(',') if args.columns else None
+        stats: Dict = run_catalog(names, records, args.jobs, args.output_dir, args.output, args.format, columns)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    # Reading the catalog is part of the run, the throughput is worked out again with it
+    stats['stages'] = {'read': read_time, **stats['stages']}
+    total_time: float = sum(stats['stages'].values())
+    stats['tables_per_second'] = stats['tables'] / total_time if total_time > 0 else float('nan')
+    stats['points_per_second'] = stats['points'] / total_time if total_time > 0 else float('nan')
+
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        _report(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
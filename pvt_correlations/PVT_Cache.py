@@ -0,0 +1,334 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from . import __version__
+from . import PVT_Result
+
+try:
+    import fcntl
+except ImportError:
+    # Without fcntl, as on Windows, the size bookkeeping and the evictions of different processes are not serialized
+    fcntl = None
+
+# Version of the layout of the cache, part of every key so a new layout never reads entries of an older one
+CACHE_VERSION: int = 1
+
+DEFAULT_MAX_BYTES: int = 1 << 30
+
+# Number of tables every cache keeps in memory, on top of the ones on disk
+DEFAULT_MEMO_SIZE: int = 256
+
+# Files of an entry: the (columns, points) buffer of the table and the index naming its columns, written last
+VALUES_FILE: str = "values.npy"
+INDEX_FILE: str = "index.json"
+
+# Files of the cache: the lock serializing the bookkeeping of processes sharing the cache, and the number of bytes of
+# the entries, kept up to date by every write so the cache is only scanned once it goes over its budget
+LOCK_FILE: str = ".lock"
+SIZE_FILE: str = ".size"
+TMP_DIR: str = "tmp"
+
+# Age in seconds after which a temporary directory is taken to be left over by a writer that died
+STALE_SECONDS: float = 3600.0
+
+# Caches by directory, so pvt_table(cache=path) keeps one in-memory memo per directory
+_caches: Dict[str, "PVTCache"] = {}
+
+
+def table_key(**inputs) -> str:
+    """
+    Returns a stable sha256 key of the inputs of a table, the library version and the cache layout. Numbers are keyed
+    by their float value, so 3000 and 3000.0 give the same key
+
+    Example:
+    --------
+    >>> table_key(pressure_max=3000, temp=620) == table_key(temp=620.0, pressure_max=3000.0)
+    True
+    """
+    def normalize(value):
+        if isinstance(value, (bool, str)) or value is None:
+            return value
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return float(value)
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        return str(value)
+
+    content: Dict = {name: normalize(value) for name, value in inputs.items()}
+    content['__version__'] = __version__
+    content['__cache_version__'] = CACHE_VERSION
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class PVTCache:
+    """
+    Persistent cache of PVT tables, addressed by the content of their inputs and bounded in size on disk
+
+    Every table is stored as a directory holding its (columns, points) buffer as a .npy file, whose rows are the
+    columns, and an index of the column names. A hit memory-maps the buffer into a read-only PVTResult, so nothing is
+    calculated or copied, and the most recently used tables are also kept in memory. Once the entries take more than
+    max_bytes, the least recently used ones are evicted
+
+    Several processes can share a directory. An entry is written to a temporary directory and renamed into place, so
+    readers never see a partial entry, and of two processes writing the same table the second one discards its copy.
+    Evicted entries are renamed out of place before they are deleted, and tables already mapped by a reader stay
+    valid. Every write adds its entry to a running total of the size of the cache, and the cache is only scanned for
+    evictions when the total goes over the budget. The total and the evictions are serialized with a lock file where
+    fcntl is available
+
+    Parameters:
+    ----------
+    directory : str
+        Directory of the cache, created if it does not exist
+    max_bytes : int, optional
+        Disk budget of the entries
+    memo_size : int, optional
+        Number of tables kept in memory, 0 to always read them from disk
+
+    Example:
+    --------
+    >>> directory = tempfile.mkdtemp()
+    >>> cache = PVTCache(directory)
+    >>> result = PVT_Result.PVTResult.from_columns({'Pressure': [0.0, 1000.0], 'Oil FVF': [1.05, 1.2]})
+    >>> cache.put(table_key(fluid=1), result)
+    True
+    >>> PVTCache(directory).get(table_key(fluid=1))['Oil FVF']
+    array([1.05, 1.2 ])
+    >>> shutil.rmtree(directory)
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, memo_size: int = DEFAULT_MEMO_SIZE):
+        self.directory: str = os.path.abspath(directory)
+        self.max_bytes: int = max_bytes
+        self.memo_size: int = memo_size
+        self.stats: Dict[str, int] = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._memo: "OrderedDict[str, PVT_Result.PVTResult]" = OrderedDict()
+        os.makedirs(os.path.join(self.directory, TMP_DIR), exist_ok=True)
+
+    def __repr__(self):
+        return f"PVTCache({self.directory!r}, max_bytes={self.max_bytes})"
+
+    def _entry(self, key: str) -> str:
+        # Entries are spread over subdirectories named by the start of their key
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[PVT_Result.PVTResult]:
+        """
+        Returns the cached table of a key, None when it is not cached. The table is read-only, it maps the entry and is
+        shared with the later hits of the cache
+        """
+        result: Optional[PVT_Result.PVTResult] = self._memo.get(key)
+        if result is not None:
+            self._memo.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return result
+
+        entry: str = self._entry(key)
+        try:
+            with open(os.path.join(entry, INDEX_FILE)) as index_file:
+                index: Dict = json.load(index_file)
+            columns: List[str] = index['columns']
+            values: np.ndarray = _map_npy(os.path.join(entry, VALUES_FILE), np.dtype(index['dtype']),
+                                          (len(columns), index['num_points']), index['offset'])
+            # The modification time of the index is the last use of the entry, which orders the evictions
+            os.utime(os.path.join(entry, INDEX_FILE))
+        except (OSError, ValueError, KeyError):
+            # Missing, evicted meanwhile or unreadable entries are misses
+            self.stats['misses'] += 1
+            return None
+
+        result = PVT_Result.PVTResult(values, columns)
+        self.stats['disk_hits'] += 1
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: PVT_Result.PVTResult) -> bool:
+        """
+        Stores a table under its key, evicting the least recently used entries if the cache goes over its budget
+
+        Returns:
+        -------
+        bool
+            Whether the table was written, False when another process had already written it
+        """
+        entry: str = self._entry(key)
+        tmp: str = tempfile.mkdtemp(prefix=key[:16] + ".", dir=os.path.join(self.directory, TMP_DIR))
+        try:
+            with open(os.path.join(tmp, VALUES_FILE), 'wb') as npy_file:
+                np.lib.format.write_array(npy_file, np.ascontiguousarray(result.values))
+                offset: int = npy_file.tell() - result.nbytes
+            with open(os.path.join(tmp, INDEX_FILE), 'w') as index_file:
+                json.dump({'key': key, 'columns': result.columns, 'num_points': len(result),
+                           'dtype': result.dtype.str, 'offset': offset}, index_file)
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if os.path.isdir(entry):
+                return False
+            raise
+
+        # The table is not kept in memory, the caller can still change it, the next get maps the written copy
+        self.stats['writes'] += 1
+        with self._lock():
+            size: Optional[int] = self._read_size()
+            if size is None or size + _entry_size(entry) > self.max_bytes:
+                self._evict()
+            else:
+                self._write_size(size + _entry_size(entry))
+        return True
+
+    def evict(self) -> int:
+        """
+        Scans the cache and evicts the least recently used entries until it fits in its budget, and removes the
+        temporary directories left over by writers that died
+
+        Returns:
+        -------
+        int
+            Number of entries evicted
+        """
+        with self._lock():
+            return self._evict()
+
+    def _evict(self) -> int:
+        # Eviction with the lock held
+        entries: List[Tuple[float, int, str]] = []
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir() or prefix.name == TMP_DIR:
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    last_use: float = os.stat(os.path.join(entry.path, INDEX_FILE)).st_mtime
+                except OSError:
+                    continue
+                entries.append((last_use, _entry_size(entry.path), entry.path))
+
+        size: int = sum(entry_size for _, entry_size, _ in entries)
+        evicted: int = 0
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            _remove(path, os.path.join(self.directory, TMP_DIR))
+            size -= entry_size
+            evicted += 1
+        self._write_size(size)
+
+        now: float = time.time()
+        for tmp in os.scandir(os.path.join(self.directory, TMP_DIR)):
+            try:
+                if now - tmp.stat().st_mtime > STALE_SECONDS:
+                    shutil.rmtree(tmp.path, ignore_errors=True)
+            except OSError:
+                pass
+
+        self.stats['evictions'] += evicted
+        return evicted
+
+    def _read_size(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.directory, SIZE_FILE)) as size_file:
+                return int(size_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, size: int):
+        with open(os.path.join(self.directory, SIZE_FILE), 'w') as size_file:
+            size_file.write(str(size))
+
+    def size(self) -> int:
+        """
+        Returns the number of bytes the entries take on disk
+        """
+        return sum(_entry_size(entry.path) for prefix in os.scandir(self.directory)
+                   if prefix.is_dir() and prefix.name != TMP_DIR for entry in os.scandir(prefix.path))
+
+    def clear(self):
+        """
+        Removes every entry from disk and from memory
+        """
+        max_bytes: int = self.max_bytes
+        self.max_bytes = -1
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+        self._memo.clear()
+
+    def _remember(self, key: str, result: PVT_Result.PVTResult):
+        if self.memo_size <= 0:
+            return
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _lock(self):
+        return _FileLock(os.path.join(self.directory, LOCK_FILE))
+
+
+def get_cache(cache: Union[str, os.PathLike, PVTCache]) -> PVTCache:
+    """
+    Returns the cache itself, or the cache of a directory, created with the default budget on first use
+    """
+    if isinstance(cache, PVTCache):
+        return cache
+    directory: str = os.path.abspath(os.fspath(cache))
+    if directory not in _caches:
+        _caches[directory] = PVTCache(directory)
+    return _caches[directory]
+
+
+class _FileLock:
+    # Exclusive lock on a file, held for the duration of a with block
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def _map_npy(path: str, dtype: np.dtype, shape: Tuple[int, int], offset: int) -> np.ndarray:
+    # Memory-maps the data of a .npy file read-only. The dtype, shape and offset of the data come from the index, which
+    # is faster than np.load: parsing the .npy header and going through np.memmap take most of the time of a hit
+    with open(path, 'rb') as npy_file:
+        buffer = mmap.mmap(npy_file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) != offset + shape[0] * shape[1] * dtype.itemsize:
+        raise ValueError(f"{path} does not match its index")
+    return np.frombuffer(buffer, dtype=dtype, count=shape[0] * shape[1], offset=offset).reshape(shape)
+
+
+def _entry_size(path: str) -> int:
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path))
+    except OSError:
+        return 0
+
+
+def _remove(path: str, tmp_dir: str):
+    # Renamed out of place first, so no reader finds a partly deleted entry
+    evicted: str = tempfile.mkdtemp(prefix="evicted.", dir=tmp_dir)
+    try:
+        os.rename(path, os.path.join(evicted, os.path.basename(path)))
+    except OSError:
+        # Evicted by another process meanwhile
+        pass
+    shutil.rmtree(evicted, ignore_errors=True)
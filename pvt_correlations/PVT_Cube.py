@@ -0,0 +1,93 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+from . import Fluid
+from . import PVT_Result
+from . import PVT_Table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Fluid properties that define each fluid of the cube
+FLUID_FIELDS: List[str] = ['oil_api', 'sg_gas', 'p_bubble', 'p_sep', 't_sep']
+
+
+def pvt_cube(fluids: Union[Sequence[Fluid.Fluid], Dict, "pd.DataFrame"], temps: Sequence[float], pressure_max: float,
+             num_points: int, gas_sol_corr: Optional[str] = "Vasquez Beggs",
+             gas_comp_corr: Optional[str] = "Carnahan Starling", gas_visc_corr: Optional[str] = "Lee Gonzalez Eakin",
+             oil_fvf_corr: Optional[str] = "Vasquez Beggs", oil_visc_corr: Optional[str] = "Beggs Robinson",
+             columns: Optional[List[str]] = None,
+             flatten: Optional[bool] = False) -> Union[Dict[str, np.ndarray], "pd.DataFrame"]:
+    """
+    Calculates the PVT properties of several fluids at several temperatures over a common range of pressures
+
+    The fluids are laid out along the first axis, the temperatures along the second and the pressures along the third,
+    and the whole grid is evaluated in one broadcast pass of the vectorized correlations
+
+    Parameters:
+    ----------
+    fluids : sequence of Fluid, dict or pd.DataFrame
+        Fluids to calculate the properties of, either as Fluid objects with their bubble point and separator conditions
+        set, or as columns named oil_api, sg_gas, p_bubble, p_sep and t_sep
+    temps : sequence of float
+        Temperatures of the fluids in degrees Rankine
+    pressure_max : float
+        Maximum pressure of the range in psia, the range starts at zero
+    num_points : int
+        Number of pressures in the range
+    gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr : str, optional
+        Correlations used for each property, as in pvt_table
+    columns : list of str, optional
+        Columns of pvt_table to calculate, all of them by default
+    flatten : bool, optional
+        Return a long-format DataFrame with one row per (fluid, temperature, pressure) instead of the dense arrays
+
+    Returns:
+    -------
+    dict of np.ndarray or pd.DataFrame
+        Arrays of shape (number of fluids, number of temperatures, num_points) for every column of pvt_table, or the
+        long-format table with the fluid index and temperature of every row when flatten is set
+
+    Example:
+    --------
+    >>> cube = pvt_cube([Fluid.Fluid(35, 0.68, 1700, 120, 520), Fluid.Fluid(28, 0.75, 2200, 120, 520)], [600, 620, 640], 3000, 301)
+    >>> cube['Oil FVF'].shape
+    (2, 3, 301)
+    """
+
+    fluid_columns: Dict[str, np.ndarray] = _fluid_columns(fluids)
+    temps: np.ndarray = np.asarray(temps, dtype=float)
+    p_range: np.ndarray = np.linspace(0, pressure_max, num_points)
+
+    # Fluids along the first axis, temperatures along the second and pressures along the third
+    fluid_axis: Dict[str, np.ndarray] = {field: column[:, np.newaxis, np.newaxis] for field, column in
+                                         fluid_columns.items()}
+    cube: Dict[str, np.ndarray] = PVT_Table._pvt_columns(p_range[np.newaxis, np.newaxis, :], fluid_axis['p_bubble'],
+                                                         temps[np.newaxis, :, np.newaxis], fluid_axis['oil_api'],
+                                                         fluid_axis['sg_gas'], fluid_axis['p_sep'],
+                                                         fluid_axis['t_sep'], gas_sol_corr, gas_comp_corr,
+                                                         gas_visc_corr, oil_fvf_corr, oil_visc_corr, columns)
+
+    if not flatten:
+        return cube
+
+    # Long-format table, with the fluid and the temperature of every row
+    import pandas as pd
+    shape = cube['Pressure'].shape
+    fluid_index, temp_index, _ = np.indices(shape).reshape(3, -1)
+    table: Dict[str, np.ndarray] = {'Fluid': fluid_index, 'Temperature': temps[temp_index]}
+    table.update({name: column.ravel() for name, column in cube.items()})
+    return pd.DataFrame(table)
+
+
+def _fluid_columns(fluids: Union[Sequence[Fluid.Fluid], Dict, "pd.DataFrame"]) -> Dict[str, np.ndarray]:
+    # Collect the properties of the fluids into one array per property
+    if isinstance(fluids, dict) or PVT_Result.is_dataframe(fluids):
+        columns = {field: np.asarray(fluids[field], dtype=float) for field in FLUID_FIELDS}
+    else:
+        columns = {field: np.array([getattr(fluid, field) for fluid in fluids], dtype=float) for field in FLUID_FIELDS}
+
+    missing: List[str] = [field for field, column in columns.items() if np.isnan(column).any()]
+    if missing:
+        raise ValueError(f"Every fluid needs a value of {', '.join(missing)}")
+    return {field: np.atleast_1d(column) for field, column in columns.items()}
@@ -0,0 +1,197 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Interpolation methods of the lookup
+METHODS: List[str] = ['linear', 'pchip']
+
+
+class PVTLookup:
+    """
+    Interpolation table of PVT properties for fast repeated queries at arbitrary pressures
+
+    The properties are held as one contiguous (number of columns, number of knots) array. When a bubble point is given
+    the table is split into a saturated branch below it and an undersaturated branch from it, and both branches get a
+    knot at the bubble point, so the kink of the oil properties is never interpolated across. The two branches share
+    one sorted pressure array in which the bubble point appears twice, and a single searchsorted picks the interval and
+    the branch of every query
+
+    Parameters:
+    ----------
+    pressure : array_like
+        Increasing pressures of the table in psia
+    columns : dict
+        Values of every property at the pressures
+    p_bubble : float, optional
+        Bubble point pressure in psia. When it is not one of the pressures, the value of every property at the bubble
+        point is extrapolated linearly from each side. A side with a single pressure takes the value extrapolated from
+        the other side, and a table without two pressures on either side of the bubble point is an error
+    method : str, optional
+        'linear' or 'pchip' (monotone piecewise cubic Hermite) interpolation
+
+    Notes:
+    ------
+    Queries outside the pressures of the table are extrapolated from the first or the last interval
+
+    Example:
+    --------
+    >>> lookup = PVTLookup([1000, 2000, 3000], {'Oil FVF': [1.1, 1.2, 1.19]}, p_bubble=2000)
+    >>> lookup.interpolate([1500, 2000, 2500], 'Oil FVF')
+    array([1.15 , 1.2  , 1.195])
+    """
+
+    def __init__(self, pressure: Sequence[float], columns: Dict[str, Sequence[float]], p_bubble: Optional[float] = None,
+                 method: str = 'linear'):
+        if method not in METHODS:
+            raise ValueError(f"Unknown interpolation method {method!r}, choose from {', '.join(METHODS)}")
+        pressure = np.asarray(pressure, dtype=float)
+        if pressure.ndim != 1 or pressure.size < 2 or np.any(np.diff(pressure) <= 0):
+            raise ValueError("The pressures must be a strictly increasing array of at least two values")
+
+        self.method: str = method
+        self.p_bubble: Optional[float] = p_bubble
+        self.columns: List[str] = [col for col in columns if col != 'Pressure']
+        self._index: Dict[str, int] = {col: i for i, col in enumerate(self.columns)}
+        values: np.ndarray = np.array([np.asarray(columns[col], dtype=float) for col in self.columns]).reshape(
+            len(self.columns), pressure.size)
+
+        branches: List[tuple] = _branches(pressure, values, p_bubble)
+        self._pressure: np.ndarray = np.concatenate([branch[0] for branch in branches])
+        self._values: np.ndarray = np.ascontiguousarray(np.concatenate([branch[1] for branch in branches], axis=1))
+
+        # Every knot but the last starts an interval, the interval between the two bubble point knots has no width
+        width: np.ndarray = np.diff(self._pressure)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._slope: np.ndarray = np.ascontiguousarray(
+                np.where(width > 0, np.diff(self._values, axis=1) / width, 0.0))
+        if method == 'pchip':
+            self._width: np.ndarray = width
+            self._derivative: np.ndarray = np.ascontiguousarray(
+                np.concatenate([_pchip_derivatives(*branch) for branch in branches], axis=1))
+
+    @classmethod
+    def from_table(cls, table: Union["pd.DataFrame", Dict[str, np.ndarray]], p_bubble: Optional[float] = None,
+                   method: str = 'linear') -> "PVTLookup":
+        """
+        Builds the lookup from a pvt_table result, or any table with a Pressure column. Rows with a pressure of zero
+        are left out, the gas properties are not defined there
+        """
+        pressure: np.ndarray = np.asarray(table['Pressure'], dtype=float)
+        keep: np.ndarray = pressure > 0
+        columns: Dict[str, np.ndarray] = {col: np.asarray(table[col], dtype=float)[keep] for col in table
+                                          if col != 'Pressure'}
+        return cls(pressure[keep], columns, p_bubble, method)
+
+    def _locate(self, pressure: np.ndarray):
+        # Interval of every query, a query at the bubble point falls in the undersaturated branch
+        interval: np.ndarray = np.clip(np.searchsorted(self._pressure, pressure, side='right') - 1, 0,
+                                       self._pressure.size - 2)
+        return interval, pressure - self._pressure[interval]
+
+    def _interpolate(self, row: int, interval: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        if self.method == 'linear':
+            return self._values[row, interval] + offset * self._slope[row, interval]
+
+        # Cubic Hermite interpolation with the monotone derivatives at the knots
+        width: np.ndarray = self._width[interval]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t: np.ndarray = np.where(width > 0, offset / width, 0.0)
+        slope: np.ndarray = self._slope[row, interval]
+        d0: np.ndarray = self._derivative[row, interval]
+        d1: np.ndarray = self._derivative[row, interval + 1]
+        return self._values[row, interval] + offset * (d0 + t * ((3 * slope - 2 * d0 - d1) + t * (d0 + d1 - 2 * slope)))
+
+    def interpolate(self, pressure: Union[float, np.ndarray], column: str) -> np.ndarray:
+        """
+        Returns the values of one column at the given pressures
+        """
+        if column not in self._index:
+            raise ValueError(f"Unknown column {column!r}")
+        pressure = np.asarray(pressure, dtype=float)
+        interval, offset = self._locate(pressure)
+        return self._interpolate(self._index[column], interval, offset)[()]
+
+    def __call__(self, pressure: Union[float, np.ndarray],
+                 columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns the values of the columns at the given pressures, all the columns by default. The intervals of the
+        pressures are located once for all the columns
+
+        Returns:
+        -------
+        dict
+            Values of every requested column, with the shape of the pressures
+        """
+        columns = self.columns if columns is None else list(columns)
+        unknown: List[str] = [col for col in columns if col not in self._index]
+        if unknown:
+            raise ValueError(f"Unknown columns {', '.join(unknown)}")
+        pressure = np.asarray(pressure, dtype=float)
+        interval, offset = self._locate(pressure)
+        return {col: self._interpolate(self._index[col], interval, offset)[()] for col in columns}
+
+
+def _branches(pressure: np.ndarray, values: np.ndarray, p_bubble: Optional[float]) -> List[tuple]:
+    # Splits the table at the bubble point into the saturated and undersaturated branches, both ending at the bubble
+    # point. Branches with a single knot cannot be interpolated and are dropped
+    if p_bubble is None or not pressure[0] < p_bubble < pressure[-1]:
+        return [(pressure, values)]
+
+    # A knot within rounding of the bubble point is taken as the bubble point knot
+    at_bubble: np.ndarray = np.isclose(pressure, p_bubble, rtol=1e-9, atol=0)
+    below: np.ndarray = (pressure < p_bubble) & ~at_bubble
+    above: np.ndarray = (pressure > p_bubble) & ~at_bubble
+    if at_bubble.any():
+        saturated_bubble = undersaturated_bubble = values[:, at_bubble][:, :1]
+    else:
+        saturated_bubble = _extrapolate_to_bubble(pressure[below][-2:], values[:, below][:, -2:], p_bubble)
+        undersaturated_bubble = _extrapolate_to_bubble(pressure[above][:2], values[:, above][:, :2], p_bubble)
+        if saturated_bubble is None and undersaturated_bubble is None:
+            raise ValueError(f"The bubble point {p_bubble} is not one of the pressures and no side of it has the two "
+                             f"pressures needed to extrapolate to it")
+        # A side with a single knot has no slope of its own and takes the bubble point values of the other side
+        saturated_bubble = saturated_bubble if saturated_bubble is not None else undersaturated_bubble
+        undersaturated_bubble = undersaturated_bubble if undersaturated_bubble is not None else saturated_bubble
+
+    branches: List[tuple] = [
+        (np.append(pressure[below], p_bubble), np.concatenate([values[:, below], saturated_bubble], axis=1)),
+        (np.insert(pressure[above], 0, p_bubble), np.concatenate([undersaturated_bubble, values[:, above]], axis=1))]
+    return [branch for branch in branches if branch[0].size >= 2]
+
+
+def _extrapolate_to_bubble(pressure: np.ndarray, values: np.ndarray, p_bubble: float) -> Optional[np.ndarray]:
+    # Linear extrapolation to the bubble point from the two knots of a side closest to it, None for a single knot
+    if pressure.size < 2:
+        return None
+    return values[:, :1] + (p_bubble - pressure[0]) * (values[:, 1:] - values[:, :1]) / (pressure[1] - pressure[0])
+
+
+def _pchip_derivatives(pressure: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Fritsch-Carlson derivatives at the knots, which keep the interpolant monotone between monotone data
+    width: np.ndarray = np.diff(pressure)
+    slope: np.ndarray = np.diff(values, axis=1) / width
+    derivative: np.ndarray = np.zeros(values.shape)
+    if pressure.size == 2:
+        derivative[:] = slope
+        return derivative
+
+    # Weighted harmonic mean of the neighbouring slopes at the interior knots, zero at local extrema
+    w1: np.ndarray = 2 * width[1:] + width[:-1]
+    w2: np.ndarray = width[1:] + 2 * width[:-1]
+    same_sign: np.ndarray = np.sign(slope[:, :-1]) * np.sign(slope[:, 1:]) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic: np.ndarray = (w1 + w2) / (w1 / slope[:, :-1] + w2 / slope[:, 1:])
+    derivative[:, 1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    # One-sided three point estimates at the ends, limited to keep the monotonicity
+    derivative[:, 0] = _pchip_end_derivative(width[0], width[1], slope[:, 0], slope[:, 1])
+    derivative[:, -1] = _pchip_end_derivative(width[-1], width[-2], slope[:, -1], slope[:, -2])
+    return derivative
+
+
+def _pchip_end_derivative(h0: float, h1: float, m0: np.ndarray, m1: np.ndarray) -> np.ndarray:
+    derivative: np.ndarray = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    derivative = np.where(np.sign(derivative) != np.sign(m0), 0.0, derivative)
+    return np.where((np.sign(m0) != np.sign(m1)) & (np.abs(derivative) > 3 * np.abs(m0)), 3 * m0, derivative)
@@ -0,0 +1,140 @@
+import sys
+import numpy as np
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Union
+
+
+class PVTResult:
+    """
+    PVT table held as a single preallocated (number of columns, number of points) array, one contiguous row per column
+
+    The columns are zero-copy views of the buffer, and the conversions to pandas and to a record array reuse the buffer
+    instead of copying it, so pandas is only needed when a DataFrame is asked for. The result can be used wherever a
+    dict of columns is expected: it supports indexing by column name, iteration over the names, len and in
+
+    Parameters:
+    ----------
+    values : np.ndarray
+        Buffer of shape (number of columns, number of points)
+    columns : sequence of str
+        Names of the columns, in the order of the rows of the buffer
+
+    Example:
+    --------
+    >>> result = PVTResult.from_columns({'Pressure': [0.0, 1000.0], 'Oil FVF': [1.05, 1.2]}, dtype=np.float32)
+    >>> result['Oil FVF']
+    array([1.05, 1.2 ], dtype=float32)
+    >>> records = result.to_records()
+    >>> float(records[1]['Pressure']), np.shares_memory(records, result.values)
+    (1000.0, True)
+    """
+
+    def __init__(self, values: np.ndarray, columns: Sequence[str]):
+        values = np.ascontiguousarray(values)
+        if values.ndim != 2 or values.shape[0] != len(columns):
+            raise ValueError(f"Expected a buffer of shape ({len(columns)}, number of points), got {values.shape}")
+        self.values: np.ndarray = values
+        self.columns: List[str] = list(columns)
+        self._index: Dict[str, int] = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def empty(cls, columns: Sequence[str], num_points: int, dtype=np.float64) -> "PVTResult":
+        """
+        Allocates an uninitialised result to be filled column by column
+        """
+        return cls(np.empty((len(columns), num_points), dtype=dtype), columns)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], dtype=np.float64) -> "PVTResult":
+        """
+        Copies columns of equal length into a new buffer, each column is written once straight into its row
+        """
+        # A 1-D column, such as a broadcast constant, is reshaped without a copy
+        arrays: List[np.ndarray] = [np.reshape(column, -1) for column in columns.values()]
+        result: PVTResult = cls.empty(list(columns), arrays[0].size if arrays else 0, dtype)
+        for row, array in zip(result.values, arrays):
+            row[:] = array
+        return result
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        # Shape of the table, points by columns as in the DataFrame
+        return self.values.shape[1], self.values.shape[0]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def __len__(self) -> int:
+        return self.values.shape[1]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._index
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._index:
+            raise KeyError(column)
+        return self.values[self._index[column]]
+
+    def __setitem__(self, column: str, value: Union[float, np.ndarray]):
+        # Writes into an existing column, adding a column would need a new buffer
+        if column not in self._index:
+            raise KeyError(column)
+        self.values[self._index[column]] = value
+
+    def __repr__(self):
+        return f"PVTResult({len(self)} points, columns={self.columns!r}, dtype={self.dtype})"
+
+    def keys(self) -> List[str]:
+        return list(self.columns)
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        return zip(self.columns, self.values)
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the columns as a dict of views of the buffer
+        """
+        return dict(self.items())
+
+    def astype(self, dtype) -> "PVTResult":
+        """
+        Returns the result with the given dtype, itself when the dtype already matches
+        """
+        return self if self.values.dtype == dtype else PVTResult(self.values.astype(dtype), self.columns)
+
+    def to_pandas(self, copy: bool = False):
+        """
+        Returns the table as a DataFrame. pandas stores the columns of one dtype as a single (columns, points) block,
+        which is the layout of the buffer, so the DataFrame is built around the buffer without copying it unless copy
+        is set
+        """
+        import pandas as pd
+        return pd.DataFrame(self.values.T, columns=self.columns, copy=copy)
+
+    def to_records(self) -> np.recarray:
+        """
+        Returns the table as a record array with one field per column, which views the buffer without copying it. The
+        fields of a record are a whole column apart, so the records are strided rather than packed
+        """
+        num_points: int = len(self)
+        itemsize: int = self.values.itemsize
+        record: np.dtype = np.dtype({'names': self.columns, 'formats': [self.values.dtype] * len(self.columns),
+                                     'offsets': [row * num_points * itemsize for row in range(len(self.columns))],
+                                     'itemsize': max(len(self.columns) - 1, 0) * num_points * itemsize + itemsize})
+        records: np.ndarray = np.ndarray((num_points,), dtype=record, buffer=self.values, strides=(itemsize,))
+        return records.view(np.recarray)
+
+
+def is_dataframe(obj: Any) -> bool:
+    """
+    Checks for a pandas DataFrame without importing pandas, an object cannot be a DataFrame unless pandas is loaded
+    """
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(obj, pandas.DataFrame)
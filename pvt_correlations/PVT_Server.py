@@ -0,0 +1,501 @@
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import Property_Graph as Prop_Graph
+from . import Registry
+
+# Longest time in seconds a request waits for others to join its batch, and the largest batch
+DEFAULT_WINDOW: float = 0.002
+DEFAULT_MAX_BATCH: int = 4096
+
+# Properties returned when a request does not name any
+DEFAULT_PROPERTIES: Tuple[str, ...] = ('gas_comp_factor', 'oil_fvf', 'oil_visc')
+
+# Properties a request can ask for
+PROPERTIES: List[str] = [prop for prop in {**Prop_Graph.COLUMNS, **Prop_Graph.DERIVATIVE_COLUMNS}.values()
+                         if prop != 'pressure']
+
+# Graphs and the inputs they need, by (properties, correlations) of a group of requests
+_graphs: Dict[Tuple, Tuple[Prop_Graph.PropertyGraph, Tuple[str, ...]]] = {}
+
+
+class ServerStats:
+    """
+    Request, batch and latency statistics of a server, the latency of a request runs from its arrival to its result
+    """
+
+    def __init__(self):
+        self.requests: int = 0
+        self.errors: int = 0
+        self.batches: int = 0
+        self.max_batch_size: int = 0
+        self.evaluation_time: float = 0.0
+        self.latencies: List[float] = []
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+    def record_batch(self, size: int, errors: int, evaluation_time: float, latencies: Sequence[float]):
+        """
+        Adds an evaluated batch of size requests with its evaluation time and the latency of every request
+        """
+        self.requests += size
+        self.errors += errors
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.evaluation_time += evaluation_time
+        self.latencies.extend(latencies)
+        self.end_time = time.perf_counter()
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the statistics as plain values, throughput in requests per second and latencies in milliseconds
+        """
+        wall_time: float = (self.end_time - self.start_time) if self.start_time and self.end_time else 0.0
+        latencies: np.ndarray = np.asarray(self.latencies) * 1e3
+        percentiles: List[float] = np.percentile(latencies, [50, 90, 99]).tolist() if latencies.size else [0.0] * 3
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'wall_time': wall_time,
+            'requests_per_second': self.requests / wall_time if wall_time > 0 else float('nan'),
+            'evaluation_time': self.evaluation_time,
+            'evaluated_requests_per_second': (self.requests / self.evaluation_time if self.evaluation_time > 0
+                                              else float('nan')),
+            'latency_ms': {'p50': percentiles[0], 'p90': percentiles[1], 'p99': percentiles[2],
+                           'max': float(latencies.max()) if latencies.size else 0.0}
+        }
+
+
+class MicroBatcher:
+    """
+    Gathers requests arriving within a latency window into one batch, evaluated with the vectorized correlations
+
+    A batch is evaluated once window seconds have passed since its first request arrived, or as soon as it holds
+    max_batch requests. With a window of zero the requests that arrived while the previous batch was evaluated form
+    the next batch
+
+    Parameters:
+    ----------
+    window : float, optional
+        Latency window in seconds
+    max_batch : int, optional
+        Largest number of requests in a batch
+    stats : ServerStats, optional
+        Statistics to add to, a new object by default
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH,
+                 stats: Optional[ServerStats] = None):
+        self.window: float = window
+        self.max_batch: int = max_batch
+        self.stats: ServerStats = stats if stats is not None else ServerStats()
+        self._pending: List[Tuple[Dict, asyncio.Future, float]] = []
+        self._arrived: asyncio.Event = asyncio.Event()
+        self._full: asyncio.Event = asyncio.Event()
+
+    def submit(self, request: Dict) -> asyncio.Future:
+        """
+        Queues a request and returns the future of its response
+        """
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        arrival: float = time.perf_counter()
+        if self.stats.start_time is None:
+            self.stats.start_time = arrival
+        self._pending.append((request, future, arrival))
+        self._arrived.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def run(self):
+        """
+        Evaluates the queued requests batch by batch, until cancelled
+        """
+        while True:
+            await self._arrived.wait()
+            if self.window > 0 and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch: List[Tuple[Dict, asyncio.Future, float]] = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            if not self._pending:
+                self._arrived.clear()
+            if len(self._pending) < self.max_batch:
+                self._full.clear()
+            self._evaluate(batch)
+
+            # Let the readers queue the requests that arrived during the evaluation
+            await asyncio.sleep(0)
+
+    def _evaluate(self, batch: List[Tuple[Dict, asyncio.Future, float]]):
+        start: float = time.perf_counter()
+        requests: List[Dict] = [request for request, _, _ in batch]
+        try:
+            responses: List[Dict] = evaluate_requests(requests)
+        except Exception as error:
+            # An unexpected failure answers the batch with errors, the batcher keeps serving the following requests
+            responses = [_error(request, f"Evaluation failed: {error!r}") for request in requests]
+        end: float = time.perf_counter()
+        for (_, future, _), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+        self.stats.record_batch(len(batch), sum('error' in response for response in responses), end - start,
+                                [end - arrival for _, _, arrival in batch])
+
+
+def evaluate_requests(requests: Sequence[Dict]) -> List[Dict]:
+    """
+    Evaluates single point requests together, one vectorized pass of the property graph per group of requests asking
+    for the same properties with the same correlations
+
+    Every request holds the inputs (pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep) the requested properties
+    need, and optionally an id returned with the response, the properties to calculate (gas_comp_factor, oil_fvf and
+    oil_visc by default) and the correlations to use for them
+
+    Returns:
+    -------
+    list of dict
+        Response of every request in the order of the requests, with its id and the value of every requested property,
+        or its id and an error. Values that are not finite are returned as None
+
+    Example:
+    --------
+    >>> z_factor = {'pressure': 2000, 'temp': 620, 'sg_gas': 0.7, 'properties': ['gas_comp_factor']}
+    >>> evaluate_requests([{'id': 1, **z_factor}, {'id': 2, 'pressure': 1000}])
+    [{'id': 1, 'gas_comp_factor': 0.8215...}, {'id': 2, 'error': 'Missing temp, oil_api, sg_gas, p_bubble, p_sep, ...'}]
+    """
+    responses: List[Optional[Dict]] = [None] * len(requests)
+    groups: Dict[Tuple, List[int]] = {}
+    for index, request in enumerate(requests):
+        try:
+            key: Tuple = _group_key(request)
+        except (TypeError, ValueError, AttributeError) as error:
+            responses[index] = _error(request, str(error))
+            continue
+        groups.setdefault(key, []).append(index)
+
+    for key, indices in groups.items():
+        try:
+            graph, inputs = _graph(key)
+        except ValueError as error:
+            for index in indices:
+                responses[index] = _error(requests[index], str(error))
+            continue
+
+        # Requests without every input the group needs, or with inputs that are not finite numbers a float can hold,
+        # such as booleans, NaN or integers beyond the range of a float, are answered with an error
+        valid: List[int] = []
+        rows: List[List[float]] = []
+        for index in indices:
+            missing: List[str] = [name for name in inputs if name not in requests[index]]
+            if missing:
+                responses[index] = _error(requests[index], f"Missing {', '.join(missing)}")
+                continue
+            if not all(isinstance(requests[index][name], (int, float)) and not isinstance(requests[index][name], bool)
+                       for name in inputs):
+                responses[index] = _error(requests[index], "Inputs must be numbers")
+                continue
+            try:
+                row: List[float] = [float(requests[index][name]) for name in inputs]
+            except OverflowError:
+                responses[index] = _error(requests[index], "Inputs must be within the range of a float")
+                continue
+            if not all(math.isfinite(value) for value in row):
+                responses[index] = _error(requests[index], "Inputs must be finite")
+                continue
+            valid.append(index)
+            rows.append(row)
+        if not valid:
+            continue
+
+        properties: Tuple[str, ...] = key[0]
+        try:
+            values: Dict[str, np.ndarray] = dict(zip(inputs, np.array(rows, dtype=float).reshape(len(valid), -1).T))
+            with np.errstate(all='ignore'):
+                results: Dict[str, np.ndarray] = graph.evaluate(values, properties)
+            columns: List[List[float]] = [np.broadcast_to(results[prop], (len(valid),)).tolist()
+                                          for prop in properties]
+        except Exception as error:
+            # A group that fails to evaluate is answered with errors, the other groups of the batch are still answered
+            for index in valid:
+                responses[index] = _error(requests[index], f"Evaluation failed: {error!r}")
+            continue
+        for row, index in enumerate(valid):
+            response: Dict = {'id': requests[index].get('id')}
+            for prop, column in zip(properties, columns):
+                value: float = column[row]
+                response[prop] = value if math.isfinite(value) else None
+            responses[index] = response
+    return responses
+
+
+def evaluate_per_request(requests: Sequence[Dict]) -> List[Dict]:
+    """
+    Evaluates every request on its own with the scalar correlations of the registry, the way the requests were
+    answered before batching. Only the properties with a choice of correlation are supported
+    """
+    responses: List[Dict] = []
+    for request in requests:
+        response: Dict = {'id': request.get('id')}
+        correlations: Dict[str, str] = request.get('correlations') or {}
+        try:
+            for prop in request.get('properties') or DEFAULT_PROPERTIES:
+                value = float(Registry.get_correlation(prop, correlations.get(prop))(**request))
+                response[prop] = value if math.isfinite(value) else None
+        except (TypeError, ValueError) as error:
+            response = _error(request, str(error))
+        responses.append(response)
+    return responses
+
+
+def _group_key(request: Dict) -> Tuple:
+    # Requests with the same properties and correlations are evaluated together
+    properties: Tuple[str, ...] = tuple(request.get('properties') or DEFAULT_PROPERTIES)
+    unknown: List[str] = [prop for prop in properties if prop not in PROPERTIES]
+    if unknown:
+        raise ValueError(f"Unknown properties {', '.join(map(str, unknown))}")
+    correlations: Dict[str, str] = request.get('correlations') or {}
+    key: Tuple = (properties, tuple(sorted(correlations.items())))
+    hash(key)
+    return key
+
+
+def _graph(key: Tuple) -> Tuple[Prop_Graph.PropertyGraph, Tuple[str, ...]]:
+    # Property graph of a group and the inputs its properties depend on, built once per group key
+    cached: Optional[Tuple[Prop_Graph.PropertyGraph, Tuple[str, ...]]] = _graphs.get(key)
+    if cached is None:
+        graph: Prop_Graph.PropertyGraph = Prop_Graph.PropertyGraph(dict(key[1]))
+        needed: set = {name for prop in graph.dependencies(key[0]) for name in graph.nodes[prop].inputs}
+        cached = graph, tuple(name for name in Prop_Graph.INPUTS if name in needed)
+        _graphs[key] = cached
+    return cached
+
+
+def _error(request, message: str) -> Dict:
+    return {'id': request.get('id') if isinstance(request, dict) else None, 'error': message}
+
+
+async def _read_line(reader: asyncio.StreamReader) -> Tuple[Optional[bytes], bool]:
+    # Next line of a stream, None at its end, and whether the line was longer than the limit of the reader. A line
+    # over the limit is read and dropped in parts, so the stream carries on at the next line
+    too_long: bool = False
+    while True:
+        try:
+            line: bytes = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            line = error.partial
+            if not line and not too_long:
+                return None, False
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+            too_long = True
+            continue
+        return line, too_long
+
+
+def _parse(line: bytes) -> Tuple[Optional[Dict], Optional[str]]:
+    # Request of a line, or the reason the line is not a request
+    try:
+        request = json.loads(line)
+    except (ValueError, RecursionError) as error:
+        # Nesting deeper than the parser can recurse is not a request either
+        return None, f"Invalid JSON: {error}"
+    return (request, None) if isinstance(request, dict) else (None, "A request must be a JSON object")
+
+
+async def serve_stream(reader: asyncio.StreamReader, write, batcher: MicroBatcher, flush=None):
+    """
+    Answers the newline delimited JSON requests read from a stream, writing one response line per request in the
+    order of the requests. A {"command": "stats"} request is answered with the statistics of the server at the time
+    the responses before it have been written
+
+    Parameters:
+    ----------
+    reader : asyncio.StreamReader
+        Stream of requests
+    write : callable
+        Function writing the bytes of a response line
+    batcher : MicroBatcher
+        Batcher evaluating the requests
+    flush : callable, optional
+        Function called whenever every response received so far has been written
+    """
+    responses: asyncio.Queue = asyncio.Queue()
+
+    async def write_responses():
+        while True:
+            item = await responses.get()
+            if item is None:
+                break
+            response: Dict = batcher.stats.to_dict() if item == 'stats' else await item
+            write((json.dumps(response) + "\n").encode())
+            if flush is not None and responses.empty():
+                await flush()
+
+    writer_task: asyncio.Task = asyncio.create_task(write_responses())
+    try:
+        while True:
+            line, too_long = await _read_line(reader)
+            if line is None:
+                break
+            if too_long:
+                future: asyncio.Future = asyncio.get_running_loop().create_future()
+                future.set_result(_error(None, "Request line is longer than the limit of the stream"))
+                responses.put_nowait(future)
+                continue
+            if not line.strip():
+                continue
+            request, message = _parse(line)
+            if message is not None:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(_error(None, message))
+                responses.put_nowait(future)
+            elif request.get('command') == 'stats':
+                responses.put_nowait('stats')
+            else:
+                responses.put_nowait(batcher.submit(request))
+    finally:
+        responses.put_nowait(None)
+        await writer_task
+
+
+async def serve_stdio(window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH) -> ServerStats:
+    """
+    Serves the requests read from stdin until it is closed, writing the responses to stdout
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    reader: asyncio.StreamReader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError):
+        # Regular files cannot be watched by the event loop, they are read in a thread instead
+        async def feed():
+            while True:
+                data: bytes = await loop.run_in_executor(None, sys.stdin.buffer.read, 1 << 16)
+                if not data:
+                    reader.feed_eof()
+                    return
+                reader.feed_data(data)
+
+        asyncio.create_task(feed())
+
+    async def flush():
+        sys.stdout.buffer.flush()
+
+    batcher: MicroBatcher = MicroBatcher(window, max_batch)
+    batching: asyncio.Task = asyncio.create_task(batcher.run())
+    try:
+        await serve_stream(reader, sys.stdout.buffer.write, batcher, flush)
+    finally:
+        batching.cancel()
+        sys.stdout.buffer.flush()
+    return batcher.stats
+
+
+async def serve_socket(host: str = "127.0.0.1", port: int = 8765, window: float = DEFAULT_WINDOW,
+                       max_batch: int = DEFAULT_MAX_BATCH):
+    """
+    Serves the requests of every client connecting to a TCP socket, the requests of all the clients share the
+    batches
+    """
+    batcher: MicroBatcher = MicroBatcher(window, max_batch)
+    batching: asyncio.Task = asyncio.create_task(batcher.run())
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await serve_stream(reader, writer.write, batcher, writer.drain)
+        finally:
+            writer.close()
+
+    server: asyncio.AbstractServer = await asyncio.start_server(handle, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batching.cancel()
+
+
+def benchmark(num_requests: int = 20000, clients: int = 256, window: float = DEFAULT_WINDOW,
+              max_batch: int = DEFAULT_MAX_BATCH, seed: int = 0) -> Dict:
+    """
+    Compares the micro-batching server with the evaluation of every request on its own, on random single point
+    requests for the default properties sent by clients that each wait for a response before sending the next request
+
+    Returns:
+    -------
+    dict
+        Statistics of the batched run, requests per second of the per-request evaluation, and the largest relative
+        difference between the two
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    requests: List[Dict] = [{'id': i, 'pressure': float(rng.uniform(100, 5000)), 'temp': float(rng.uniform(560, 700)),
+                             'oil_api': float(rng.uniform(20, 45)), 'sg_gas': float(rng.uniform(0.6, 0.9)),
+                             'p_bubble': float(rng.uniform(1000, 4000)), 'p_sep': 114.7, 't_sep': 520.0}
+                            for i in range(num_requests)]
+
+    async def run() -> Tuple[List[Dict], ServerStats]:
+        batcher: MicroBatcher = MicroBatcher(window, max_batch)
+        batching: asyncio.Task = asyncio.create_task(batcher.run())
+        responses: List[Optional[Dict]] = [None] * num_requests
+
+        async def client(indices: range):
+            for index in indices:
+                responses[index] = await batcher.submit(requests[index])
+
+        await asyncio.gather(*[client(range(start, num_requests, clients)) for start in range(clients)])
+        batching.cancel()
+        return responses, batcher.stats
+
+    batched, stats = asyncio.run(run())
+    start: float = time.perf_counter()
+    with np.errstate(all='ignore'):
+        single: List[Dict] = evaluate_per_request(requests)
+    per_request_time: float = time.perf_counter() - start
+
+    difference: float = max(abs(a[prop] / b[prop] - 1) for a, b in zip(batched, single) for prop in DEFAULT_PROPERTIES
+                            if a.get(prop) is not None and b.get(prop))
+    return {'batched': stats.to_dict(), 'per_request_per_second': num_requests / per_request_time,
+            'max_rel_difference': difference}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve single point PVT requests as newline delimited JSON, "
+                                                 "evaluated in micro-batches")
+    parser.add_argument('--host', default="127.0.0.1", help="Host of the socket server")
+    parser.add_argument('--port', type=int, help="Port to serve on, requests are read from stdin when not given")
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW * 1e3,
+                        help="Latency window of a batch in milliseconds")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help="Largest number of requests in a batch")
+    parser.add_argument('--benchmark', type=int, metavar='REQUESTS',
+                        help="Compare batched and per-request evaluation on this many requests instead of serving")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        json.dump(benchmark(args.benchmark, window=args.window / 1e3, max_batch=args.max_batch), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif args.port is not None:
+        try:
+            asyncio.run(serve_socket(args.host, args.port, args.window / 1e3, args.max_batch))
+        except KeyboardInterrupt:
+            pass
+    else:
+        stats: ServerStats = asyncio.run(serve_stdio(args.window / 1e3, args.max_batch))
+        sys.stderr.write(json.dumps(stats.to_dict()) + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
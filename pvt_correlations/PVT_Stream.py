@@ -0,0 +1,182 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+from . import PVT_Table
+from . import Property_Graph as Prop_Graph
+
+# Name of the file describing the columns of a table written in the npy format
+INDEX_FILE: str = "index.json"
+
+DEFAULT_CHUNK_SIZE: int = 1 << 20
+
+
+def pressure_chunks(pressure_max: float, num_points: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Yields np.linspace(0, pressure_max, num_points) in consecutive pieces of at most chunk_size pressures, with the same
+    values as the full range
+    """
+    step: float = pressure_max / (num_points - 1) if num_points > 1 else 0.0
+    for start in range(0, num_points, chunk_size):
+        stop: int = min(start + chunk_size, num_points)
+        pressure: np.ndarray = np.arange(start, stop, dtype=float) * step + 0.0
+        if stop == num_points and num_points > 1:
+            pressure[-1] = pressure_max
+        yield pressure
+
+
+def pvt_table_chunks(pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float, p_sep: float,
+                     t_sep: float, num_points: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     gas_sol_corr: Optional[str] = "Vasquez Beggs", gas_comp_corr: Optional[str] = "Carnahan Starling",
+                     gas_visc_corr: Optional[str] = "Lee Gonzalez Eakin", oil_fvf_corr: Optional[str] = "Vasquez Beggs",
+                     oil_visc_corr: Optional[str] = "Beggs Robinson",
+                     columns: Optional[List[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Generates the PVT table in chunks of at most chunk_size pressures, so only one chunk is held in memory at a time
+
+    The arguments are the ones of pvt_table, and the chunks put together hold the same values as the columnar
+    pvt_table
+
+    Yields:
+    -------
+    dict
+        Columns of the table for the next chunk of pressures
+
+    Example:
+    --------
+    >>> [len(chunk['Pressure']) for chunk in pvt_table_chunks(3000, 1700, 620, 35, 0.68, 120, 520, 301, chunk_size=128)]
+    [128, 128, 45]
+    """
+    for pressure in pressure_chunks(pressure_max, num_points, chunk_size):
+        yield PVT_Table._pvt_columns(pressure, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, gas_sol_corr,
+                                     gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr, columns)
+
+
+def write_pvt_table(path: str, pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float,
+                    p_sep: float, t_sep: float, num_points: int, file_format: str = "npy",
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> str:
+    """
+    Generates the PVT table chunk by chunk and appends every chunk straight to disk
+
+    Parameters:
+    ----------
+    path : str
+        Directory of the table for the npy format, file of the table for the csv and parquet formats
+    pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, num_points
+        Conditions of the table, as in pvt_table
+    file_format : str, optional
+        'npy' for one memory-mappable .npy file per column, 'csv', or 'parquet' when pyarrow is installed
+    chunk_size : int, optional
+        Number of pressures calculated and written at a time, which bounds the memory used
+    **kwargs
+        Correlations and columns, as in pvt_table_chunks
+
+    Returns:
+    -------
+    str
+        Path the table was written to
+    """
+    chunks: Iterator[Dict[str, np.ndarray]] = pvt_table_chunks(pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep,
+                                                               t_sep, num_points, chunk_size, **kwargs)
+    if file_format == "npy":
+        _write_npy(path, chunks, num_points)
+    elif file_format == "csv":
+        _write_csv(path, chunks)
+    elif file_format == "parquet":
+        _write_parquet(path, chunks)
+    else:
+        raise ValueError(f"Unknown file format {file_format!r}, choose from npy, csv and parquet")
+    return path
+
+
+def write_columns(path: str, columns: Dict[str, np.ndarray]):
+    """
+    Writes columns that are already in memory to a directory in the npy format read by read_pvt_table
+    """
+    _write_npy(path, iter([columns]), len(next(iter(columns.values()))))
+
+
+def read_pvt_table(path: str, mmap: bool = True):
+    """
+    Reads a table written by write_pvt_table
+
+    Parameters:
+    ----------
+    path : str
+        Directory or file the table was written to
+    mmap : bool, optional
+        Memory-map the columns of an npy table instead of reading them into memory
+
+    Returns:
+    -------
+    dict of np.ndarray or pd.DataFrame
+        Read-only memory-mapped columns for the npy format, a DataFrame for the csv and parquet formats
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, INDEX_FILE)) as index_file:
+            index: Dict = json.load(index_file)
+        return {column: np.load(os.path.join(path, file_name), mmap_mode='r' if mmap else None)
+                for column, file_name in index['files'].items()}
+
+    import pandas as pd
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    # The values are written with 17 significant digits, which only read back exactly with the round trip parser
+    return pd.read_csv(path, float_precision='round_trip')
+
+
+def _column_file(column: str) -> str:
+    return column.replace(' ', '_') + ".npy"
+
+
+def _write_npy(path: str, chunks: Iterator[Dict[str, np.ndarray]], num_points: int):
+    # One .npy file per column, created at full size and filled through memory maps one chunk at a time
+    os.makedirs(path, exist_ok=True)
+    # The index of an earlier table goes first, so a rewrite that stops half way does not read as complete
+    index_path: str = os.path.join(path, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    files: Dict[str, np.memmap] = {}
+    row: int = 0
+    for chunk in chunks:
+        if not files:
+            files = {column: np.lib.format.open_memmap(os.path.join(path, _column_file(column)), mode='w+',
+                                                       dtype=float, shape=(num_points,)) for column in chunk}
+        size: int = len(chunk['Pressure'])
+        for column, values in chunk.items():
+            files[column][row:row + size] = values
+        row += size
+    for values in files.values():
+        values.flush()
+
+    # The index is written last, so a table without one is incomplete
+    with open(index_path, 'w') as index_file:
+        json.dump({'num_points': num_points, 'files': {column: _column_file(column) for column in files}}, index_file)
+
+
+def _write_csv(path: str, chunks: Iterator[Dict[str, np.ndarray]]):
+    with open(path, 'w') as csv_file:
+        for index, chunk in enumerate(chunks):
+            if index == 0:
+                csv_file.write(','.join(chunk) + '\n')
+            np.savetxt(csv_file, np.column_stack(list(chunk.values())), delimiter=',', fmt='%.17g')
+
+
+def _write_parquet(path: str, chunks: Iterator[Dict[str, np.ndarray]]):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Writing parquet files needs pyarrow, install it or use the npy or csv format")
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table({column: np.ascontiguousarray(values) for column, values in chunk.items()})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -1,74 +1,150 @@
 import numpy as np
-import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-import Wrappers
-import Gas_Density as Gas_Den
+from . import Wrappers
+from . import Gas_Density as Gas_Den
+from . import Property_Graph as Prop_Graph
+from . import PVT_Result
+from . import Registry
+
+# Types of result pvt_table can return
+OUTPUTS: List[str] = ['pandas', 'result']
+
+# Grids of pressures pvt_table can calculate the table on
+GRIDS: List[str] = ['uniform', 'adaptive']
 
 
 def pvt_table(pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float, p_sep: float,
               t_sep: float, num_points: int, gas_sol_corr: Optional[str] = "Vasquez Beggs",
               gas_comp_corr: Optional[str] = "Carnahan Starling", gas_visc_corr: Optional[str] = "Lee Gonzalez Eakin",
               oil_fvf_corr: Optional[str] = "Vasquez Beggs",
-              oil_visc_corr: Optional[str] = "Beggs Robinson", **kwargs) -> pd.DataFrame:
-    gas_sol_correlations: Dict = {
-        "Standing": Wrappers.standings_gas_solubility_wrapper,
-        "Vasquez Beggs": Wrappers.vasquez_beggs_gas_solubility_wrapper
-    }
+              oil_visc_corr: Optional[str] = "Beggs Robinson", columnar: Optional[bool] = True,
+              columns: Optional[List[str]] = None, derivatives: Optional[bool] = False,
+              output: Optional[str] = "pandas", dtype=np.float64, cache=None, grid: Optional[str] = "uniform",
+              tolerance: Optional[float] = None, **kwargs):
+    # The result is a DataFrame by default, or the PVTResult buffer the DataFrame is built around, which needs no pandas
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output {output!r}, choose from {', '.join(OUTPUTS)}")
 
-    gas_comp_correlations: Dict = {
-        "Carnahan Starling": Wrappers.carnahan_starling_hs_eos_wrapper
-    }
+    # The pressures are uniform by default. The adaptive grid has the bubble point as a node and is refined until
+    # linear interpolation of the table is within the tolerance, with num_points as its largest number of points
+    if grid not in GRIDS:
+        raise ValueError(f"Unknown grid {grid!r}, choose from {', '.join(GRIDS)}")
 
-    gas_visc_correlations: Dict = {
-        "Lee Gonzalez Eakin": Wrappers.lee_gonzalez_eakin_wrapper
-    }
+    # A PVTCache, or the directory of one, returns a table calculated before with the same inputs instead of
+    # calculating it again. The code of the correlations is part of the key, so a correlation registered again under
+    # the same name does not get the tables of the one it replaced
+    if cache is not None:
+        from . import PVT_Cache
+        cache = PVT_Cache.get_cache(cache)
+        correlations: Dict[str, Optional[str]] = {'gas_sol': gas_sol_corr, 'gas_comp_factor': gas_comp_corr,
+                                                  'gas_visc': gas_visc_corr, 'oil_fvf': oil_fvf_corr,
+                                                  'oil_visc': oil_visc_corr}
+        key: str = PVT_Cache.table_key(
+            pressure_max=pressure_max, p_bubble=p_bubble, temp=temp, oil_api=oil_api, sg_gas=sg_gas, p_sep=p_sep,
+            t_sep=t_sep, num_points=num_points, gas_sol_corr=gas_sol_corr, gas_comp_corr=gas_comp_corr,
+            gas_visc_corr=gas_visc_corr, oil_fvf_corr=oil_fvf_corr, oil_visc_corr=oil_visc_corr, columnar=columnar,
+            columns=columns, derivatives=derivatives, dtype=np.dtype(dtype).str, grid=grid, tolerance=tolerance,
+            correlation_code=[Registry.get_correlation(prop, name).fingerprint for prop, name in correlations.items()])
+        result: Optional[PVT_Result.PVTResult] = cache.get(key)
+        if result is None:
+            result = _pvt_result(pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, num_points, gas_sol_corr,
+                                 gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr, columnar, columns,
+                                 derivatives, dtype, grid, tolerance)
+            cache.put(key, result)
+    else:
+        result = _pvt_result(pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, num_points, gas_sol_corr,
+                             gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr, columnar, columns, derivatives,
+                             dtype, grid, tolerance)
+        return result.to_pandas() if output == "pandas" else result
+    # A cached result maps the read-only entry shared with the later hits, so its DataFrame gets a copy the caller
+    # can change
+    return result.to_pandas(copy=True) if output == "pandas" else result
 
-    oil_fvf_correlations: Dict = {
-        "Standing": Wrappers.standings_oil_fvf_wrapper,
-        "Vasquez Beggs": Wrappers.vasquez_beggs_oil_fvf_wrapper
-    }
-
-    oil_visc_correlations: Dict = {
-        "Beggs Robinson": Wrappers.beggs_robinson_wrapper
-    }
 
+def _pvt_result(pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float, p_sep: float,
+                t_sep: float, num_points: int, gas_sol_corr: str, gas_comp_corr: str, gas_visc_corr: str,
+                oil_fvf_corr: str, oil_visc_corr: str, columnar: bool, columns: Optional[List[str]],
+                derivatives: bool, dtype, grid: str = "uniform",
+                tolerance: Optional[float] = None) -> PVT_Result.PVTResult:
     # Create a range of pressures to calculate parameters at
-    p_range: np.ndarray = np.linspace(0, pressure_max, num_points)
+    if grid == "adaptive":
+        from . import Pressure_Grid
+        p_range: np.ndarray = Pressure_Grid.adaptive_pressures(
+            pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep,
+            tolerance if tolerance is not None else Pressure_Grid.DEFAULT_TOLERANCE, num_points,
+            gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr, compare_uniform=False)[0]
+    else:
+        p_range = np.linspace(0, pressure_max, num_points)
+
+    # Compute every column as a single array operation over the pressure range
+    if columnar:
+        return _pvt_table_columnar(p_range, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, gas_sol_corr, gas_comp_corr,
+                                   gas_visc_corr, oil_fvf_corr, oil_visc_corr, columns, derivatives, dtype)
+
+    # The derivatives are calculated from the intermediates of the columnar evaluation
+    if derivatives or (columns is not None and any(col in Prop_Graph.DERIVATIVE_COLUMNS for col in columns)):
+        raise ValueError("Derivative columns are only available in the columnar table")
+
+    import pandas as pd
+
+    # Correlations from the registry, with the conditions of the table bound once so every row only passes the
+    # values that change from row to row
+    conditions: Dict[str, float] = {'temp': temp, 'oil_api': oil_api, 'sg_gas': sg_gas, 'p_bubble': p_bubble,
+                                    'p_sep': p_sep, 't_sep': t_sep}
+    rs_corr = Registry.get_correlation('gas_sol', gas_sol_corr).bind('pressure', **conditions)
+    z_corr = Registry.get_correlation('gas_comp_factor', gas_comp_corr).bind('pressure', **conditions)
+    mu_g_corr = Registry.get_correlation('gas_visc', gas_visc_corr).bind('pressure', 'gas_comp_factor', **conditions)
+    bo_corr = Registry.get_correlation('oil_fvf', oil_fvf_corr).bind('pressure', 'gas_sol', **conditions)
+    mu_o_corr = Registry.get_correlation('oil_visc', oil_visc_corr).bind('pressure', 'gas_sol', **conditions)
 
     # Create an empty table with just the pressures
     pvt_tab: pd.DataFrame = pd.DataFrame(p_range, columns=['Pressure'])
 
-    # Get all the required correlations
-    rs_corr = gas_sol_correlations.get(gas_sol_corr)
-    z_corr = gas_comp_correlations.get(gas_comp_corr)
-    mu_g_corr = gas_visc_correlations.get(gas_visc_corr)
-    bo_corr = oil_fvf_correlations.get(oil_fvf_corr)
-    mu_o_corr = oil_visc_correlations.get(oil_visc_corr)
-
     # Add all the fluid properties
-    pvt_tab['Gas Solubility'] = pvt_tab['Pressure'].apply(
-        lambda p: rs_corr(pressure=p, temp=temp, oil_api=oil_api, sg_gas=sg_gas, p_bubble=p_bubble, p_sep=p_sep,
-                          t_sep=t_sep))
-    pvt_tab['Gas Compressibility Factor'] = pvt_tab['Pressure'].apply(
-        lambda p: z_corr(pressure=p, temp=temp, sg_gas=sg_gas))
+    pvt_tab['Gas Solubility'] = pvt_tab['Pressure'].apply(rs_corr)
+    pvt_tab['Gas Compressibility Factor'] = pvt_tab['Pressure'].apply(z_corr)
     pvt_tab['Gas Density'] = pvt_tab['Pressure'].apply(
         lambda p: Gas_Den.gas_density(pressure=p, temp=temp, sg_gas=sg_gas))
     pvt_tab['Gas FVF'] = pvt_tab.apply(
         lambda row: Wrappers.gas_formation_volume_factor_wrapper(pressure=row['Pressure'], temp=temp, sg_gas=sg_gas,
                                                                  gas_comp_factor=row['Gas Compressibility Factor']),
         axis=1)
-    pvt_tab['Gas Viscosity'] = pvt_tab.apply(lambda row: mu_g_corr(pressure=row['Pressure'], temp=temp, sg_gas=sg_gas,
-                                                                   gas_comp_factor=row['Gas Compressibility Factor']),
+    pvt_tab['Gas Viscosity'] = pvt_tab.apply(lambda row: mu_g_corr(row['Pressure'], row['Gas Compressibility Factor']),
                                              axis=1)
-    pvt_tab['Oil FVF'] = pvt_tab['Pressure'].apply(
-        lambda p: bo_corr(pressure=p, temp=temp, oil_api=oil_api, sg_gas=sg_gas, p_bubble=p_bubble, p_sep=p_sep,
-                          t_sep=t_sep))
-    pvt_tab['Oil Viscosity'] = pvt_tab.apply(
-        lambda row: mu_o_corr(pressure=row['Pressure'], temp=temp, oil_api=oil_api, sg_gas=sg_gas, p_bubble=p_bubble,
-                              gas_sol=row['Gas Solubility']), axis=1)
+    pvt_tab['Oil FVF'] = pvt_tab.apply(lambda row: bo_corr(row['Pressure'], row['Gas Solubility']), axis=1)
+    pvt_tab['Oil Viscosity'] = pvt_tab.apply(lambda row: mu_o_corr(row['Pressure'], row['Gas Solubility']), axis=1)
     pvt_tab['Oil Density'] = pvt_tab.apply(
         lambda row: Wrappers.oil_density_wrapper(pressure=row['Pressure'], temp=temp, oil_api=oil_api, sg_gas=sg_gas,
                                                  p_bubble=p_bubble, gas_sol=row['Gas Solubility'],
                                                  oil_fvf=row['Oil FVF']), axis=1)
-    return pvt_tab
+
+    # Keep only the requested columns
+    if columns is not None:
+        pvt_tab = pvt_tab[['Pressure'] + [col for col in pvt_tab.columns if col in columns and col != 'Pressure']]
+    return PVT_Result.PVTResult.from_columns({col: pvt_tab[col].to_numpy() for col in pvt_tab.columns}, dtype)
+
+
+def _pvt_table_columnar(p_range: np.ndarray, p_bubble: float, temp: float, oil_api: float, sg_gas: float,
+                        p_sep: float, t_sep: float, gas_sol_corr: str, gas_comp_corr: str, gas_visc_corr: str,
+                        oil_fvf_corr: str, oil_visc_corr: str, columns: Optional[List[str]] = None,
+                        derivatives: bool = False, dtype=np.float64) -> PVT_Result.PVTResult:
+    table_columns: Dict[str, np.ndarray] = _pvt_columns(p_range, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep,
+                                                        gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr,
+                                                        oil_visc_corr, columns, derivatives)
+
+    # Write every column once into its row of a single preallocated buffer
+    return PVT_Result.PVTResult.from_columns(table_columns, dtype)
+
+
+def _pvt_columns(pressure: np.ndarray, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep, gas_sol_corr: str,
+                 gas_comp_corr: str, gas_visc_corr: str, oil_fvf_corr: str, oil_visc_corr: str,
+                 columns: Optional[List[str]] = None, derivatives: bool = False) -> Dict[str, np.ndarray]:
+    # Calculates the columns of the PVT table through the property graph, so the intermediate results are shared and
+    # only the properties the requested columns need are calculated. The pressures and the fluid properties are
+    # broadcast against each other, so they can be laid out along separate axes of a grid
+    inputs: Dict[str, np.ndarray] = {'pressure': pressure, 'temp': temp, 'oil_api': oil_api, 'sg_gas': sg_gas,
+                                     'p_bubble': p_bubble, 'p_sep': p_sep, 't_sep': t_sep}
+    correlations: Dict[str, str] = {'gas_sol': gas_sol_corr, 'gas_comp_factor': gas_comp_corr,
+                                    'gas_visc': gas_visc_corr, 'oil_fvf': oil_fvf_corr, 'oil_visc': oil_visc_corr}
+    return Prop_Graph.evaluate_columns(inputs, columns, correlations, derivatives)
@@ -0,0 +1,199 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from . import Property_Graph as Prop_Graph
+
+DEFAULT_TOLERANCE: float = 1e-3
+
+# Columns the adaptive grid is refined for by default. Gas FVF is left out: it goes as 1/pressure, so linear
+# interpolation between the first two pressures of a uniform grid is off by 8 % however many points the grid has, and
+# no uniform grid could be compared with
+DEFAULT_COLUMNS: List[str] = ['Gas Solubility', 'Gas Compressibility Factor', 'Gas Density', 'Gas Viscosity',
+                              'Oil FVF', 'Oil Viscosity', 'Oil Density']
+
+# Columns whose value at zero pressure is not the limit of their values above it, undefined or set by convention, so
+# the interval starting at zero pressure is left out of their interpolation error
+ZERO_PRESSURE_UNDEFINED: List[str] = ['Gas Compressibility Factor', 'Gas Density', 'Gas FVF', 'Gas Viscosity']
+
+# Coarse grid the refinement starts from, and the narrowest interval it splits, as a fraction of pressure_max
+INITIAL_POINTS: int = 9
+MIN_STEP: float = 1e-6
+
+# Largest uniform grid tried when looking for the one as accurate as the adaptive grid
+MAX_UNIFORM_POINTS: int = 1 << 20
+
+
+def adaptive_pressures(pressure_max: float, p_bubble: float, temp: float, oil_api: float, sg_gas: float, p_sep: float,
+                       t_sep: float, tolerance: float = DEFAULT_TOLERANCE, max_points: int = 4097,
+                       gas_sol_corr: Optional[str] = "Vasquez Beggs",
+                       gas_comp_corr: Optional[str] = "Carnahan Starling",
+                       gas_visc_corr: Optional[str] = "Lee Gonzalez Eakin",
+                       oil_fvf_corr: Optional[str] = "Vasquez Beggs", oil_visc_corr: Optional[str] = "Beggs Robinson",
+                       columns: Optional[List[str]] = None, compare_uniform: bool = True) -> Tuple[np.ndarray, Dict]:
+    """
+    Builds a grid of pressures from zero to pressure_max on which linear interpolation of the PVT table is within a
+    tolerance
+
+    The grid always has the bubble point as a node, where Bo, Rs and the oil viscosity change slope, so no interval
+    straddles the kink. Starting from a coarse uniform grid, every interval is checked by calculating the table at its
+    midpoint: the difference between the calculated value and the linear interpolation of its ends, relative to the
+    largest magnitude of the column, estimates the interpolation error of the interval. The intervals over the
+    tolerance are split at their midpoint, reusing the values calculated there, until every interval is within the
+    tolerance or the grid has max_points points, the worst intervals being split first. The midpoints of all the
+    intervals checked at once are calculated in one pass of the property graph
+
+    Parameters:
+    ----------
+    pressure_max, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep
+        Conditions of the table, as in pvt_table
+    tolerance : float, optional
+        Largest interpolation error, relative to the largest magnitude of every column
+    max_points : int, optional
+        Largest number of points of the grid, at least 2, or 3 when the bubble point is between zero and pressure_max.
+        Below INITIAL_POINTS the refinement starts from a coarser uniform grid
+    gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr : str, optional
+        Correlations used for each property, as in pvt_table
+    columns : list of str, optional
+        Columns of pvt_table the interpolation error is checked for, DEFAULT_COLUMNS by default
+    compare_uniform : bool, optional
+        Also find the smallest uniform grid with the same largest interpolation error, to report the points saved
+
+    Returns:
+    -------
+    tuple of (np.ndarray, dict)
+        Pressures of the grid, and stats: number of points and of refinement passes, largest interpolation error,
+        pressures where a column jumps, and with compare_uniform the number of points of the uniform grid as accurate
+        and the number saved, None when no uniform grid of up to MAX_UNIFORM_POINTS points is. An interval still over
+        the tolerance once it is MIN_STEP wide holds a jump, it is left out of the largest error and out of the
+        comparison with the uniform grid
+
+    Raises:
+    ------
+    ValueError
+        When max_points is too small to hold zero, the bubble point and pressure_max
+
+    Example:
+    --------
+    >>> pressure, stats = adaptive_pressures(3000, 1700, 620, 35, 0.68, 120, 520, tolerance=1e-3)
+    >>> 1700.0 in pressure, stats['max_error'] <= 1e-3, stats['points'] < stats['uniform_points']
+    (True, True, True)
+    """
+    columns = list(columns) if columns is not None else list(DEFAULT_COLUMNS)
+    inputs: Dict[str, float] = {'temp': temp, 'oil_api': oil_api, 'sg_gas': sg_gas, 'p_bubble': p_bubble,
+                                'p_sep': p_sep, 't_sep': t_sep}
+    correlations: Dict[str, str] = {'gas_sol': gas_sol_corr, 'gas_comp_factor': gas_comp_corr,
+                                    'gas_visc': gas_visc_corr, 'oil_fvf': oil_fvf_corr, 'oil_visc': oil_visc_corr}
+
+    def evaluate(pressure: np.ndarray) -> Dict[str, np.ndarray]:
+        table: Dict[str, np.ndarray] = Prop_Graph.evaluate_columns({'pressure': pressure, **inputs}, columns,
+                                                                   correlations)
+        return {col: np.asarray(table[col], dtype=float) for col in columns}
+
+    # The coarse grid and the bubble point fit in max_points, zero, the bubble point and pressure_max always being nodes
+    bubble_node: bool = 0 < p_bubble < pressure_max
+    if max_points < 2 + bubble_node:
+        nodes: str = "zero, the bubble point and pressure_max" if bubble_node else "zero and pressure_max"
+        raise ValueError(f"max_points of {max_points} cannot hold {nodes}")
+    pressure: np.ndarray = np.linspace(0, pressure_max, min(INITIAL_POINTS, max_points - bubble_node))
+    if bubble_node:
+        pressure = np.union1d(pressure, [float(p_bubble)])
+    values: Dict[str, np.ndarray] = evaluate(pressure)
+    scales: Dict[str, float] = _scales(pressure, values)
+
+    # Interpolation error of every interval, NaN until its midpoint has been calculated
+    errors: np.ndarray = np.full(pressure.size - 1, np.nan)
+    min_step: float = pressure_max * MIN_STEP
+    passes: int = 0
+    while True:
+        unchecked: np.ndarray = np.flatnonzero(np.isnan(errors))
+        midpoints: np.ndarray = 0.5 * (pressure[unchecked] + pressure[unchecked + 1])
+        mid_values: Dict[str, np.ndarray] = evaluate(midpoints) if unchecked.size else {}
+        if unchecked.size:
+            errors[unchecked] = _interval_errors(pressure, values, unchecked, mid_values, scales)
+            passes += 1
+
+        splittable: np.ndarray = np.flatnonzero((errors > tolerance) & (np.diff(pressure) > min_step))
+        budget: int = max_points - pressure.size
+        if splittable.size == 0 or budget <= 0:
+            break
+        if splittable.size > budget:
+            splittable = splittable[np.argsort(errors[splittable])[::-1][:budget]]
+            splittable.sort()
+
+        # The midpoints of the split intervals become nodes with the values calculated there. Every interval over the
+        # tolerance was checked in this pass, as the ones of earlier passes were split then
+        position: np.ndarray = np.searchsorted(unchecked, splittable)
+        pressure = np.insert(pressure, splittable + 1, midpoints[position])
+        values = {col: np.insert(values[col], splittable + 1, mid_values[col][position]) for col in columns}
+        # Both halves of a split interval are checked in the next pass
+        errors = np.insert(errors, splittable + 1, np.nan)
+        errors[splittable + np.arange(splittable.size)] = np.nan
+
+    # Intervals still over the tolerance at the narrowest step hold a jump of a column, which no grid interpolates
+    jumps: np.ndarray = (errors > tolerance) & (np.diff(pressure) <= min_step)
+    discontinuities: List[float] = (0.5 * (pressure[:-1] + pressure[1:]))[jumps].tolist()
+    max_error: float = float(np.max(errors[~jumps])) if (~jumps).any() else 0.0
+    stats: Dict = {'points': int(pressure.size), 'passes': passes, 'max_error': max_error,
+                   'discontinuities': discontinuities}
+    if compare_uniform:
+        uniform_points: Optional[int] = _uniform_points(pressure_max, max(max_error, 1e-300), evaluate,
+                                                        discontinuities)
+        stats['uniform_points'] = uniform_points
+        stats['points_saved'] = uniform_points - pressure.size if uniform_points is not None else None
+    return pressure, stats
+
+
+def _scales(pressure: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, float]:
+    # Largest magnitude of every column above zero pressure, the errors are relative to it
+    above_zero: np.ndarray = pressure > 0
+    scales: Dict[str, float] = {}
+    for col, column in values.items():
+        magnitude: np.ndarray = np.abs(column[above_zero])
+        finite: np.ndarray = magnitude[np.isfinite(magnitude)]
+        scales[col] = float(finite.max()) if finite.size and finite.max() > 0 else 1.0
+    return scales
+
+
+def _interval_errors(pressure: np.ndarray, values: Dict[str, np.ndarray], intervals: np.ndarray,
+                     mid_values: Dict[str, np.ndarray], scales: Dict[str, float]) -> np.ndarray:
+    # Largest relative difference over the columns between the midpoint values and the interpolation of the ends of
+    # the intervals. Columns undefined at an end or at the midpoint do not count for the interval
+    errors: np.ndarray = np.zeros(intervals.size)
+    at_zero: np.ndarray = pressure[intervals] == 0
+    for col, mid in mid_values.items():
+        with np.errstate(invalid='ignore'):
+            error: np.ndarray = np.abs(mid - 0.5 * (values[col][intervals] + values[col][intervals + 1])) / scales[col]
+        error[~np.isfinite(error)] = 0.0
+        if col in ZERO_PRESSURE_UNDEFINED:
+            error[at_zero] = 0.0
+        np.maximum(errors, error, out=errors)
+    return errors
+
+
+def _uniform_points(pressure_max: float, max_error: float, evaluate,
+                    discontinuities: List[float]) -> Optional[int]:
+    # Smallest uniform grid whose intervals are all within max_error, leaving out the intervals holding a jump, found
+    # by doubling the number of intervals and then bisecting, None when no grid up to MAX_UNIFORM_POINTS is
+    def error_of(num_points: int) -> float:
+        pressure: np.ndarray = np.linspace(0, pressure_max, num_points)
+        values: Dict[str, np.ndarray] = evaluate(pressure)
+        intervals: np.ndarray = np.arange(num_points - 1)
+        errors: np.ndarray = _interval_errors(pressure, values, intervals,
+                                              evaluate(0.5 * (pressure[:-1] + pressure[1:])), _scales(pressure, values))
+        errors[np.searchsorted(pressure, discontinuities) - 1] = 0.0
+        return float(np.max(errors))
+
+    low: int = 2
+    high: int = INITIAL_POINTS
+    while error_of(high) > max_error:
+        low = high
+        high = 2 * high - 1
+        if high > MAX_UNIFORM_POINTS:
+            return None
+    while high - low > 1:
+        middle: int = (low + high) // 2
+        if error_of(middle) > max_error:
+            low = middle
+        else:
+            high = middle
+    return high
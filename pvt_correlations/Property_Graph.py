@@ -0,0 +1,325 @@
+import time
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import Backends
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Compressibility_Table as Gas_Comp_Tab
+from . import Gas_Density as Gas_Den
+from . import Gas_Formation_Volume_Factor as Gas_FVF
+from . import Gas_Solubility as Gas_Sol
+from . import Gas_Viscosity as Gas_Visc
+from . import Instrumentation as Instr
+from . import Oil_Formation_Volume_Factor as Oil_FVF
+from . import Oil_Visocsity as Oil_Visc
+
+# Inputs every graph is evaluated from
+INPUTS: Tuple[str, ...] = ('pressure', 'temp', 'oil_api', 'sg_gas', 'p_bubble', 'p_sep', 't_sep')
+
+# Properties calculated with a choice of correlation, and the default choice
+DEFAULT_CORRELATIONS: Dict[str, str] = {
+    'gas_sol': "Vasquez Beggs",
+    'gas_comp_factor': "Carnahan Starling",
+    'gas_visc': "Lee Gonzalez Eakin",
+    'oil_fvf': "Vasquez Beggs",
+    'oil_visc': "Beggs Robinson"
+}
+
+# Columns of the PVT table and the properties they hold
+COLUMNS: Dict[str, str] = {
+    'Pressure': 'pressure',
+    'Gas Solubility': 'gas_sol',
+    'Gas Compressibility Factor': 'gas_comp_factor',
+    'Gas Density': 'gas_density',
+    'Gas FVF': 'gas_fvf',
+    'Gas Viscosity': 'gas_visc',
+    'Oil FVF': 'oil_fvf',
+    'Oil Viscosity': 'oil_visc',
+    'Oil Density': 'oil_density'
+}
+
+# Columns of the derivatives with respect to pressure and of the isothermal compressibilities, in 1/psi
+DERIVATIVE_COLUMNS: Dict[str, str] = {
+    'Gas Solubility Derivative': 'gas_sol_derivative',
+    'Gas Compressibility Factor Derivative': 'gas_comp_factor_derivative',
+    'Gas Compressibility': 'gas_comp',
+    'Gas FVF Derivative': 'gas_fvf_derivative',
+    'Gas Viscosity Derivative': 'gas_visc_derivative',
+    'Oil FVF Derivative': 'oil_fvf_derivative',
+    'Oil Compressibility': 'oil_comp',
+    'Oil Viscosity Derivative': 'oil_visc_derivative'
+}
+
+
+class Node:
+    """
+    Property calculated by a function of other properties, the inputs are passed to the function positionally
+    """
+
+    __slots__ = ('name', 'inputs', 'func')
+
+    def __init__(self, name: str, inputs: Tuple[str, ...], func: Callable):
+        self.name = name
+        self.inputs = inputs
+        self.func = func
+
+    def __repr__(self):
+        return f"Node({self.name!r}, {self.inputs!r})"
+
+
+def _oil_density(sg_oil, sg_gas, gas_sol, oil_fvf):
+    return (62.4 * sg_oil + 0.0136 * gas_sol * sg_gas) / oil_fvf
+
+
+def _gas_compressibility(pressure, gas_comp_factor, gas_comp_factor_derivative):
+    return 1 / pressure - gas_comp_factor_derivative / gas_comp_factor
+
+
+def _oil_compressibility(pressure, p_bubble, oil_fvf, oil_fvf_derivative, gas_fvf, gas_sol_derivative):
+    # Below the bubble point the gas coming out of solution adds to the compressibility, gas FVF in ft3/scf to bbl/scf
+    oil_comp = -oil_fvf_derivative / oil_fvf
+    return np.where(pressure < p_bubble, oil_comp + gas_fvf / 5.615 * gas_sol_derivative / oil_fvf, oil_comp)
+
+
+# Intermediate properties shared by the correlations, calculated the same way whatever the choice of correlations
+NODES: Dict[str, Node] = {node.name: node for node in [
+    Node('sg_oil', ('oil_api',), lambda oil_api: 141.5 / (131.5 + np.asarray(oil_api, dtype=float))),
+    Node('sg_gas_sep', ('sg_gas', 'oil_api', 'p_sep', 't_sep'), Gas_Sol._separator_gas_gravity),
+    Node('gas_sol_vb', ('pressure', 'temp', 'oil_api', 'p_bubble', 'sg_gas_sep'),
+         Gas_Sol._vasquez_beggs_gas_solubility),
+    Node('gas_sol_pb', ('p_bubble', 'temp', 'oil_api', 'p_bubble', 'sg_gas_sep'),
+         Gas_Sol._vasquez_beggs_gas_solubility),
+    Node('oil_fvf_pb', ('temp', 'oil_api', 'sg_gas_sep', 'gas_sol_pb'), Oil_FVF._vasquez_beggs_saturated_oil_fvf),
+    Node('oil_visc_dead', ('temp', 'oil_api'), Oil_Visc._dead_oil_viscosity),
+    Node('gas_density', ('pressure', 'temp', 'sg_gas'), Gas_Den.gas_density),
+    Node('gas_fvf', ('pressure', 'temp', 'sg_gas', 'gas_comp_factor'), Gas_FVF.gas_formation_volume_factor_vectorized),
+    Node('oil_density', ('sg_oil', 'sg_gas', 'gas_sol', 'oil_fvf'), _oil_density),
+    Node('gas_sol_vb_derivative', ('pressure', 'oil_api', 'p_bubble', 'gas_sol_vb'),
+         Gas_Sol._vasquez_beggs_gas_solubility_derivative),
+    Node('gas_comp', ('pressure', 'gas_comp_factor', 'gas_comp_factor_derivative'), _gas_compressibility),
+    Node('gas_fvf_derivative', ('gas_fvf', 'gas_comp'), lambda gas_fvf, gas_comp: -gas_fvf * gas_comp),
+    Node('oil_comp', ('pressure', 'p_bubble', 'oil_fvf', 'oil_fvf_derivative', 'gas_fvf', 'gas_sol_derivative'),
+         _oil_compressibility)
+]}
+
+# Nodes of the properties with a choice of correlation
+CORRELATION_NODES: Dict[str, Dict[str, Node]] = {
+    'gas_sol': {
+        "Standing": Node('gas_sol', ('pressure', 'temp', 'oil_api', 'sg_gas'), Gas_Sol.standings_gas_solubility),
+        "Vasquez Beggs": Node('gas_sol', ('gas_sol_vb',), lambda gas_sol: gas_sol)
+    },
+    'gas_comp_factor': {
+        "Carnahan Starling": Node('gas_comp_factor', ('pressure', 'temp', 'sg_gas'),
+                                  Gas_Comp.carnahan_starling_hs_eos_vectorized),
+        "Carnahan Starling Tabulated": Node('gas_comp_factor', ('pressure', 'temp', 'sg_gas'),
+                                            Gas_Comp_Tab.tabulated_z_factor),
+        "Papay": Node('gas_comp_factor', ('pressure', 'temp', 'sg_gas'), Gas_Comp.papay),
+        "Beggs Brill": Node('gas_comp_factor', ('pressure', 'temp', 'sg_gas'), Gas_Comp.beggs_brill),
+        "Dranchuk Abou Kassem": Node('gas_comp_factor', ('pressure', 'temp', 'sg_gas'), Gas_Comp.dranchuk_abou_kassem)
+    },
+    'gas_visc': {
+        "Lee Gonzalez Eakin": Node('gas_visc', ('pressure', 'temp', 'sg_gas', 'gas_comp_factor'),
+                                   Gas_Visc.lee_gonzalez_eakin_vectorized)
+    },
+    'oil_fvf': {
+        "Standing": Node('oil_fvf', ('gas_sol', 'temp', 'oil_api', 'sg_gas'), Oil_FVF.standings_oil_fvf),
+        "Vasquez Beggs": Node('oil_fvf', ('pressure', 'temp', 'oil_api', 'p_bubble', 'sg_gas_sep', 'gas_sol_vb',
+                                          'gas_sol_pb', 'oil_fvf_pb'), Oil_FVF._vasquez_beggs_oil_fvf)
+    },
+    'oil_visc': {
+        "Beggs Robinson": Node('oil_visc', ('pressure', 'p_bubble', 'oil_visc_dead', 'gas_sol'),
+                               Oil_Visc._beggs_robinson)
+    }
+}
+
+# Derivatives with respect to pressure of the properties with a choice of correlation, calculated from the values of
+# the properties and their intermediates
+_hall_yarborough_derivative: Node = Node('gas_comp_factor_derivative',
+                                         ('pressure', 'temp', 'sg_gas', 'gas_comp_factor'),
+                                         Gas_Comp._hall_yarborough_derivative)
+CORRELATION_DERIVATIVE_NODES: Dict[str, Dict[str, Node]] = {
+    'gas_sol': {
+        "Standing": Node('gas_sol_derivative', ('pressure', 'gas_sol'), Gas_Sol._standings_gas_solubility_derivative),
+        "Vasquez Beggs": Node('gas_sol_derivative', ('gas_sol_vb_derivative',), lambda derivative: derivative)
+    },
+    'gas_comp_factor': {
+        "Carnahan Starling": _hall_yarborough_derivative,
+        "Carnahan Starling Tabulated": _hall_yarborough_derivative,
+        "Papay": Node('gas_comp_factor_derivative', ('pressure', 'temp', 'sg_gas'), Gas_Comp._papay_derivative),
+        "Beggs Brill": Node('gas_comp_factor_derivative', ('pressure', 'temp', 'sg_gas'),
+                            Gas_Comp._beggs_brill_derivative),
+        "Dranchuk Abou Kassem": Node('gas_comp_factor_derivative', ('pressure', 'temp', 'sg_gas', 'gas_comp_factor'),
+                                     Gas_Comp._dranchuk_abou_kassem_derivative)
+    },
+    'gas_visc': {
+        "Lee Gonzalez Eakin": Node('gas_visc_derivative', ('pressure', 'temp', 'sg_gas', 'gas_comp_factor', 'gas_visc',
+                                                           'gas_comp'), Gas_Visc._lee_gonzalez_eakin_derivative)
+    },
+    'oil_fvf': {
+        "Standing": Node('oil_fvf_derivative', ('gas_sol', 'temp', 'oil_api', 'sg_gas', 'gas_sol_derivative'),
+                         Oil_FVF._standings_oil_fvf_derivative),
+        "Vasquez Beggs": Node('oil_fvf_derivative', ('pressure', 'temp', 'oil_api', 'p_bubble', 'sg_gas_sep',
+                                                     'gas_sol_pb', 'oil_fvf', 'gas_sol_vb_derivative'),
+                              Oil_FVF._vasquez_beggs_oil_fvf_derivative)
+    },
+    'oil_visc': {
+        "Beggs Robinson": Node('oil_visc_derivative', ('pressure', 'p_bubble', 'oil_visc_dead', 'gas_sol', 'oil_visc',
+                                                       'gas_sol_derivative'), Oil_Visc._beggs_robinson_derivative)
+    }
+}
+
+
+class PropertyGraph:
+    """
+    Graph of the fluid properties for one choice of correlations, evaluated lazily so every property is calculated
+    at most once and only when a requested output depends on it
+
+    Parameters:
+    ----------
+    correlations : dict, optional
+        Correlation to use for each of gas_sol, gas_comp_factor, gas_visc, oil_fvf and oil_visc, properties left out
+        use the defaults
+    backend : str, optional
+        Backend whose kernels replace the numpy nodes they cover, the one set in Backends by default
+
+    Example:
+    --------
+    >>> graph = PropertyGraph({'gas_sol': "Standing"})
+    >>> values = graph.evaluate({'pressure': np.array([1000.0]), 'temp': 600, 'oil_api': 35, 'sg_gas': 0.7, 'p_bubble': 1500, 'p_sep': 114.7, 't_sep': 520}, ['gas_sol'])
+    >>> values['gas_sol']
+    array([213.24171295])
+    """
+
+    def __init__(self, correlations: Optional[Dict[str, str]] = None, backend: Optional[str] = None):
+        self.correlations: Dict[str, str] = dict(DEFAULT_CORRELATIONS)
+        self.correlations.update({prop: corr for prop, corr in (correlations or {}).items() if corr is not None})
+
+        self.nodes: Dict[str, Node] = dict(NODES)
+        kernels: Dict[Tuple[str, str], Callable] = Backends.get_backend(backend).kernels
+        for prop, corr in self.correlations.items():
+            variants: Dict[str, Node] = CORRELATION_NODES.get(prop, {})
+            if corr not in variants:
+                raise ValueError(f"Unknown correlation {corr!r} for {prop}, choose from {', '.join(variants)}")
+            self.nodes[prop] = variants[corr]
+            kernel: Optional[Callable] = kernels.get((prop, corr))
+            if kernel is not None:
+                self.nodes[prop] = Node(prop, variants[corr].inputs, kernel)
+            derivative: Optional[Node] = CORRELATION_DERIVATIVE_NODES.get(prop, {}).get(corr)
+            if derivative is not None:
+                self.nodes[derivative.name] = derivative
+
+    def dependencies(self, outputs: Iterable[str]) -> List[str]:
+        """
+        Returns the properties needed to calculate the outputs, in an order they can be calculated in
+        """
+        order: List[str] = []
+        seen: set = set(INPUTS)
+
+        def visit(name: str):
+            if name in seen:
+                return
+            if name not in self.nodes:
+                raise ValueError(f"Unknown property {name!r}")
+            seen.add(name)
+            for dep in self.nodes[name].inputs:
+                visit(dep)
+            order.append(name)
+
+        for output in outputs:
+            visit(output)
+        return order
+
+    def node_keys(self, outputs: Iterable[str]) -> Dict[str, Tuple]:
+        """
+        Returns a key of every property needed to calculate the outputs, made of its function and of the keys of its
+        inputs. Two graphs give a property the same key when they calculate it the same way from the same inputs,
+        whatever correlations they use for the other properties
+        """
+        keys: Dict[str, Tuple] = {name: (name,) for name in INPUTS}
+        for name in self.dependencies(outputs):
+            node: Node = self.nodes[name]
+            keys[name] = (name, node.func, tuple(keys[dep] for dep in node.inputs))
+        return keys
+
+    def evaluate(self, inputs: Dict[str, np.ndarray], outputs: Iterable[str],
+                 cache: Optional[Dict[Tuple, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Calculates the outputs from the inputs
+
+        Parameters:
+        ----------
+        inputs : dict
+            Values of pressure, temp, oil_api, sg_gas, p_bubble, p_sep and t_sep, which are broadcast against each
+            other by the correlations
+        outputs : iterable of str
+            Properties to calculate
+        cache : dict, optional
+            Values of properties by their node_keys, shared between graphs of different correlations evaluated from
+            the same inputs. Properties found in it are not calculated again, and the ones calculated are added to it
+
+        Returns:
+        -------
+        dict
+            Values of the inputs and of every property calculated on the way to the outputs
+        """
+        values: Dict[str, np.ndarray] = dict(inputs)
+        outputs = list(outputs)
+        keys: Dict[str, Tuple] = self.node_keys(outputs) if cache is not None else {}
+        for name in self.dependencies(outputs):
+            node: Node = self.nodes[name]
+            if cache is not None and keys[name] in cache:
+                values[name] = cache[keys[name]]
+                continue
+            if Instr.ENABLED:
+                start: float = time.perf_counter()
+                values[name] = node.func(*[values[dep] for dep in node.inputs])
+                label: str = f"{name}:{self.correlations[name]}" if name in self.correlations else name
+                Instr.record_call(label, time.perf_counter() - start, int(np.size(values[name])))
+            else:
+                values[name] = node.func(*[values[dep] for dep in node.inputs])
+            if cache is not None:
+                cache[keys[name]] = values[name]
+        return values
+
+
+def evaluate_columns(inputs: Dict[str, np.ndarray], columns: Optional[Iterable[str]] = None,
+                     correlations: Optional[Dict[str, str]] = None, derivatives: bool = False,
+                     backend: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Calculates columns of the PVT table, broadcast to the common shape of all the calculated columns
+
+    Parameters:
+    ----------
+    inputs : dict
+        Values of pressure, temp, oil_api, sg_gas, p_bubble, p_sep and t_sep
+    columns : iterable of str, optional
+        Names of the columns to calculate, all the columns by default. Pressure is always included
+    correlations : dict, optional
+        Correlation to use for each property with a choice of correlations
+    derivatives : bool, optional
+        Include the DERIVATIVE_COLUMNS in the default columns
+    backend : str, optional
+        Backend of the kernels, as in PropertyGraph
+
+    Returns:
+    -------
+    dict
+        Requested columns in table order
+    """
+
+    table_columns: Dict[str, str] = {**COLUMNS, **DERIVATIVE_COLUMNS}
+    if columns is None:
+        columns = list(COLUMNS) + (list(DERIVATIVE_COLUMNS) if derivatives else [])
+    else:
+        columns = ['Pressure'] + [col for col in columns if col != 'Pressure']
+    unknown: List[str] = [col for col in columns if col not in table_columns]
+    if unknown:
+        raise ValueError(f"Unknown columns {', '.join(unknown)}")
+
+    graph: PropertyGraph = PropertyGraph(correlations, backend)
+    # The zero pressure point makes the gas properties undefined, the warnings it raises are silenced
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values: Dict[str, np.ndarray] = graph.evaluate(inputs, [table_columns[col] for col in columns])
+
+    shape = np.broadcast_shapes(*[np.shape(values[table_columns[col]]) for col in columns])
+    return {col: np.broadcast_to(values[table_columns[col]], shape) for col in table_columns if col in columns}
@@ -0,0 +1,302 @@
+import hashlib
+import inspect
+import types
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Compressibility_Table as Gas_Comp_Tab
+from . import Gas_Solubility as Gas_Sol
+from . import Gas_Viscosity as Gas_Visc
+from . import Instrumentation as Instr
+from . import Oil_Formation_Volume_Factor as Oil_FVF
+from . import Oil_Visocsity as Oil_Visc
+from . import Property_Graph as Prop_Graph
+
+# Range of an input a correlation was developed over, as (lowest, highest) with None for an open end
+Range = Tuple[Optional[float], Optional[float]]
+
+
+class Correlation:
+    """
+    Correlation of one property, with its metadata and the argument binding plans of its function
+
+    The arguments of the function are read from its signature once, when the correlation is created. A binding plan is
+    the tuple of arguments the function takes out of a given set of available values, it is worked out the first time
+    that set is seen and cached, so calling a correlation never inspects the function again
+
+    Parameters:
+    ----------
+    prop : str
+        Property calculated by the correlation, one of the properties with a choice of correlation in Property_Graph
+    name : str
+        Name the correlation is chosen by, as in the gas_sol_corr etc. arguments of pvt_table
+    func : callable
+        Function of a single point, called with keyword arguments
+    array_func : callable, optional
+        Function of arrays used by the columnar pvt_table, called positionally with node_inputs. The correlation is
+        only available to the row by row pvt_table without it
+    node_inputs : tuple of str, optional
+        Properties of the graph passed to array_func, the required arguments of func by default
+    validity : dict, optional
+        Range of every input the correlation was developed over
+    node : Node, optional
+        Graph node of the correlation, built from array_func and node_inputs by default
+
+    Example:
+    --------
+    >>> standing = get_correlation('gas_sol', "Standing")
+    >>> standing.required
+    ('pressure', 'temp', 'oil_api', 'sg_gas')
+    >>> rs = standing.bind('pressure', temp=600, oil_api=35, sg_gas=0.7, p_bubble=1500)
+    >>> round(float(rs(1000)), 4)
+    213.2417
+    """
+
+    __slots__ = ('prop', 'name', 'func', 'array_func', 'inputs', 'required', 'validity', 'node', '_call', '_plans',
+                 '_fingerprint')
+
+    def __init__(self, prop: str, name: str, func: Callable, array_func: Optional[Callable] = None,
+                 node_inputs: Optional[Tuple[str, ...]] = None, validity: Optional[Dict[str, Range]] = None,
+                 node: Optional[Prop_Graph.Node] = None):
+        self.prop: str = prop
+        self.name: str = name
+        self.func: Callable = func
+        self.array_func: Optional[Callable] = array_func
+        self.validity: Dict[str, Range] = dict(validity or {})
+
+        # Arguments that can be passed by name, and the ones without a default
+        parameters: List[inspect.Parameter] = [
+            parameter for parameter in inspect.signature(func).parameters.values()
+            if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)]
+        self.inputs: Tuple[str, ...] = tuple(parameter.name for parameter in parameters)
+        self.required: Tuple[str, ...] = tuple(parameter.name for parameter in parameters
+                                               if parameter.default is inspect.Parameter.empty)
+
+        if node is None and array_func is not None:
+            node = Prop_Graph.Node(prop, tuple(node_inputs or self.required), array_func)
+        self.node: Optional[Prop_Graph.Node] = node
+
+        self._call: Callable = Instr.timed(f"{prop}:{name}")(func)
+        self._plans: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._fingerprint: Optional[str] = None
+
+    def __repr__(self):
+        return f"Correlation({self.prop!r}, {self.name!r}, {self.required!r})"
+
+    @property
+    def vectorized(self) -> bool:
+        return self.node is not None
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Digest of the code of the functions of the correlation and of its graph node, and of the values and functions
+        they close over, the same in every process running the same code. A correlation registered again under the
+        same name with other code has another fingerprint, which keeps PVT_Cache from returning tables of the old one.
+        The global variables the functions read are not part of it
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for func in (self.func, self.array_func, self.node.func if self.node is not None else None):
+                _digest_function(digest, func, set())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def plan(self, available: Sequence[str]) -> Tuple[str, ...]:
+        """
+        Returns the arguments the function takes out of the available names, in the order of its signature
+
+        Raises:
+        ------
+        ValueError
+            When a required argument is not available
+        """
+        key: Tuple[str, ...] = tuple(available)
+        plan: Optional[Tuple[str, ...]] = self._plans.get(key)
+        if plan is None:
+            missing: List[str] = [name for name in self.required if name not in key]
+            if missing:
+                raise ValueError(f"{self.prop} correlation {self.name!r} needs {', '.join(missing)}")
+            plan = tuple(name for name in self.inputs if name in key)
+            self._plans[key] = plan
+        return plan
+
+    def bind(self, *varying: str, **fixed) -> Callable:
+        """
+        Binds the fixed values once and returns a function of the varying values, passed positionally in the order
+        they are named. Values the correlation does not take are dropped when binding, so the returned function does
+        no work besides calling the correlation
+        """
+        plan: Tuple[str, ...] = self.plan(varying + tuple(fixed))
+        fixed_args: Dict = {name: fixed[name] for name in plan if name in fixed}
+        func: Callable = self.func
+        timed: Callable = self._call
+
+        if all(name in plan for name in varying):
+            def bound(*args):
+                kwargs: Dict = dict(zip(varying, args))
+                kwargs.update(fixed_args)
+                return timed(**kwargs) if Instr.ENABLED else func(**kwargs)
+        else:
+            positions: Tuple[Tuple[int, str], ...] = tuple((i, name) for i, name in enumerate(varying) if name in plan)
+
+            def bound(*args):
+                kwargs: Dict = {name: args[i] for i, name in positions}
+                kwargs.update(fixed_args)
+                return timed(**kwargs) if Instr.ENABLED else func(**kwargs)
+
+        return bound
+
+    def __call__(self, **kwargs):
+        """
+        Calls the correlation with the arguments it takes out of kwargs
+        """
+        return self._call(**{name: kwargs[name] for name in self.plan(tuple(kwargs))})
+
+    def out_of_range(self, **values) -> List[str]:
+        """
+        Returns the names of the given inputs with values outside the range the correlation was developed over
+        """
+        outside: List[str] = []
+        for name, (low, high) in self.validity.items():
+            if name not in values:
+                continue
+            value = values[name]
+            below: bool = low is not None and bool(np.any(np.less(value, low)))
+            above: bool = high is not None and bool(np.any(np.greater(value, high)))
+            if below or above:
+                outside.append(name)
+        return outside
+
+
+# Registered correlations of every property, by name
+CORRELATIONS: Dict[str, Dict[str, Correlation]] = {}
+
+
+def register_correlation(correlation: Correlation):
+    """
+    Adds a correlation to the registry, replacing any correlation of the same property and name. A correlation with
+    a graph node is added to Property_Graph.CORRELATION_NODES as well, which makes it available to the columnar
+    pvt_table, pvt_cube and the other users of the property graph
+
+    Example:
+    --------
+    >>> def constant_z(pressure, temp, sg_gas):
+    ...     return 0.9 + 0 * pressure
+    >>> register_correlation(Correlation('gas_comp_factor', "Constant", constant_z, array_func=constant_z))
+    >>> from pvt_correlations import PVT_Table
+    >>> table = PVT_Table.pvt_table(3000, 1700, 620, 35, 0.68, 120, 520, 3, gas_comp_corr="Constant")
+    >>> table['Gas Compressibility Factor'].tolist()
+    [0.9, 0.9, 0.9]
+    >>> unregister_correlation('gas_comp_factor', "Constant")
+    """
+    if correlation.prop not in Prop_Graph.DEFAULT_CORRELATIONS:
+        raise ValueError(f"Unknown property {correlation.prop!r}, choose from "
+                         f"{', '.join(Prop_Graph.DEFAULT_CORRELATIONS)}")
+    CORRELATIONS.setdefault(correlation.prop, {})[correlation.name] = correlation
+    if correlation.node is not None:
+        Prop_Graph.CORRELATION_NODES.setdefault(correlation.prop, {})[correlation.name] = correlation.node
+
+
+def unregister_correlation(prop: str, name: str):
+    """
+    Removes a correlation from the registry and from the property graph
+    """
+    CORRELATIONS.get(prop, {}).pop(name, None)
+    Prop_Graph.CORRELATION_NODES.get(prop, {}).pop(name, None)
+
+
+def get_correlation(prop: str, name: Optional[str] = None) -> Correlation:
+    """
+    Returns the named correlation of a property, the default correlation of the property when name is None
+    """
+    name = name if name is not None else Prop_Graph.DEFAULT_CORRELATIONS.get(prop)
+    variants: Dict[str, Correlation] = CORRELATIONS.get(prop, {})
+    if name not in variants:
+        raise ValueError(f"Unknown correlation {name!r} for {prop}, choose from {', '.join(variants)}")
+    return variants[name]
+
+
+def available_correlations(prop: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Returns the names of the registered correlations of every property, or of one property
+    """
+    return {key: list(variants) for key, variants in CORRELATIONS.items() if prop is None or key == prop}
+
+
+def _digest_function(digest, func, seen: set):
+    # Adds the name, code, defaults and closure of a function to a digest, following the functions it closes over
+    if func is None or id(func) in seen:
+        return
+    seen.add(id(func))
+    func = getattr(func, '__func__', func)
+    digest.update(f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+                  .encode())
+    code: Optional[types.CodeType] = getattr(func, '__code__', None)
+    if code is None:
+        return
+    _digest_code(digest, code)
+    digest.update(repr((func.__defaults__, func.__kwdefaults__)).encode())
+    for cell in func.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # Empty cell
+            continue
+        if callable(value):
+            _digest_function(digest, value, seen)
+        else:
+            _digest_value(digest, value)
+
+
+def _digest_code(digest, code: types.CodeType):
+    # Bytecode, names and constants of a code object, with the code of the functions defined in it
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _digest_code(digest, const)
+        else:
+            _digest_value(digest, const)
+
+
+def _digest_value(digest, value):
+    # Arrays by their data, as their repr leaves values out, and sets in sorted order, as the order of their repr
+    # depends on the hash seed of the process
+    if isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (set, frozenset)):
+        digest.update(repr(sorted(repr(item) for item in value)).encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def _register_builtin(prop: str, name: str, func: Callable, validity: Optional[Dict[str, Range]] = None):
+    # The built-in correlations already have their nodes in the property graph
+    node: Prop_Graph.Node = Prop_Graph.CORRELATION_NODES[prop][name]
+    register_correlation(Correlation(prop, name, func, node.func, node.inputs, validity, node))
+
+
+# Ranges of the data the correlations were fitted to, temperatures in degrees Rankine. The compressibility factor
+# correlations are bounded in pseudo-reduced conditions rather than in their inputs, so they carry no ranges
+_STANDING_RANGE: Dict[str, Range] = {'pressure': (130.0, 7000.0), 'temp': (559.67, 717.67), 'oil_api': (16.5, 63.8),
+                                     'sg_gas': (0.59, 0.95), 'gas_sol': (20.0, 1425.0)}
+_VASQUEZ_BEGGS_RANGE: Dict[str, Range] = {'pressure': (15.0, 6055.0), 'temp': (534.67, 753.67),
+                                          'oil_api': (15.3, 59.5), 'sg_gas': (0.511, 1.351), 'gas_sol': (0.0, 2199.0)}
+
+_register_builtin('gas_sol', "Standing", Gas_Sol.standings_gas_solubility, _STANDING_RANGE)
+_register_builtin('gas_sol', "Vasquez Beggs", Gas_Sol.vasquez_beggs_gas_solubility, _VASQUEZ_BEGGS_RANGE)
+_register_builtin('gas_comp_factor', "Carnahan Starling", Gas_Comp.carnahan_starling_hs_eos)
+_register_builtin('gas_comp_factor', "Carnahan Starling Tabulated", Gas_Comp_Tab.tabulated_z_factor)
+_register_builtin('gas_comp_factor', "Papay", Gas_Comp.papay)
+_register_builtin('gas_comp_factor', "Beggs Brill", Gas_Comp.beggs_brill)
+_register_builtin('gas_comp_factor', "Dranchuk Abou Kassem", Gas_Comp.dranchuk_abou_kassem)
+_register_builtin('gas_visc', "Lee Gonzalez Eakin", Gas_Visc.lee_gonzalez_eakin,
+                  {'pressure': (100.0, 8000.0), 'temp': (559.67, 799.67)})
+_register_builtin('oil_fvf', "Standing", Oil_FVF.standings_oil_fvf, _STANDING_RANGE)
+_register_builtin('oil_fvf', "Vasquez Beggs", Oil_FVF.vasquez_beggs_oil_fvf, _VASQUEZ_BEGGS_RANGE)
+_register_builtin('oil_visc', "Beggs Robinson", Oil_Visc.beggs_robinson,
+                  {'pressure': (132.0, 5265.0), 'temp': (529.67, 754.67), 'oil_api': (16.0, 58.0),
+                   'gas_sol': (20.0, 2070.0)})
@@ -0,0 +1,217 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, TextIO
+
+from . import PVT_Lookup
+
+# Keywords that can be exported
+KEYWORDS: List[str] = ['PVTO', 'PVDO', 'PVDG', 'DENSITY']
+
+# Format of every number in the tables
+NUMBER_FORMAT: str = "%14.8g"
+
+# Surface densities in lbm/ft3 of water and of air
+WATER_DENSITY: float = 62.4
+AIR_DENSITY: float = 0.0764
+
+# Cubic feet in a reservoir barrel
+FT3_PER_BBL: float = 5.615
+
+
+def format_rows(rows: np.ndarray, fmt: str = NUMBER_FORMAT, terminator: str = "") -> str:
+    """
+    Formats a 2-D array as lines of numbers in a single string formatting operation, with the terminator appended to
+    the last line
+
+    Example:
+    --------
+    >>> print(format_rows(np.array([[1.0, 2.5], [3.0, 4.0]]), "%g", " /"))
+    1 2.5
+    3 4 /
+    <BLANKLINE>
+    """
+    rows = np.atleast_2d(np.asarray(rows, dtype=float))
+    if rows.size == 0:
+        return terminator + "\n" if terminator else ""
+    line: str = " ".join([fmt] * rows.shape[1])
+    template: str = (line + "\n") * (rows.shape[0] - 1) + line + terminator + "\n"
+    return template % tuple(rows.ravel().tolist())
+
+
+def pvdg(table: Dict[str, np.ndarray]) -> str:
+    """
+    Returns the PVDG table of dry gas: pressure in psia, gas FVF in rb/Mscf and gas viscosity in cp, terminated by a
+    slash
+
+    Parameters:
+    ----------
+    table : pd.DataFrame or dict
+        pvt_table result with the Pressure, Gas FVF and Gas Viscosity columns, the zero pressure row is left out
+    """
+    pressure, (gas_fvf, gas_visc) = _table_columns(table, ['Gas FVF', 'Gas Viscosity'])
+    return format_rows(np.column_stack([pressure, gas_fvf * 1000 / FT3_PER_BBL, gas_visc]), terminator=" /")
+
+
+def pvdo(table: Dict[str, np.ndarray]) -> str:
+    """
+    Returns the PVDO table of dead oil: pressure in psia, oil FVF in rb/stb and oil viscosity in cp, terminated by a
+    slash
+
+    Parameters:
+    ----------
+    table : pd.DataFrame or dict
+        pvt_table result with the Pressure, Oil FVF and Oil Viscosity columns, the zero pressure row is left out
+    """
+    pressure, (oil_fvf, oil_visc) = _table_columns(table, ['Oil FVF', 'Oil Viscosity'])
+    return format_rows(np.column_stack([pressure, oil_fvf, oil_visc]), terminator=" /")
+
+
+def pvto(table: Dict[str, np.ndarray], p_bubble: float, undersaturated: str = 'all',
+         undersaturated_points: Optional[int] = 5) -> str:
+    """
+    Returns the PVTO table of live oil, with one record per solution gas-oil ratio node terminated by a slash and a
+    final slash ending the table
+
+    The saturated nodes are the pressures of the table below the bubble point and the bubble point itself. The
+    undersaturated branch of the table above the bubble point is attached to the bubble point node, and, when
+    undersaturated is 'all', shifted to every other node: a node with bubble point pressure pn gets the pressures
+    pn + (p - p_bubble) with the oil FVF and viscosity of the node scaled by their ratios to the bubble point values
+
+    Parameters:
+    ----------
+    table : pd.DataFrame or dict
+        pvt_table result with the Pressure, Gas Solubility, Oil FVF and Oil Viscosity columns
+    p_bubble : float
+        Bubble point pressure of the table in psia
+    undersaturated : str, optional
+        'all' for an undersaturated branch on every node, or 'bubble' for only the bubble point node
+    undersaturated_points : int, optional
+        Number of pressures of the undersaturated branch, taken evenly from the table above the bubble point and
+        always including the last one. All of them when None
+
+    Returns:
+    -------
+    str
+        Records of Rs in Mscf/stb, pressure in psia, oil FVF in rb/stb and oil viscosity in cp
+    """
+    if undersaturated not in ('all', 'bubble'):
+        raise ValueError(f"Unknown undersaturated option {undersaturated!r}, choose from all, bubble")
+    columns: List[str] = ['Gas Solubility', 'Oil FVF', 'Oil Viscosity']
+    pressure, values = _table_columns(table, columns)
+    values = np.array(values)
+
+    # Properties at the bubble point, from the branch above it so the kink is not smoothed
+    lookup: PVT_Lookup.PVTLookup = PVT_Lookup.PVTLookup(pressure, dict(zip(columns, values)), p_bubble)
+    at_bubble: Dict[str, np.ndarray] = lookup(p_bubble)
+    bubble_values: np.ndarray = np.array([at_bubble[col] for col in columns])
+
+    below: np.ndarray = pressure < p_bubble * (1 - 1e-9)
+    node_pressure: np.ndarray = np.append(pressure[below], p_bubble)
+    node_values: np.ndarray = np.column_stack([values[:, below], bubble_values])
+    saturated: np.ndarray = np.column_stack([node_values[0] / 1000, node_pressure, node_values[1], node_values[2]])
+
+    above: np.ndarray = np.flatnonzero(pressure > p_bubble * (1 + 1e-9))
+    if undersaturated_points is not None and above.size > undersaturated_points:
+        above = above[np.linspace(0, above.size - 1, undersaturated_points).round().astype(int)]
+    if above.size == 0:
+        return format_rows(saturated, terminator=" /") + "/\n"
+
+    # Undersaturated branch of every node as the shift of the bubble point branch, (nodes, points) arrays
+    branch_nodes: slice = slice(None) if undersaturated == 'all' else slice(-1, None)
+    shift: np.ndarray = pressure[above] - p_bubble
+    branch_pressure: np.ndarray = node_pressure[branch_nodes, np.newaxis] + shift
+    branch_fvf: np.ndarray = node_values[1, branch_nodes, np.newaxis] * (values[1, above] / bubble_values[1])
+    branch_visc: np.ndarray = node_values[2, branch_nodes, np.newaxis] * (values[2, above] / bubble_values[2])
+    branch: np.ndarray = np.stack([branch_pressure, branch_fvf, branch_visc], axis=-1)
+
+    # One record is the saturated row followed by the rows of its branch, laid out as a single formatting operation
+    first: str = " ".join([NUMBER_FORMAT] * 4)
+    rest: str = "\n" + " " * 15 + " ".join([NUMBER_FORMAT] * 3)
+    plain: int = saturated.shape[0] - branch.shape[0]
+    flat: np.ndarray = np.concatenate([saturated[plain:], branch.reshape(branch.shape[0], -1)], axis=1)
+    template: str = (first + " /\n") * plain + (first + rest * above.size + " /\n") * flat.shape[0]
+    return template % tuple(np.concatenate([saturated[:plain].ravel(), flat.ravel()]).tolist()) + "/\n"
+
+
+def density(oil_api: float, sg_gas: float, water_density: float = WATER_DENSITY) -> str:
+    """
+    Returns the DENSITY record of surface densities of oil, water and gas in lbm/ft3, terminated by a slash
+
+    Example:
+    --------
+    >>> density(35, 0.7).split()
+    ['53.030631', '62.4', '0.05348', '/']
+    """
+    oil_density: float = 141.5 / (131.5 + oil_api) * WATER_DENSITY
+    gas_density: float = sg_gas * AIR_DENSITY
+    return format_rows(np.array([[oil_density, water_density, gas_density]]), "%.8g", terminator=" /")
+
+
+def write_deck(path: str, regions: Iterable[Dict], keywords: Sequence[str] = ('PVTO', 'PVDG', 'DENSITY'),
+               undersaturated: str = 'all', undersaturated_points: Optional[int] = 5) -> str:
+    """
+    Writes the PVT keywords of many PVT regions to one include file, streaming through the regions once
+
+    Every keyword holds one table per region, in the order of the regions. The tables of each keyword are written to
+    a temporary file next to the deck as the regions arrive, and the keywords are put together at the end, so only one
+    region is held in memory at a time
+
+    Parameters:
+    ----------
+    path : str
+        File to write the deck to
+    regions : iterable of dict
+        Regions with the 'table' (pvt_table result), 'p_bubble', 'oil_api' and 'sg_gas' of each, 'p_bubble' is only
+        needed for PVTO and 'oil_api' and 'sg_gas' only for DENSITY
+    keywords : sequence of str, optional
+        Keywords to write, from PVTO, PVDO, PVDG and DENSITY
+    undersaturated, undersaturated_points : optional
+        Undersaturated branches of PVTO, as in pvto
+
+    Returns:
+    -------
+    str
+        Path the deck was written to
+    """
+    unknown: List[str] = [keyword for keyword in keywords if keyword not in KEYWORDS]
+    if unknown:
+        raise ValueError(f"Unknown keywords {', '.join(unknown)}")
+
+    directory: str = os.path.dirname(os.path.abspath(path))
+    parts: Dict[str, TextIO] = {keyword: tempfile.TemporaryFile('w+', dir=directory) for keyword in keywords}
+    try:
+        num_regions: int = 0
+        for region in regions:
+            num_regions += 1
+            for keyword, part in parts.items():
+                part.write(_keyword_table(keyword, region, undersaturated, undersaturated_points))
+
+        with open(path, 'w') as deck:
+            for keyword, part in parts.items():
+                deck.write(f"{keyword}\n-- {num_regions} PVT regions\n")
+                part.seek(0)
+                shutil.copyfileobj(part, deck)
+                deck.write("\n")
+    finally:
+        for part in parts.values():
+            part.close()
+    return path
+
+
+def _keyword_table(keyword: str, region: Dict, undersaturated: str, undersaturated_points: Optional[int]) -> str:
+    if keyword == 'PVTO':
+        return pvto(region['table'], region['p_bubble'], undersaturated, undersaturated_points)
+    if keyword == 'PVDO':
+        return pvdo(region['table'])
+    if keyword == 'PVDG':
+        return pvdg(region['table'])
+    return density(region['oil_api'], region['sg_gas'])
+
+
+def _table_columns(table: Dict[str, np.ndarray], columns: List[str]):
+    # Pressures above zero and the requested columns at them
+    pressure: np.ndarray = np.asarray(table['Pressure'], dtype=float)
+    keep: np.ndarray = pressure > 0
+    return pressure[keep], [np.asarray(table[col], dtype=float)[keep] for col in columns]
@@ -0,0 +1,246 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from . import PVT_Table
+
+# Inputs of a table that can be uncertain, in the order they are sampled in, so a seed always gives the same samples
+UNCERTAIN_INPUTS: Tuple[str, ...] = ('oil_api', 'sg_gas', 'p_bubble', 'temp', 'p_sep', 't_sep')
+
+# Distributions an input can be sampled from, as (name, *parameters), and the number of parameters of each. The
+# parameters are the ones of the np.random.Generator method of the same name, lognormal takes the mean and standard
+# deviation of the underlying normal distribution
+DISTRIBUTIONS: Dict[str, int] = {'normal': 2, 'uniform': 2, 'triangular': 3, 'lognormal': 2}
+
+DEFAULT_PERCENTILES: Tuple[float, ...] = (10.0, 50.0, 90.0)
+
+# Largest number of (sample, pressure) points evaluated at a time
+DEFAULT_CHUNK_SIZE: int = 1 << 20
+
+# Distribution of an input: a fixed value, an array of samples or a (name, *parameters) tuple
+Distribution = Union[float, np.ndarray, Sequence[float], Tuple]
+
+
+class UncertaintyResult:
+    """
+    Percentile bands of the columns of the PVT table over the sampled fluids
+
+    Attributes:
+    ----------
+    pressure : np.ndarray
+        Pressures of the bands
+    percentiles : tuple of float
+        Percentiles of the bands, from 0 to 100
+    bands : dict
+        Array of shape (number of percentiles, number of pressures) of every column
+    samples : dict
+        Sampled value of every uncertain input, as arrays of shape (number of samples,)
+    stats : dict
+        Number of samples, points and chunks, wall time and points evaluated per second, and under 'non_finite' the
+        number of (sample, pressure) points of every column left out of its bands as NaN or infinite
+    """
+
+    def __init__(self, pressure: np.ndarray, percentiles: Tuple[float, ...], bands: Dict[str, np.ndarray],
+                 samples: Dict[str, np.ndarray], stats: Dict):
+        self.pressure = pressure
+        self.percentiles = percentiles
+        self.bands = bands
+        self.samples = samples
+        self.stats = stats
+
+    def __repr__(self):
+        return (f"UncertaintyResult({self.stats['samples']} samples, {len(self.pressure)} pressures, "
+                f"percentiles={self.percentiles!r})")
+
+    def band(self, column: str, percentile: float) -> np.ndarray:
+        """
+        Returns the values of a column at one of the percentiles, for every pressure
+        """
+        if percentile not in self.percentiles:
+            raise ValueError(f"Percentile {percentile} was not calculated, choose from {self.percentiles}")
+        return self.bands[column][self.percentiles.index(percentile)]
+
+    def to_pandas(self):
+        """
+        Returns the bands as a DataFrame indexed by pressure, with (column, percentile) columns such as
+        ('Oil FVF', 'P10')
+        """
+        import pandas as pd
+        labels: List[Tuple[str, str]] = [(column, f"P{percentile:g}") for column in self.bands
+                                         for percentile in self.percentiles]
+        values: np.ndarray = np.concatenate(list(self.bands.values())).T if self.bands else np.empty((0, 0))
+        return pd.DataFrame(values, index=pd.Index(self.pressure, name='Pressure'),
+                            columns=pd.MultiIndex.from_tuples(labels))
+
+
+def sample_inputs(distributions: Dict[str, Distribution], num_samples: int,
+                  seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """
+    Draws num_samples values of every uncertain input
+
+    Parameters:
+    ----------
+    distributions : dict
+        Distribution of each of oil_api, sg_gas, p_bubble, temp, p_sep and t_sep: a fixed value, an array of
+        num_samples samples, or a tuple such as ('normal', mean, std), ('uniform', low, high),
+        ('triangular', low, mode, high) or ('lognormal', mean, sigma). The samples are not clipped, so a distribution
+        that reaches impossible values, such as a negative bubble point, gives NaN or infinite properties for those
+        samples, which pvt_uncertainty leaves out of the bands and counts in its stats
+    num_samples : int
+        Number of samples
+    seed : int, optional
+        Seed of the random generator, the same seed and distributions always give the same samples
+
+    Returns:
+    -------
+    dict
+        Array of shape (num_samples,) of every input
+
+    Example:
+    --------
+    >>> samples = sample_inputs({'oil_api': ('normal', 35, 2), 'sg_gas': 0.7}, 4, seed=1)
+    >>> samples['oil_api'].round(2)
+    array([35.69, 36.64, 35.66, 32.39])
+    >>> samples['sg_gas']
+    array([0.7, 0.7, 0.7, 0.7])
+    """
+    unknown: List[str] = [name for name in distributions if name not in UNCERTAIN_INPUTS]
+    if unknown:
+        raise ValueError(f"Unknown inputs {', '.join(unknown)}, choose from {', '.join(UNCERTAIN_INPUTS)}")
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+    samples: Dict[str, np.ndarray] = {}
+    for name in UNCERTAIN_INPUTS:
+        if name not in distributions:
+            continue
+        distribution: Distribution = distributions[name]
+        if isinstance(distribution, tuple) and distribution and isinstance(distribution[0], str):
+            kind, parameters = distribution[0], distribution[1:]
+            if kind not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution {kind!r} of {name}, choose from {', '.join(DISTRIBUTIONS)}")
+            if len(parameters) != DISTRIBUTIONS[kind]:
+                raise ValueError(f"The {kind} distribution of {name} takes {DISTRIBUTIONS[kind]} parameters")
+            samples[name] = getattr(rng, kind)(*parameters, size=num_samples)
+        else:
+            values: np.ndarray = np.asarray(distribution, dtype=float)
+            if values.ndim == 0:
+                samples[name] = np.full(num_samples, float(values))
+            elif values.shape == (num_samples,):
+                samples[name] = values
+            else:
+                raise ValueError(f"Samples of {name} have shape {values.shape}, expected ({num_samples},)")
+    return samples
+
+
+def pvt_uncertainty(distributions: Dict[str, Distribution], pressure_max: float, num_points: int,
+                    num_samples: int = 10000, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                    seed: Optional[int] = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    gas_sol_corr: Optional[str] = "Vasquez Beggs", gas_comp_corr: Optional[str] = "Carnahan Starling",
+                    gas_visc_corr: Optional[str] = "Lee Gonzalez Eakin", oil_fvf_corr: Optional[str] = "Vasquez Beggs",
+                    oil_visc_corr: Optional[str] = "Beggs Robinson",
+                    columns: Optional[List[str]] = None) -> UncertaintyResult:
+    """
+    Propagates the uncertainty of the fluid and conditions through the PVT table by Monte Carlo sampling
+
+    Every sample is evaluated at every pressure in one broadcast pass of the vectorized correlations, with the samples
+    along the first axis and the pressures along the second. The percentiles of every pressure need the values of all
+    the samples at that pressure, so the pressures are split into chunks of at most chunk_size (sample, pressure)
+    points, and only the bands are kept of each chunk, which bounds the memory whatever the number of pressures. The
+    percentiles are the ones of the finite values at every pressure, NaN where no sample is finite, so samples with
+    impossible inputs do not spread NaN into the bands
+
+    Parameters:
+    ----------
+    distributions : dict
+        Distribution of each of oil_api, sg_gas, p_bubble, temp, p_sep and t_sep, as in sample_inputs. Every one of
+        them is needed
+    pressure_max : float
+        Maximum pressure of the range in psia, the range starts at zero
+    num_points : int
+        Number of pressures in the range
+    num_samples : int, optional
+        Number of samples of the inputs
+    percentiles : sequence of float, optional
+        Percentiles of the bands, from 0 to 100. In the exceedance convention of reserves the P90 value, exceeded by
+        90 % of the samples, is the 10th percentile
+    seed : int, optional
+        Seed of the sampling
+    chunk_size : int, optional
+        Largest number of (sample, pressure) points evaluated at a time
+    gas_sol_corr, gas_comp_corr, gas_visc_corr, oil_fvf_corr, oil_visc_corr : str, optional
+        Correlations used for each property, as in pvt_table
+    columns : list of str, optional
+        Columns of pvt_table to calculate, all of them by default
+
+    Returns:
+    -------
+    UncertaintyResult
+        Bands of every column but Pressure, and the samples they were calculated from, with the number of values
+        left out of every column in stats['non_finite']
+
+    Example:
+    --------
+    >>> result = pvt_uncertainty({'oil_api': ('normal', 35, 2), 'sg_gas': ('uniform', 0.65, 0.75), 'p_bubble': ('triangular', 1500, 1700, 2000), 'temp': 620, 'p_sep': 120, 't_sep': 520}, 3000, 31, num_samples=1000)
+    >>> result.bands['Oil FVF'].shape
+    (3, 31)
+    >>> bool(np.all(result.band('Oil FVF', 10) <= result.band('Oil FVF', 90)))
+    True
+    """
+    missing: List[str] = [name for name in UNCERTAIN_INPUTS if name not in distributions]
+    if missing:
+        raise ValueError(f"Missing the distributions of {', '.join(missing)}")
+    percentiles = tuple(float(percentile) for percentile in percentiles)
+
+    start_time: float = time.perf_counter()
+    samples: Dict[str, np.ndarray] = sample_inputs(distributions, num_samples, seed)
+    pressure: np.ndarray = np.linspace(0, pressure_max, num_points)
+
+    # Samples along the first axis, the pressures of a chunk along the second
+    fluid_axis: Dict[str, np.ndarray] = {name: values[:, np.newaxis] for name, values in samples.items()}
+    chunk_points: int = max(1, chunk_size // max(num_samples, 1))
+    bands: Dict[str, np.ndarray] = {}
+    non_finite: Dict[str, int] = {}
+    num_chunks: int = 0
+    for start in range(0, num_points, chunk_points):
+        stop: int = min(start + chunk_points, num_points)
+        table: Dict[str, np.ndarray] = PVT_Table._pvt_columns(
+            pressure[np.newaxis, start:stop], fluid_axis['p_bubble'], fluid_axis['temp'], fluid_axis['oil_api'],
+            fluid_axis['sg_gas'], fluid_axis['p_sep'], fluid_axis['t_sep'], gas_sol_corr, gas_comp_corr,
+            gas_visc_corr, oil_fvf_corr, oil_visc_corr, columns)
+        for column, values in table.items():
+            if column == 'Pressure':
+                continue
+            if column not in bands:
+                bands[column] = np.empty((len(percentiles), num_points))
+                non_finite[column] = 0
+            values = np.broadcast_to(values, (num_samples, stop - start))
+            finite: np.ndarray = np.isfinite(values)
+            if finite.all():
+                bands[column][:, start:stop] = np.percentile(values, percentiles, axis=0)
+            else:
+                bands[column][:, start:stop] = _finite_percentiles(values, finite, percentiles)
+                non_finite[column] += int(finite.size - np.count_nonzero(finite))
+        num_chunks += 1
+    wall_time: float = time.perf_counter() - start_time
+
+    points: int = num_samples * num_points
+    stats: Dict = {'samples': num_samples, 'points': points, 'chunks': num_chunks, 'wall_time': wall_time,
+                   'points_per_second': points / wall_time if wall_time > 0 else float('nan'), 'non_finite': non_finite}
+    return UncertaintyResult(pressure, percentiles, bands, samples, stats)
+
+
+def _finite_percentiles(values: np.ndarray, finite: np.ndarray, percentiles: Tuple[float, ...]) -> np.ndarray:
+    # Percentiles along the first axis of the finite values only, interpolated linearly as np.percentile does, NaN
+    # where a column has no finite value. np.nanpercentile would keep infinite values and loops over the columns
+    count: np.ndarray = np.count_nonzero(finite, axis=0)
+    ordered: np.ndarray = np.sort(np.where(finite, values, np.inf), axis=0)
+    position: np.ndarray = np.asarray(percentiles)[:, np.newaxis] / 100 * np.maximum(count - 1, 0)
+    low: np.ndarray = np.floor(position).astype(int)
+    high: np.ndarray = np.minimum(low + 1, np.maximum(count - 1, 0))
+    low_values: np.ndarray = np.take_along_axis(ordered, low, axis=0)
+    high_values: np.ndarray = np.take_along_axis(ordered, high, axis=0)
+    with np.errstate(invalid='ignore'):
+        result: np.ndarray = low_values + (position - low) * (high_values - low_values)
+    result[:, count == 0] = np.nan
+    return result
+
@@ -1,78 +1,142 @@
+import functools
 import inspect
 from typing import Optional
 
-import Gas_Solubility as Gas_Sol
-import Gas_Compressibility_Factor as Gas_Comp
-import Gas_Viscosity as Gas_Visc
-import Gas_Formation_Volume_Factor as Gas_FVF
-import Oil_Formation_Volume_Factor as Oil_FVF
-import Oil_Visocsity as Oil_Visc
-import Oil_Density as Oil_Den
+from . import Gas_Solubility as Gas_Sol
+from . import Gas_Compressibility_Factor as Gas_Comp
+from . import Gas_Compressibility_Table as Gas_Comp_Tab
+from . import Gas_Viscosity as Gas_Visc
+from . import Gas_Formation_Volume_Factor as Gas_FVF
+from . import Oil_Formation_Volume_Factor as Oil_FVF
+from . import Oil_Visocsity as Oil_Visc
+from . import Oil_Density as Oil_Den
+from . import Instrumentation as Instr
 
 
 # Gas Solubility Correlations
+@Instr.timed("gas_sol:Standing")
 def standings_gas_solubility_wrapper(pressure, temp, oil_api, sg_gas, **kwargs):
     return Gas_Sol.standings_gas_solubility(pressure, temp, oil_api, sg_gas)
 
 
+@Instr.timed("gas_sol:Vasquez Beggs")
 def vasquez_beggs_gas_solubility_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep, **kwargs):
     return Gas_Sol.vasquez_beggs_gas_solubility(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
 
 
 # Gas Compressibility Factor Correlations
+@Instr.timed("gas_comp_factor:Carnahan Starling")
 def carnahan_starling_hs_eos_wrapper(pressure, temp, sg_gas, **kwargs):
     return Gas_Comp.carnahan_starling_hs_eos(pressure, temp, sg_gas)
 
 
-# Gas Formation Volume Factor Function
-def gas_formation_volume_factor_wrapper(pressure, temp, sg_gas, **kwargs):
-    # Optional Argument
-    gas_comp_factor = kwargs.get("gas_comp_factor", None)
+@Instr.timed("gas_comp_factor:Papay")
+def papay_wrapper(pressure, temp, sg_gas, **kwargs):
+    return Gas_Comp.papay(pressure, temp, sg_gas)
+
+
+@Instr.timed("gas_comp_factor:Beggs Brill")
+def beggs_brill_wrapper(pressure, temp, sg_gas, **kwargs):
+    return Gas_Comp.beggs_brill(pressure, temp, sg_gas)
+
 
-    return Gas_FVF.gas_formation_volume_factor(pressure, temp, sg_gas, gas_comp_factor)
+@Instr.timed("gas_comp_factor:Dranchuk Abou Kassem")
+def dranchuk_abou_kassem_wrapper(pressure, temp, sg_gas, **kwargs):
+    return Gas_Comp.dranchuk_abou_kassem(pressure, temp, sg_gas)
+
+
+@Instr.timed("gas_comp_factor:Carnahan Starling Tabulated")
+def tabulated_z_factor_wrapper(pressure, temp, sg_gas, **kwargs):
+    return Gas_Comp_Tab.tabulated_z_factor(pressure, temp, sg_gas)
+
+
+# Gas Formation Volume Factor Function
+@Instr.timed("gas_fvf")
+def gas_formation_volume_factor_wrapper(pressure, temp, sg_gas, gas_comp_factor=None, gas_comp_func=None, **kwargs):
+    return Gas_FVF.gas_formation_volume_factor(pressure, temp, sg_gas, gas_comp_factor, gas_comp_func)
 
 
 # Gas Viscosity Correlations
-def lee_gonzalez_eakin_wrapper(pressure, temp, sg_gas, **kwargs):
-    # Optional Argument
-    gas_comp_factor = kwargs.get("gas_comp_factor", None)
-    return Gas_Visc.lee_gonzalez_eakin(pressure, temp, sg_gas, gas_comp_factor)
+@Instr.timed("gas_visc:Lee Gonzalez Eakin")
+def lee_gonzalez_eakin_wrapper(pressure, temp, sg_gas, gas_comp_factor=None, gas_comp_func=None, **kwargs):
+    return Gas_Visc.lee_gonzalez_eakin(pressure, temp, sg_gas, gas_comp_factor, gas_comp_func)
 
 
 # Oil Formation Volume Factor Correlations
+@Instr.timed("oil_fvf:Standing")
 def standings_oil_fvf_wrapper(gas_sol, temp, oil_api, sg_gas, **kwargs):
     return Oil_FVF.standings_oil_fvf(gas_sol, temp, oil_api, sg_gas)
 
 
+@Instr.timed("oil_fvf:Vasquez Beggs")
 def vasquez_beggs_oil_fvf_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep, **kwargs):
     return Oil_FVF.vasquez_beggs_oil_fvf(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
 
 
 # Oil Viscosity Correlations
-def beggs_robinson_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, **kwargs):
-    # Optional Arguments
-    gas_sol = kwargs.get("gas_sol", None)
-    p_sep = kwargs.get("p_sep", None)
-    t_sep = kwargs.get("t_sep", None)
-
+@Instr.timed("oil_visc:Beggs Robinson")
+def beggs_robinson_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol=None, p_sep=None, t_sep=None, **kwargs):
     return Oil_Visc.beggs_robinson(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol, p_sep, t_sep)
 
 
 # Function to calculate Oil Density
-def oil_density_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, **kwargs):
-    # Optional Arguments
-    gas_sol = kwargs.get("gas_sol", None)
-    oil_fvf = kwargs.get("oil_fvf", None)
-    p_sep = kwargs.get("p_sep", None)
-    t_sep = kwargs.get("t_sep", None)
-
+@Instr.timed("oil_density")
+def oil_density_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol=None, oil_fvf=None, p_sep=None, t_sep=None,
+                        **kwargs):
     return Oil_Den.oil_density(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol, oil_fvf, p_sep, t_sep)
 
 
-def dynamic_wrapper(function, **kwargs):
-    signature = inspect.signature(function)
+# Vectorized Correlations, these accept NumPy arrays and are used by the columnar PVT table
+@Instr.timed("gas_sol:Vasquez Beggs")
+def vasquez_beggs_gas_solubility_vectorized_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep, **kwargs):
+    return Gas_Sol.vasquez_beggs_gas_solubility_vectorized(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
+
 
-    # Create a dictionary of the required arguments
-    valid_args = {key: val for key, val in kwargs.items() if key in signature.parameters}
+@Instr.timed("gas_comp_factor:Carnahan Starling")
+def carnahan_starling_hs_eos_vectorized_wrapper(pressure, temp, sg_gas, **kwargs):
+    return Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure, temp, sg_gas)
 
-    return function(**valid_args)
+
+@Instr.timed("gas_fvf")
+def gas_formation_volume_factor_vectorized_wrapper(pressure, temp, sg_gas, gas_comp_factor=None, gas_comp_func=None,
+                                                   **kwargs):
+    return Gas_FVF.gas_formation_volume_factor_vectorized(pressure, temp, sg_gas, gas_comp_factor, gas_comp_func)
+
+
+@Instr.timed("gas_visc:Lee Gonzalez Eakin")
+def lee_gonzalez_eakin_vectorized_wrapper(pressure, temp, sg_gas, gas_comp_factor=None, gas_comp_func=None, **kwargs):
+    return Gas_Visc.lee_gonzalez_eakin_vectorized(pressure, temp, sg_gas, gas_comp_factor, gas_comp_func)
+
+
+@Instr.timed("oil_fvf:Vasquez Beggs")
+def vasquez_beggs_oil_fvf_vectorized_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep, **kwargs):
+    return Oil_FVF.vasquez_beggs_oil_fvf_vectorized(pressure, temp, oil_api, sg_gas, p_bubble, p_sep, t_sep)
+
+
+@Instr.timed("oil_visc:Beggs Robinson")
+def beggs_robinson_vectorized_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol=None, p_sep=None, t_sep=None,
+                                      **kwargs):
+    return Oil_Visc.beggs_robinson_vectorized(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol, p_sep, t_sep)
+
+
+@Instr.timed("oil_density")
+def oil_density_vectorized_wrapper(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol=None, oil_fvf=None, p_sep=None,
+                                   t_sep=None, **kwargs):
+    return Oil_Den.oil_density_vectorized(pressure, temp, oil_api, sg_gas, p_bubble, gas_sol, oil_fvf, p_sep, t_sep)
+
+
+def dynamic_wrapper(function, **kwargs):
+    # Pass only the arguments the function takes, a function with **kwargs takes them all
+    parameters: Optional[frozenset] = _parameters(function)
+    if parameters is None:
+        return function(**kwargs)
+    return function(**{key: val for key, val in kwargs.items() if key in parameters})
+
+
+@functools.lru_cache(maxsize=None)
+def _parameters(function) -> Optional[frozenset]:
+    # Names of the arguments of a function, read from its signature once
+    parameters = inspect.signature(function).parameters
+    if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return None
+    return frozenset(parameters)
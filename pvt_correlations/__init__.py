@@ -0,0 +1,66 @@
+import importlib
+
+__version__: str = "0.0.1"
+
+# Modules of the package. Nothing is imported with the package itself: the modules, and the public names below, are
+# imported on first access, so numpy is only loaded once a correlation is used and pandas once a DataFrame is built.
+# typing is left out on purpose, importing it takes longer than the rest of the package
+_MODULES: list = [
+    'Backends', 'Batch_Runner', 'Benchmark', 'Comparison', 'Constants', 'Fluid', 'Gas_Compressibility_Factor',
+    'Gas_Compressibility_Table', 'Gas_Density', 'Gas_Formation_Volume_Factor', 'Gas_Solubility', 'Gas_Viscosity',
+    'Instrumentation', 'Oil_Density', 'Oil_Formation_Volume_Factor', 'Oil_Visocsity', 'Pressure_Grid',
+    'Property_Graph', 'PVT', 'PVT_Cache', 'PVT_Cube', 'PVT_Lookup', 'PVT_Result', 'PVT_Server', 'PVT_Stream',
+    'PVT_Table', 'Registry', 'Simulator_Export', 'Uncertainty', 'Wrappers'
+]
+
+# Public API available from the package root, and the module each name is defined in
+_API: dict = {
+    'pvt_table': 'PVT_Table',
+    'PVTResult': 'PVT_Result',
+    'PVTCache': 'PVT_Cache',
+    'pvt_cube': 'PVT_Cube',
+    'pvt_uncertainty': 'Uncertainty',
+    'compare_correlations': 'Comparison',
+    'adaptive_pressures': 'Pressure_Grid',
+    'sample_inputs': 'Uncertainty',
+    'run_batch': 'Batch_Runner',
+    'BatchResult': 'Batch_Runner',
+    'read_catalog': 'PVT',
+    'run_catalog': 'PVT',
+    'PVTLookup': 'PVT_Lookup',
+    'pvt_table_chunks': 'PVT_Stream',
+    'write_pvt_table': 'PVT_Stream',
+    'read_pvt_table': 'PVT_Stream',
+    'write_deck': 'Simulator_Export',
+    'FluidModel': 'Fluid',
+    'compile_fluid_model': 'Fluid',
+    'PropertyGraph': 'Property_Graph',
+    'evaluate_columns': 'Property_Graph',
+    'Correlation': 'Registry',
+    'register_correlation': 'Registry',
+    'get_correlation': 'Registry',
+    'available_correlations': 'Registry',
+    'instrument': 'Instrumentation',
+    'available_backends': 'Backends',
+    'set_backend': 'Backends',
+    'check_backends': 'Backends'
+}
+
+__all__: list = list(_API) + _MODULES
+
+
+def __getattr__(name: str):
+    if name in _API:
+        value = getattr(importlib.import_module(f".{_API[name]}", __name__), name)
+    elif name in _MODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Later accesses find the name directly, without going through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+import sys
+
+from .PVT import main
+
+sys.exit(main())
@@ -4,7 +4,10 @@ setup(
     name="PVT_Correlations",        # Name of your package
     version="0.0.1",            # Package version
     packages=find_packages(), # Automatically find sub-packages like "my_package"
-    install_requires=[],      # List dependencies here, if any
+    package_data={"pvt_correlations": ["benchmark_baseline.json"]},  # Reference results of Benchmark.py
+    install_requires=["numpy"],  # pandas is only needed for DataFrame results
+    extras_require={"pandas": ["pandas"], "numba": ["numba"], "parquet": ["pyarrow"]},
+    entry_points={"console_scripts": ["pvt-correlations=pvt_correlations.PVT:main"]},
     description="Package to create a PVT Table using various correlations",
     author="Omkar Kurlekar",
     # author_email="your.email@example.com",
@@ -0,0 +1,106 @@
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from pvt_correlations import Backends
+from pvt_correlations import Property_Graph as Prop_Graph
+
+requires_numba = pytest.mark.skipif(importlib.util.find_spec("numba") is None, reason="numba is not installed")
+
+KERNELS = sorted(Backends.BACKENDS['numpy'].kernels)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _assert_same(actual, expected, rtol=1e-10):
+    actual, expected = np.asarray(actual), np.asarray(expected)
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    finite = ~np.isnan(expected)
+    np.testing.assert_allclose(actual[finite], expected[finite], rtol=rtol)
+
+
+@requires_numba
+def test_numba_backend_has_every_kernel():
+    assert 'numba' in Backends.available_backends()
+    assert sorted(Backends.get_backend('numba').kernels) == KERNELS
+
+
+@requires_numba
+@pytest.mark.parametrize("key", KERNELS, ids=[f"{prop}:{corr}" for prop, corr in KERNELS])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_kernel_matches_numpy(key, seed):
+    inputs = Backends._random_inputs(20000, seed)[key]
+    with np.errstate(all='ignore'):
+        expected = Backends.get_backend('numpy').kernels[key](*inputs)
+        actual = Backends.get_backend('numba').kernels[key](*inputs)
+    _assert_same(actual, expected)
+
+
+@requires_numba
+@pytest.mark.parametrize("key", KERNELS, ids=[f"{prop}:{corr}" for prop, corr in KERNELS])
+def test_kernel_broadcasts_like_numpy(key):
+    # Scalars and arrays of different shapes, as the property graph passes them
+    inputs = [np.asarray(value)[:6] for value in Backends._random_inputs(6, 3)[key]]
+    broadcast = [inputs[0].reshape(2, 3)] + [float(value[0]) for value in inputs[1:]]
+    with np.errstate(all='ignore'):
+        expected = Backends.get_backend('numpy').kernels[key](*broadcast)
+        actual = Backends.get_backend('numba').kernels[key](*broadcast)
+    _assert_same(actual, expected)
+
+
+@requires_numba
+def test_pvt_columns_match_across_backends():
+    inputs = {'pressure': np.linspace(0, 5000, 1001), 'temp': 620, 'oil_api': 35, 'sg_gas': 0.68,
+              'p_bubble': 1700, 'p_sep': 120, 't_sep': 520}
+    with np.errstate(all='ignore'):
+        expected = Prop_Graph.evaluate_columns(inputs, backend='numpy')
+        actual = Prop_Graph.evaluate_columns(inputs, backend='numba')
+    for column in expected:
+        _assert_same(actual[column], expected[column])
+
+
+@requires_numba
+def test_check_backends_passes():
+    differences = Backends.check_backends()
+    assert set(differences['numba']) == {f"{prop}:{corr}" for prop, corr in KERNELS}
+
+
+def test_check_backends_reports_a_differing_backend():
+    numpy_kernels = Backends.BACKENDS['numpy'].kernels
+    key = ('oil_visc', "Beggs Robinson")
+    kernels = {**numpy_kernels, key: lambda *args: numpy_kernels[key](*args) * (1 + 1e-6)}
+    Backends.register_backend(Backends.Backend('perturbed', kernels))
+    try:
+        with pytest.raises(ValueError, match="perturbed backend differs from numpy on oil_visc:Beggs Robinson"):
+            Backends.check_backends(num_points=1000)
+    finally:
+        del Backends.BACKENDS['perturbed']
+
+
+def _run_numba_kernels(tmp_path, **env):
+    # Runs the numba kernels from a copy of the package, so the files they cache can be found
+    shutil.copytree(os.path.join(ROOT, 'pvt_correlations'), tmp_path / 'pvt_correlations',
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    environ = {name: value for name, value in os.environ.items() if name != 'NUMBA_CACHE_DIR'}
+    script = "from pvt_correlations import Backends\nBackends.check_backends(num_points=100)\n"
+    subprocess.run([sys.executable, '-c', script], check=True, timeout=300,
+                   env=dict(environ, PYTHONPATH=str(tmp_path), PYTHONDONTWRITEBYTECODE='1', **env))
+    return sorted(path.name for path in tmp_path.rglob('*') if path.suffix in ('.nbi', '.nbc'))
+
+
+@requires_numba
+def test_numba_kernels_are_not_cached_in_the_package(tmp_path):
+    assert _run_numba_kernels(tmp_path) == []
+
+
+@requires_numba
+def test_numba_kernels_are_cached_in_numba_cache_dir(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    _run_numba_kernels(tmp_path / 'package', NUMBA_CACHE_DIR=str(cache_dir))
+    assert any(path.suffix == '.nbi' for path in cache_dir.rglob('*'))
+    assert not any(path.suffix in ('.nbi', '.nbc') for path in (tmp_path / 'package').rglob('*'))
@@ -0,0 +1,81 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from pvt_correlations import Backends
+from pvt_correlations import Batch_Runner
+from pvt_correlations import PVT_Table
+
+requires_numba = pytest.mark.skipif(importlib.util.find_spec("numba") is None, reason="numba is not installed")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORD = {'pressure_max': 3000, 'p_bubble': 1700, 'temp': 620, 'oil_api': 35, 'sg_gas': 0.68, 'p_sep': 120,
+          't_sep': 520, 'num_points': 21}
+
+
+@pytest.fixture
+def numba_backend():
+    Backends.set_backend('numba')
+    yield
+    Backends.set_backend(None)
+
+
+@pytest.mark.parametrize('num_records, workers', [(1, 4), (8, 2), (30, 4), (1000, 4), (1000, 1)])
+def test_every_worker_gets_chunks(num_records, workers):
+    chunks = Batch_Runner._split_records([RECORD] * num_records, workers, None)
+    assert len(chunks) >= min(num_records, workers)
+    assert max(len(chunk) for chunk in chunks) <= Batch_Runner.MAX_CHUNK_SIZE
+    assert [index for chunk in chunks for index, _ in chunk] == list(range(num_records))
+
+
+def test_chunk_size_can_be_given():
+    chunks = Batch_Runner._split_records([RECORD] * 10, 4, 3)
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+
+
+def test_small_batch_runs_on_every_worker():
+    records = [dict(RECORD, p_bubble=p_bubble) for p_bubble in np.linspace(1000, 2500, 8)]
+    result = Batch_Runner.run_batch(records, workers=2, start_method='forkserver')
+    assert result.stats['tables'] == 8
+    for index, record in enumerate(records):
+        expected = PVT_Table.pvt_table(**record)
+        np.testing.assert_array_equal(result.table(index).to_numpy(), expected.to_numpy())
+
+
+def test_workers_report_the_default_backend():
+    result = Batch_Runner.run_batch([RECORD] * 4, workers=1)
+    assert [worker['backend'] for worker in result.stats['workers'].values()] == ['numpy']
+
+
+@requires_numba
+@pytest.mark.parametrize("start_method", ["forkserver", "spawn"])
+def test_workers_use_the_selected_backend(numba_backend, start_method):
+    records = [dict(RECORD, temp=580 + 10 * index) for index in range(8)]
+    result = Batch_Runner.run_batch(records, workers=2, chunk_size=2, start_method=start_method)
+    serial = Batch_Runner.run_batch(records, workers=1)
+
+    assert {worker['backend'] for worker in result.stats['workers'].values()} == {'numba'}
+    assert all(pid != os.getpid() for pid in result.stats['workers'])
+    np.testing.assert_allclose(result.values, serial.values, rtol=1e-10)
+
+
+def test_unknown_start_method_is_an_error():
+    with pytest.raises(ValueError):
+        Batch_Runner.run_batch([RECORD] * 2, workers=2, start_method='thread')
+
+
+@requires_numba
+def test_batch_runner_exits_after_numba_kernels():
+    # Worker processes forked after the parallel kernels ran left the interpreter hanging on exit
+    script = ("from pvt_correlations import Backends, Batch_Runner\n"
+              "Backends.check_backends(num_points=1000)\n"
+              f"record = {RECORD!r}\n"
+              "print(Batch_Runner.run_batch([record] * 8, workers=2, start_method='forkserver').stats['tables'])\n")
+    completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=120,
+                               env=dict(os.environ, PYTHONPATH=ROOT))
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.split() == ['8']
@@ -0,0 +1,68 @@
+import copy
+import json
+
+import pytest
+
+from pvt_correlations import Benchmark
+
+
+def _stored_baseline():
+    with open(Benchmark.BASELINE_FILE) as baseline_file:
+        return json.load(baseline_file)
+
+
+def test_stored_baseline_covers_the_reduced_run():
+    baseline = _stored_baseline()
+    assert baseline['meta']['sizes'] == Benchmark.BASELINE_SIZES
+    sizes = {result['num_points'] for result in baseline['pvt_table'].values()}
+    assert sizes == set(Benchmark.BASELINE_SIZES)
+    for section in ('import', 'correlations', 'z_factor', 'pvt_table'):
+        assert baseline[section]
+
+
+def test_baseline_has_no_regressions_against_itself():
+    baseline = _stored_baseline()
+    assert Benchmark.compare_to_baseline(baseline, baseline) == []
+
+
+def test_slower_timing_is_a_regression():
+    baseline = _stored_baseline()
+    results = copy.deepcopy(baseline)
+    name, result = next(iter(results['pvt_table'].items()))
+    result['ns_per_point'] *= 1.5
+    regressions = Benchmark.compare_to_baseline(results, baseline, threshold=0.2)
+    assert [(regression['section'], regression['benchmark']) for regression in regressions] == [('pvt_table', name)]
+
+
+def test_batched_timings_need_the_same_number_of_points():
+    baseline = _stored_baseline()
+    results = copy.deepcopy(baseline)
+    results['meta']['points'] = baseline['meta']['points'] // 10
+    for result in results['correlations'].values():
+        if result['batched_ns_per_point'] is not None:
+            result['batched_ns_per_point'] *= 2
+    assert Benchmark.compare_to_baseline(results, baseline) == []
+
+
+
+def test_timings_are_scaled_by_the_speed_of_the_machine():
+    baseline = _stored_baseline()
+    results = copy.deepcopy(baseline)
+    for name in results['calibration']:
+        results['calibration'][name] *= 2
+    for result in results['pvt_table'].values():
+        result['ns_per_point'] *= 2
+    assert Benchmark.machine_scale(results, baseline) == pytest.approx(2.0)
+    assert Benchmark.compare_to_baseline(results, baseline, threshold=0.2) == []
+
+
+def test_errors_are_not_scaled_by_the_speed_of_the_machine():
+    baseline = _stored_baseline()
+    results = copy.deepcopy(baseline)
+    for name in results['calibration']:
+        results['calibration'][name] *= 2
+    name, result = next((name, result) for name, result in results['z_factor'].items() if result['max_rel_error'])
+    result['ns_per_point'] *= 2
+    result['max_rel_error'] *= 1.5
+    regressions = Benchmark.compare_to_baseline(results, baseline, threshold=0.2)
+    assert [(regression['benchmark'], regression['metric']) for regression in regressions] == [(name, 'max_rel_error')]
@@ -0,0 +1,90 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pvt_correlations import Comparison
+from pvt_correlations import PVT_Table
+from pvt_correlations import Property_Graph
+
+CONDITIONS = (3000, 1700, 620, 35, 0.68, 120, 520, 31)
+CORRELATION_ARGS = {'gas_sol': 'gas_sol_corr', 'gas_comp_factor': 'gas_comp_corr', 'gas_visc': 'gas_visc_corr',
+                    'oil_fvf': 'oil_fvf_corr', 'oil_visc': 'oil_visc_corr'}
+
+
+@pytest.fixture(scope='module')
+def comparison():
+    return Comparison.compare_correlations(*CONDITIONS)
+
+
+def _tables():
+    # Table of every combination of the registered correlations, run one by one
+    choices = {prop: list(Property_Graph.CORRELATION_NODES[prop]) for prop in Property_Graph.DEFAULT_CORRELATIONS}
+    for combination in itertools.product(*choices.values()):
+        yield PVT_Table.pvt_table(*CONDITIONS, **{CORRELATION_ARGS[prop]: corr for prop, corr in
+                                                  zip(choices, combination)})
+
+
+def test_variants_are_the_columns_of_the_individual_tables(comparison):
+    np.testing.assert_array_equal(comparison.pressure, np.linspace(0, 3000, 31))
+    matched = {column: set() for column in comparison.variants}
+    for table in _tables():
+        for column, variants in comparison.variants.items():
+            labels = [label for label, values in variants.items()
+                      if np.array_equal(values, table[column].to_numpy(), equal_nan=True)]
+            assert labels, f"No variant of {column} is the one of the table"
+            matched[column].update(labels)
+    # Every variant is the column of one of the tables
+    assert matched == {column: set(variants) for column, variants in comparison.variants.items()}
+
+
+def test_variants_are_labelled_with_the_correlations_they_depend_on(comparison):
+    table = PVT_Table.pvt_table(*CONDITIONS, gas_sol_corr="Standing", gas_comp_corr="Papay", oil_fvf_corr="Standing")
+    labelled = {('Oil FVF', "Standing (gas_sol: Standing)"), ('Oil FVF', "Vasquez Beggs"),
+                ('Gas Viscosity', "Lee Gonzalez Eakin (gas_comp_factor: Papay)"), ('Gas FVF', "gas_comp_factor: Papay"),
+                ('Oil Density', "gas_sol: Standing, oil_fvf: Standing"), ('Gas Density', "Any")}
+    for column, label in labelled:
+        expected = PVT_Table.pvt_table(*CONDITIONS)[column] if label == "Vasquez Beggs" else table[column]
+        np.testing.assert_array_equal(comparison.variants[column][label], expected, err_msg=label)
+
+
+def test_deviations_of_every_pair_of_variants(comparison):
+    for row in comparison.deviations:
+        a = comparison.variants[row['property']][row['correlation_a']]
+        b = comparison.variants[row['property']][row['correlation_b']]
+        # Zero pressure, where the gas properties are undefined, is left out
+        with np.errstate(invalid='ignore'):
+            defined = np.isfinite(a - b)
+            absolute = np.abs(a - b)[defined]
+        relative = np.where(absolute == 0, 0.0, absolute / (0.5 * (np.abs(a) + np.abs(b)))[defined])
+        assert row['max_abs'] == pytest.approx(absolute.max())
+        assert row['max_rel'] == pytest.approx(relative.max())
+        assert row['mean_rel'] == pytest.approx(relative.mean())
+    num_pairs = sum(len(variants) * (len(variants) - 1) // 2 for variants in comparison.variants.values())
+    assert len(comparison.deviations) == num_pairs
+    table = comparison.deviation_table()
+    assert table.index.names == ['property', 'correlation_a', 'correlation_b'] and len(table) == num_pairs
+
+
+def test_shared_properties_are_calculated_once(comparison):
+    assert comparison.stats['combinations'] == 2 * 5 * 1 * 2 * 1
+    assert comparison.stats['calculated'] < comparison.stats['without_sharing']
+    frame = comparison.to_pandas()
+    assert frame.shape == (31, sum(len(variants) for variants in comparison.variants.values()))
+    np.testing.assert_array_equal(frame[('Gas Solubility', "Standing")], comparison.variants['Gas Solubility']
+                                  ['Standing'])
+
+
+def test_compared_correlations_and_columns_can_be_chosen():
+    comparison = Comparison.compare_correlations(*CONDITIONS, columns=['Gas FVF', 'Oil Compressibility'],
+                                                 correlations={'gas_comp_factor': ["Papay", "Beggs Brill"]})
+    assert list(comparison.variants) == ['Gas FVF', 'Oil Compressibility']
+    assert list(comparison.variants['Gas FVF']) == ["gas_comp_factor: Papay", "gas_comp_factor: Beggs Brill"]
+    # The properties left out take every registered correlation
+    assert comparison.stats['combinations'] == 2 * 2 * 2
+    table = PVT_Table.pvt_table(*CONDITIONS, gas_comp_corr="Beggs Brill", derivatives=True)
+    for column in comparison.variants:
+        np.testing.assert_array_equal(comparison.variants[column][list(comparison.variants[column])[-1]],
+                                      table[column])
+    with pytest.raises(ValueError, match="Unknown columns"):
+        Comparison.compare_correlations(*CONDITIONS, columns=['Water FVF'])
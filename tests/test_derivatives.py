@@ -0,0 +1,66 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pvt_correlations import Gas_Compressibility_Factor as Gas_Comp
+from pvt_correlations import Gas_Compressibility_Table as Gas_Comp_Tab
+from pvt_correlations import PVT_Table
+from pvt_correlations import Property_Graph
+
+CONDITIONS = (4000, 1700, 620, 35, 0.68, 120, 520)
+# Pressures of a 9 point table but zero, none of them near the bubble point where the derivatives jump
+NUM_POINTS = 9
+STEP = 0.5
+
+# The default Hall-Yarborough solver stops at a reduced density tolerance of 1e-3, so its derivative is the one of the
+# exact solution only to within a few tenths of a percent
+GAS_COMP_RTOL = {"Carnahan Starling": 5e-3, "Carnahan Starling Tabulated": 1e-4}
+
+
+def _columns(pressure, correlations):
+    _, p_bubble, temp, oil_api, sg_gas, p_sep, t_sep = CONDITIONS
+    inputs = {'pressure': pressure, 'temp': temp, 'oil_api': oil_api, 'sg_gas': sg_gas, 'p_bubble': p_bubble,
+              'p_sep': p_sep, 't_sep': t_sep}
+    return Property_Graph.evaluate_columns(inputs, correlations=correlations)
+
+
+@pytest.mark.parametrize('gas_sol_corr, gas_comp_corr, oil_fvf_corr', list(itertools.product(
+    ["Standing", "Vasquez Beggs"],
+    ["Carnahan Starling", "Carnahan Starling Tabulated", "Papay", "Beggs Brill", "Dranchuk Abou Kassem"],
+    ["Standing", "Vasquez Beggs"])))
+def test_derivatives_match_finite_differences(gas_sol_corr, gas_comp_corr, oil_fvf_corr):
+    table = PVT_Table.pvt_table(*CONDITIONS, NUM_POINTS, derivatives=True, gas_sol_corr=gas_sol_corr,
+                                gas_comp_corr=gas_comp_corr, oil_fvf_corr=oil_fvf_corr)
+    correlations = {'gas_sol': gas_sol_corr, 'gas_comp_factor': gas_comp_corr, 'oil_fvf': oil_fvf_corr}
+    pressure = table['Pressure'].to_numpy()[1:]
+    above, below = _columns(pressure + STEP, correlations), _columns(pressure - STEP, correlations)
+    slope = {column: (above[column] - below[column]) / (2 * STEP) for column in Property_Graph.COLUMNS}
+    values = {column: table[column].to_numpy()[1:] for column in table.columns}
+
+    gas_rtol = GAS_COMP_RTOL.get(gas_comp_corr, 1e-5)
+    for column in ['Gas Solubility', 'Oil FVF', 'Oil Viscosity']:
+        np.testing.assert_allclose(values[f'{column} Derivative'], slope[column], rtol=1e-6, atol=1e-12,
+                                   err_msg=column)
+    for column in ['Gas Compressibility Factor', 'Gas FVF', 'Gas Viscosity']:
+        np.testing.assert_allclose(values[f'{column} Derivative'], slope[column], rtol=gas_rtol, err_msg=column)
+
+    # The compressibilities are the relative changes of the gas FVF, and of the oil FVF with the gas released below
+    # the bubble point, in ft3/scf to bbl/scf
+    np.testing.assert_allclose(values['Gas Compressibility'], -slope['Gas FVF'] / values['Gas FVF'], rtol=gas_rtol)
+    oil_comp = -slope['Oil FVF'] / values['Oil FVF']
+    oil_comp = np.where(pressure < CONDITIONS[1], oil_comp + values['Gas FVF'] / 5.615 * slope['Gas Solubility'] /
+                        values['Oil FVF'], oil_comp)
+    np.testing.assert_allclose(values['Oil Compressibility'], oil_comp, rtol=gas_rtol)
+
+
+def test_hall_yarborough_derivative_is_exact_at_the_converged_solution():
+    temp_pc, pressure_pc = Gas_Comp._standing_pseudo_critical(np.float64(0.68))
+
+    def z_factor(pressure):
+        return Gas_Comp_Tab._converged_z_factor(np.full(pressure.shape, 620 / temp_pc), pressure / pressure_pc)
+
+    pressure = np.linspace(500, 6000, 12)
+    slope = (z_factor(pressure + STEP) - z_factor(pressure - STEP)) / (2 * STEP)
+    np.testing.assert_allclose(Gas_Comp._hall_yarborough_derivative(pressure, 620.0, 0.68, z_factor(pressure)),
+                               slope, rtol=1e-6)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import Fluid
+from pvt_correlations import PVT_Table
+
+
+def test_compile_names_missing_conditions():
+    fluid = Fluid.Fluid(oil_api=35, sg_gas=0.68, p_sep=120)
+    with pytest.raises(ValueError, match="p_bubble, t_sep"):
+        fluid.compile(temp=620)
+
+
+def test_compile_conditions_can_be_passed_at_compile_time():
+    fluid = Fluid.Fluid(oil_api=35, sg_gas=0.68)
+    model = fluid.compile(temp=620, p_sep=120, t_sep=520, p_bubble=1700)
+    assert model.p_bubble == 1700.0
+
+
+CONDITIONS = {'oil_api': 35, 'sg_gas': 0.68, 'p_bubble': 1700, 'temp': 620, 'p_sep': 120, 't_sep': 520}
+
+
+def test_model_columns_match_pvt_table():
+    model = Fluid.compile_fluid_model(**CONDITIONS)
+    table = PVT_Table.pvt_table(3000, num_points=301, **CONDITIONS)
+    columns = model.pvt_columns(table['Pressure'].to_numpy())
+    assert list(columns) == list(table.columns)
+    for column in table.columns:
+        np.testing.assert_allclose(columns[column], table[column].to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('method', ['gas_solubility', 'oil_fvf', 'oil_viscosity', 'gas_comp_factor', 'gas_density',
+                                    'gas_fvf', 'gas_viscosity', 'oil_density'])
+def test_model_properties_accept_lists_and_scalars(method):
+    model = Fluid.compile_fluid_model(**CONDITIONS)
+    pressure = [500.0, 1700.0, 2500.0]
+    expected = getattr(model, method)(np.array(pressure))
+    np.testing.assert_array_equal(getattr(model, method)(pressure), expected)
+    np.testing.assert_array_equal([getattr(model, method)(value) for value in pressure], expected)
+
+
+def test_compiled_models_are_shared_and_immutable():
+    model = Fluid.compile_fluid_model(**CONDITIONS)
+    assert Fluid.compile_fluid_model(**CONDITIONS) is model
+    expected = model.oil_fvf(np.array([1000.0, 2000.0]))
+    with pytest.raises(AttributeError):
+        model.p_bubble = 2500.0
+    with pytest.raises(AttributeError):
+        del model.temp
+    assert model.p_bubble == 1700.0
+    np.testing.assert_array_equal(Fluid.compile_fluid_model(**CONDITIONS).oil_fvf(np.array([1000.0, 2000.0])),
+                                  expected)
+
+
+def test_fluid_compile_uses_the_fluid_conditions():
+    fluid = Fluid.Fluid(oil_api=35, sg_gas=0.68, p_bubble=1700, p_sep=120, t_sep=520)
+    assert repr(fluid.compile(temp=620)) == repr(Fluid.compile_fluid_model(**CONDITIONS))
+    assert fluid.compile(temp=620, p_bubble=1500).p_bubble == 1500.0
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import Gas_Compressibility_Factor as Gas_Comp
+from pvt_correlations import Gas_Compressibility_Table as Gas_Comp_Tab
+from pvt_correlations import PVT_Table
+
+
+def _reduced_inputs(temp_pr, pressure_pr):
+    theta = 1 / np.asarray(temp_pr, dtype=float)
+    alpha = 0.06125 * theta * np.exp(-1.2 * np.square(1 - theta))
+    return np.asarray(pressure_pr, dtype=float), theta, alpha
+
+
+def test_diverged_points_take_the_fallback_after_max_iter():
+    # At zero pressure the Newton iterate turns NaN, the point keeps the fallback density and reports max_iter
+    pressure_pr, theta, alpha = _reduced_inputs([1.5, 1.5], [0.0, 2.0])
+    rho_h, iterations, converged = Gas_Comp._solve_reduced_density(pressure_pr, theta, alpha, max_iter=100)
+    assert rho_h[0] == 1.0 and iterations[0] == 100 and not converged[0]
+    assert converged[1] and iterations[1] < 100
+
+
+
+# Values of the scalar solver before the vectorized one was added
+SCALAR_VALUES = [((1000, 500, 0.7), 0.7383622374678762), ((2000, 500, 0.7), 0.6092730585349032),
+                 ((14.7, 520, 0.6), 0.9976952257750545), ((3000, 620, 0.68), 0.839781529623292),
+                 ((5000, 700, 0.9), 0.990599530309159), ((6000, 560, 0.8), 1.0722399747814693)]
+
+
+@pytest.mark.parametrize('args, expected', SCALAR_VALUES)
+def test_scalar_results_are_unchanged(args, expected):
+    assert Gas_Comp.carnahan_starling_hs_eos(*args) == expected
+
+
+def test_vectorized_matches_scalar_calls():
+    pressure = np.linspace(0, 6000, 61)
+    temp = np.array([[520.0], [600.0], [700.0]])
+    sg_gas = np.array([[[0.6]], [[0.9]]])
+    compressibility = Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure, temp, sg_gas)
+    assert compressibility.shape == (2, 3, 61)
+    with np.errstate(all='ignore'):
+        expected = np.vectorize(Gas_Comp.carnahan_starling_hs_eos)(*np.broadcast_arrays(pressure, temp, sg_gas))
+    np.testing.assert_array_equal(np.isnan(compressibility), np.isnan(expected))
+    np.testing.assert_allclose(compressibility, expected, rtol=1e-13)
+
+
+def test_vectorized_returns_scalars_for_scalars():
+    compressibility = Gas_Comp.carnahan_starling_hs_eos_vectorized(1000, 500, 0.7)
+    assert np.ndim(compressibility) == 0
+    assert compressibility == pytest.approx(SCALAR_VALUES[0][1], rel=1e-13)
+
+
+def _reduced_grid(pressure_pr_max, sg_gas=0.7):
+    # Pressures and temperatures of a grid of pseudo-reduced conditions, with the converged Hall-Yarborough Z on it
+    temp_pc, pressure_pc = Gas_Comp._standing_pseudo_critical(np.float64(sg_gas))
+    temp_pr, pressure_pr = np.meshgrid(np.linspace(1.3, 2.5, 13), np.linspace(0.5, pressure_pr_max, 15))
+    return pressure_pr * pressure_pc, temp_pr * temp_pc, Gas_Comp_Tab._converged_z_factor(temp_pr, pressure_pr)
+
+
+@pytest.mark.parametrize('correlation, pressure_pr_max, atol', [(Gas_Comp.papay, 4, 0.05),
+                                                                (Gas_Comp.beggs_brill, 8, 0.06),
+                                                                (Gas_Comp.dranchuk_abou_kassem, 15, 0.01)])
+def test_correlations_are_close_to_the_converged_solution(correlation, pressure_pr_max, atol):
+    pressure, temp, expected = _reduced_grid(pressure_pr_max)
+    compressibility = correlation(pressure, temp, 0.7)
+    assert compressibility.shape == expected.shape
+    np.testing.assert_allclose(compressibility, expected, atol=atol)
+
+
+def test_dranchuk_abou_kassem_solves_its_equation_of_state():
+    pressure, temp, _ = _reduced_grid(15)
+    temp_pc, pressure_pc = Gas_Comp._standing_pseudo_critical(np.float64(0.7))
+    temp_pr, pressure_pr = temp / temp_pc, pressure / pressure_pc
+    rho_r = 0.27 * pressure_pr / (temp_pr * Gas_Comp.dranchuk_abou_kassem(pressure, temp, 0.7))
+    c1, c2, c3, c4, a11 = Gas_Comp._dranchuk_abou_kassem_coefficients(temp_pr)
+    z_eos = (1 + c1 * rho_r + c2 * rho_r ** 2 - c3 * rho_r ** 5
+             + c4 * rho_r ** 2 * (1 + a11 * rho_r ** 2) * np.exp(-a11 * rho_r ** 2))
+    np.testing.assert_allclose(z_eos, 0.27 * pressure_pr / (temp_pr * rho_r), rtol=1e-10)
+
+
+@pytest.mark.parametrize('correlation', [Gas_Comp.papay, Gas_Comp.beggs_brill, Gas_Comp.dranchuk_abou_kassem])
+def test_correlations_return_scalars_for_scalars(correlation):
+    compressibility = correlation(1000, 600, 0.7)
+    assert np.ndim(compressibility) == 0
+    assert compressibility == correlation(np.array([1000.0, 2000.0]), 600, 0.7)[0]
+
+
+@pytest.mark.parametrize('name, correlation', [("Papay", Gas_Comp.papay), ("Beggs Brill", Gas_Comp.beggs_brill),
+                                               ("Dranchuk Abou Kassem", Gas_Comp.dranchuk_abou_kassem)])
+def test_correlations_are_selectable_in_pvt_table(name, correlation):
+    table = PVT_Table.pvt_table(4000, 1700, 620, 35, 0.68, 120, 520, 9, gas_comp_corr=name)
+    expected = correlation(table['Pressure'].to_numpy()[1:], 620, 0.68)
+    np.testing.assert_allclose(table['Gas Compressibility Factor'].to_numpy()[1:], expected, rtol=1e-14)
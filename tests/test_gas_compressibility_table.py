@@ -0,0 +1,40 @@
+import os
+import numpy as np
+import pytest
+
+from pvt_correlations import Gas_Compressibility_Table as Gas_Comp_Table
+
+
+@pytest.fixture(scope="module")
+def table():
+    return Gas_Comp_Table.build_z_factor_table()
+
+
+def test_interpolation_error_within_documented_bound(table):
+    errors = Gas_Comp_Table.z_factor_table_error(table)
+    assert errors['max_error_converged'] <= Gas_Comp_Table.INTERPOLATION_ERROR
+
+
+def test_save_replaces_table_without_leaving_temporary_files(table, tmp_path):
+    path = str(tmp_path / Gas_Comp_Table.TABLE_FILE)
+    with open(path, 'wb') as truncated:
+        truncated.write(b"PK\x03\x04")
+    table.save(path)
+
+    assert os.listdir(tmp_path) == [Gas_Comp_Table.TABLE_FILE]
+    loaded = Gas_Comp_Table.ZFactorTable.load(path)
+    np.testing.assert_array_equal(loaded.z_factor, table.z_factor)
+
+
+def test_save_failure_keeps_previous_table(table, tmp_path, monkeypatch):
+    path = str(tmp_path / Gas_Comp_Table.TABLE_FILE)
+    table.save(path)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "savez", fail)
+    with pytest.raises(OSError):
+        table.save(path)
+    assert os.listdir(tmp_path) == [Gas_Comp_Table.TABLE_FILE]
+    np.testing.assert_array_equal(Gas_Comp_Table.ZFactorTable.load(path).z_factor, table.z_factor)
@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+
+from pvt_correlations import Gas_Compressibility_Factor as Gas_Comp
+from pvt_correlations import Instrumentation as Instr
+from pvt_correlations import PVT_Table
+
+CONDITIONS = (3000, 1700, 620, 35, 0.68, 120, 520, 11)
+
+
+def _z_solves(num_points):
+    Gas_Comp.carnahan_starling_hs_eos_vectorized(np.linspace(500, 3000, num_points), 620, 0.68)
+
+
+def test_newton_iterations_are_counted():
+    pressure = np.array([0.0, 1000.0, 2000.0])
+    pressure_pc, theta, alpha = Gas_Comp._carnahan_starling_invariants(np.full(3, 620.0), np.full(3, 0.68))
+    _, iterations, converged = Gas_Comp._solve_reduced_density(pressure / pressure_pc, theta, alpha)
+    with Instr.instrument() as stats:
+        Gas_Comp.carnahan_starling_hs_eos_vectorized(pressure, 620, 0.68)
+
+    assert stats.z_solves == 3
+    assert stats.to_dict()['newton_iterations'] == {int(n): int(np.sum(iterations == n)) for n in set(iterations)}
+    # Zero pressure does not converge and is recorded with its pseudo-reduced conditions
+    assert stats.non_converged == 1 and not converged[0]
+    assert stats.non_converged_points == [(0.0, float(1 / theta[0]))]
+
+
+def test_table_nodes_are_timed():
+    with Instr.instrument() as stats:
+        PVT_Table.pvt_table(*CONDITIONS)
+    correlations = stats.to_dict()['correlations']
+    for label in ("gas_sol:Vasquez Beggs", "gas_comp_factor:Carnahan Starling", "gas_visc:Lee Gonzalez Eakin",
+                  "oil_fvf:Vasquez Beggs", "oil_visc:Beggs Robinson", "oil_density"):
+        assert correlations[label]['calls'] == 1
+        assert correlations[label]['points'] == CONDITIONS[-1]
+        assert correlations[label]['time'] >= 0
+    assert stats.z_solves == CONDITIONS[-1]
+
+
+def test_nothing_is_recorded_outside_a_block():
+    with Instr.instrument() as stats:
+        pass
+    assert not Instr.ENABLED
+    _z_solves(5)
+    assert stats.z_solves == 0 and not stats.calls
+
+
+def test_nested_blocks_keep_the_outer_counts():
+    with Instr.instrument() as outer:
+        _z_solves(3)
+        with Instr.instrument() as inner:
+            _z_solves(5)
+        _z_solves(7)
+    assert inner.z_solves == 5
+    assert outer.z_solves == 15
+
+
+def test_statistics_nested_in_their_own_block_are_counted_once():
+    stats = Instr.InstrumentationStats()
+    with Instr.instrument(stats):
+        with Instr.instrument(stats):
+            _z_solves(4)
+    assert stats.z_solves == 4
+
+
+def test_threads_collect_their_own_counts():
+    num_threads = 4
+    barrier = threading.Barrier(num_threads + 1)
+    results = {}
+
+    def worker(index):
+        with Instr.instrument() as stats:
+            barrier.wait()
+            for _ in range(20):
+                _z_solves(index + 1)
+        results[index] = stats.z_solves
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    # This thread has no block of its own while the others do, so its solves go nowhere
+    barrier.wait()
+    _z_solves(100)
+    for thread in threads:
+        thread.join()
+
+    assert results == {index: 20 * (index + 1) for index in range(num_threads)}
+    assert not Instr.ENABLED
+
+
+def test_threads_can_share_statistics():
+    stats = Instr.InstrumentationStats()
+
+    def worker():
+        with Instr.instrument(stats):
+            for _ in range(50):
+                _z_solves(3)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.z_solves == 4 * 50 * 3
+    assert sum(stats.to_dict()['newton_iterations'].values()) == stats.z_solves
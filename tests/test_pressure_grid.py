@@ -0,0 +1,27 @@
+import pytest
+
+from pvt_correlations import Pressure_Grid
+from pvt_correlations import PVT_Table
+
+CONDITIONS = (3000, 1700, 620, 35, 0.68, 120, 520)
+
+
+@pytest.mark.parametrize('num_points', [3, 4, 5, 9, 10, 17])
+def test_adaptive_table_has_at_most_num_points(num_points):
+    table = PVT_Table.pvt_table(*CONDITIONS, num_points, grid="adaptive")
+    assert len(table) <= num_points
+    pressure = table['Pressure'].tolist()
+    assert pressure[0] == 0.0 and 1700.0 in pressure and pressure[-1] == 3000.0
+
+
+def test_grid_without_bubble_point_node_needs_two_points():
+    pressure, stats = Pressure_Grid.adaptive_pressures(3000, 3500, 620, 35, 0.68, 120, 520, max_points=2,
+                                                       compare_uniform=False)
+    assert pressure.tolist() == [0.0, 3000.0] and stats['points'] == 2
+
+
+@pytest.mark.parametrize('max_points, p_bubble, nodes', [(2, 1700, "zero, the bubble point and pressure_max"),
+                                                         (1, 3500, "zero and pressure_max")])
+def test_too_few_points_for_the_nodes(max_points, p_bubble, nodes):
+    with pytest.raises(ValueError, match=f"max_points of {max_points} cannot hold {nodes}"):
+        Pressure_Grid.adaptive_pressures(3000, p_bubble, 620, 35, 0.68, 120, 520, max_points=max_points)
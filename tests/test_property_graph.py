@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import Instrumentation as Instr
+from pvt_correlations import PVT_Table
+from pvt_correlations import Property_Graph
+
+INPUTS = {'pressure': np.linspace(0, 3000, 11), 'temp': 620.0, 'oil_api': 35.0, 'sg_gas': 0.68, 'p_bubble': 1700.0,
+          'p_sep': 120.0, 't_sep': 520.0}
+
+
+def _calls(graph, outputs, cache=None):
+    with Instr.instrument() as stats:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            graph.evaluate(INPUTS, outputs, cache)
+    return {label.split(':')[0]: record['calls'] for label, record in stats.to_dict()['correlations'].items()}
+
+
+def test_only_the_properties_the_outputs_depend_on_are_calculated():
+    graph = Property_Graph.PropertyGraph()
+    assert _calls(graph, ['gas_density']) == {'gas_density': 1}
+    # The Vasquez-Beggs oil FVF needs the solubility at the pressures and at the bubble point, but no gas property
+    assert set(_calls(graph, ['oil_fvf'])) == {'sg_gas_sep', 'gas_sol_vb', 'gas_sol_pb', 'oil_fvf_pb', 'oil_fvf'}
+
+
+def test_shared_properties_are_calculated_once():
+    graph = Property_Graph.PropertyGraph()
+    calls = _calls(graph, ['gas_visc', 'gas_fvf', 'oil_density', 'oil_visc'])
+    assert calls['gas_comp_factor'] == 1 and calls['gas_sol_vb'] == 1
+    assert all(count == 1 for count in calls.values())
+
+
+def test_dependencies_come_before_the_properties_using_them():
+    graph = Property_Graph.PropertyGraph({'oil_fvf': "Standing"})
+    order = graph.dependencies(['oil_density'])
+    assert order[-1] == 'oil_density'
+    for position, name in enumerate(order):
+        assert all(order.index(dep) < position for dep in graph.nodes[name].inputs if dep not in
+                   Property_Graph.INPUTS)
+
+
+def test_cache_shares_properties_between_correlations():
+    cache = {}
+    _calls(Property_Graph.PropertyGraph({'gas_comp_factor': "Papay"}), ['gas_visc', 'oil_fvf'], cache)
+    # Only the properties calculated from the other Z-factor are calculated again
+    calls = _calls(Property_Graph.PropertyGraph({'gas_comp_factor': "Beggs Brill"}), ['gas_visc', 'oil_fvf'], cache)
+    assert calls == {'gas_comp_factor': 1, 'gas_visc': 1}
+
+
+def test_columns_subset_matches_the_table():
+    columns = Property_Graph.evaluate_columns(INPUTS, ['Oil Density', 'Gas FVF'], {'gas_sol': "Standing"})
+    assert list(columns) == ['Pressure', 'Gas FVF', 'Oil Density']
+    table = PVT_Table.pvt_table(3000, 1700, 620, 35, 0.68, 120, 520, 11, gas_sol_corr="Standing")
+    for column in columns:
+        np.testing.assert_array_equal(columns[column], table[column])
+
+
+def test_unknown_correlations_and_columns_are_errors():
+    with pytest.raises(ValueError, match="Unknown correlation"):
+        Property_Graph.PropertyGraph({'gas_sol': "Glaso"})
+    with pytest.raises(ValueError, match="Unknown columns"):
+        Property_Graph.evaluate_columns(INPUTS, ['Water FVF'])
+    with pytest.raises(ValueError, match="Unknown property"):
+        Property_Graph.PropertyGraph().dependencies(['water_fvf'])
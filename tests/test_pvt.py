@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from pvt_correlations import PVT
+
+HEADER = "name,oil_api,sg_gas,p_bubble,temp,p_sep,t_sep\n"
+ROW = "35,0.68,1700,620,120,520\n"
+RECORD = {'pressure_max': 3000, 'p_bubble': 1700, 'temp': 620, 'oil_api': 35, 'sg_gas': 0.68, 'p_sep': 120,
+          't_sep': 520, 'num_points': 11}
+
+
+def _write_catalog(path, names):
+    with open(path, 'w') as catalog_file:
+        catalog_file.write(HEADER + "".join(f"{name},{ROW}" for name in names))
+    return str(path)
+
+
+@pytest.mark.parametrize('names', [["a b", "a_b"], ["well/1", "well:1"], ["Oil", "oil"]])
+def test_read_catalog_rejects_names_with_the_same_file_name(tmp_path, names):
+    path = _write_catalog(tmp_path / "catalog.csv", names)
+    with pytest.raises(ValueError, match="line 3: name .* gives the same file name as"):
+        PVT.read_catalog(path, pressure_max=3000)
+
+
+def test_read_catalog_keeps_names_with_distinct_file_names(tmp_path):
+    path = _write_catalog(tmp_path / "catalog.csv", ["a b", "a-b", "a.b"])
+    names, records = PVT.read_catalog(path, pressure_max=3000)
+    assert names == ["a b", "a-b", "a.b"]
+
+
+def test_run_catalog_rejects_names_with_the_same_file_name(tmp_path):
+    output_dir = str(tmp_path / "tables")
+    with pytest.raises(ValueError, match="same file name"):
+        PVT.run_catalog(["a b", "a_b"], [RECORD, RECORD], output_dir=output_dir)
+    assert not os.path.exists(output_dir)
+
+
+def test_run_catalog_writes_one_file_per_name(tmp_path):
+    output_dir = str(tmp_path / "tables")
+    PVT.run_catalog(["a b", "a-b"], [RECORD, RECORD], output_dir=output_dir)
+    assert sorted(os.listdir(output_dir)) == ["a-b.csv", "a_b.csv"]
+
+
+@pytest.mark.parametrize('name', ["..", ".", "...", " .. "])
+def test_read_catalog_rejects_names_escaping_the_output_directory(tmp_path, name):
+    path = _write_catalog(tmp_path / "catalog.csv", ["a", f'"{name}"'])
+    with pytest.raises(ValueError, match="line 3: name .* gives no usable file name"):
+        PVT.read_catalog(path, pressure_max=3000)
+
+
+@pytest.mark.parametrize('file_format', PVT.DIRECTORY_FORMATS)
+def test_run_catalog_writes_nothing_outside_the_output_directory(tmp_path, file_format):
+    output_dir = tmp_path / "out" / "tables"
+    with pytest.raises(ValueError, match="gives no usable file name"):
+        PVT.run_catalog(["a", ".."], [RECORD, RECORD], output_dir=str(output_dir), file_format=file_format)
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from pvt_correlations import PVT_Cache
+from pvt_correlations import PVT_Table
+from pvt_correlations import Registry
+
+CONDITIONS = (3000, 1700, 620, 35, 0.68, 120, 520, 11)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cached_table_can_be_changed(tmp_path):
+    cache = PVT_Cache.PVTCache(str(tmp_path))
+    expected = PVT_Table.pvt_table(*CONDITIONS)
+    for _ in range(3):
+        # A miss, a disk hit and a memory hit, each of them changed by the caller
+        table = PVT_Table.pvt_table(*CONDITIONS, cache=cache)
+        np.testing.assert_array_equal(table.to_numpy(), expected.to_numpy())
+        table['Oil FVF'] *= 2
+        table.loc[0, 'Gas Solubility'] = -1.0
+    assert cache.stats['writes'] == 1 and cache.stats['disk_hits'] + cache.stats['memory_hits'] == 2
+
+
+def test_correlation_registered_again_is_not_served_from_the_cache(tmp_path):
+    def register(z):
+        def constant_z(pressure, temp, sg_gas):
+            return z + 0 * pressure
+        Registry.register_correlation(Registry.Correlation('gas_comp_factor', "Constant", constant_z,
+                                                           array_func=constant_z))
+
+    try:
+        register(0.9)
+        table = PVT_Table.pvt_table(*CONDITIONS, gas_comp_corr="Constant", cache=str(tmp_path))
+        assert set(table['Gas Compressibility Factor']) == {0.9}
+        register(0.8)
+        for cache in (str(tmp_path), PVT_Cache.PVTCache(str(tmp_path))):
+            table = PVT_Table.pvt_table(*CONDITIONS, gas_comp_corr="Constant", cache=cache)
+            assert set(table['Gas Compressibility Factor']) == {0.8}
+    finally:
+        Registry.unregister_correlation('gas_comp_factor', "Constant")
+
+
+def test_fingerprint_is_the_same_in_every_process():
+    script = ("from pvt_correlations import Registry\n"
+              "print(Registry.get_correlation('gas_comp_factor', 'Carnahan Starling').fingerprint)\n")
+    # The hash seed changes the order of sets, which must not change the fingerprint
+    fingerprints = {subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                   env=dict(os.environ, PYTHONHASHSEED=str(seed), PYTHONPATH=ROOT)).stdout.strip()
+                    for seed in range(3)}
+    assert fingerprints == {Registry.get_correlation('gas_comp_factor', "Carnahan Starling").fingerprint}
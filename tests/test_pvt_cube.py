@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pvt_correlations import Fluid
+from pvt_correlations import PVT_Cube
+from pvt_correlations import PVT_Table
+
+FLUIDS = [Fluid.Fluid(35, 0.68, 1700, 120, 520), Fluid.Fluid(28, 0.75, 2200, 100, 530)]
+TEMPS = [600.0, 620.0, 640.0]
+
+
+def _table(fluid, temp, num_points, **kwargs):
+    return PVT_Table.pvt_table(3000, fluid.p_bubble, temp, fluid.oil_api, fluid.sg_gas, fluid.p_sep, fluid.t_sep,
+                               num_points, **kwargs)
+
+
+def test_cube_matches_a_table_per_fluid_and_temperature():
+    cube = PVT_Cube.pvt_cube(FLUIDS, TEMPS, 3000, 31)
+    assert list(cube) == list(PVT_Table.pvt_table(3000, 1700, 620, 35, 0.68, 120, 520, 2).columns)
+    for fluid_index, fluid in enumerate(FLUIDS):
+        for temp_index, temp in enumerate(TEMPS):
+            table = _table(fluid, temp, 31)
+            for column in table.columns:
+                assert cube[column].shape == (len(FLUIDS), len(TEMPS), 31)
+                np.testing.assert_allclose(cube[column][fluid_index, temp_index], table[column], rtol=1e-12,
+                                           err_msg=column)
+
+
+def test_cube_takes_the_fluids_as_columns_and_the_correlations_of_pvt_table():
+    correlations = {'gas_sol_corr': "Standing", 'gas_comp_corr': "Papay", 'oil_fvf_corr': "Standing"}
+    fluids = pd.DataFrame({field: [getattr(fluid, field) for fluid in FLUIDS] for field in PVT_Cube.FLUID_FIELDS})
+    cube = PVT_Cube.pvt_cube(fluids, TEMPS[:1], 3000, 11, columns=['Oil FVF'], **correlations)
+    assert list(cube) == ['Pressure', 'Oil FVF']
+    for fluid_index, fluid in enumerate(FLUIDS):
+        np.testing.assert_allclose(cube['Oil FVF'][fluid_index, 0],
+                                   _table(fluid, TEMPS[0], 11, **correlations)['Oil FVF'], rtol=1e-12)
+
+
+def test_flattened_cube_has_a_row_per_fluid_temperature_and_pressure():
+    cube = PVT_Cube.pvt_cube(FLUIDS, TEMPS, 3000, 5)
+    flat = PVT_Cube.pvt_cube(FLUIDS, TEMPS, 3000, 5, flatten=True)
+    assert len(flat) == len(FLUIDS) * len(TEMPS) * 5
+    assert list(flat.columns) == ['Fluid', 'Temperature'] + list(cube)
+    # Pressures vary fastest, then the temperatures, then the fluids
+    row = flat.iloc[1 * len(TEMPS) * 5 + 2 * 5 + 3]
+    assert (row['Fluid'], row['Temperature'], row['Pressure']) == (1, TEMPS[2], 2250.0)
+    for column in cube:
+        np.testing.assert_array_equal(flat[column].to_numpy(), cube[column].ravel())
+
+
+def test_fluid_without_a_bubble_point_is_an_error():
+    with pytest.raises(ValueError, match="p_bubble"):
+        PVT_Cube.pvt_cube([Fluid.Fluid(35, 0.68, None, 120, 520)], TEMPS, 3000, 5)
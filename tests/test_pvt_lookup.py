@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import PVT_Lookup
+from pvt_correlations import PVT_Table
+
+PRESSURE = np.array([500.0, 1000.0, 1500.0, 2000.0, 2500.0, 3000.0])
+P_BUBBLE = 1700.0
+
+
+def _kinked(pressure):
+    # Piecewise linear property with its kink at the bubble point, as the oil FVF has
+    return np.where(pressure < P_BUBBLE, 1.0 + 1e-4 * pressure, 1.0 + 1e-4 * P_BUBBLE - 2e-5 * (pressure - P_BUBBLE))
+
+
+def test_locate_picks_the_interval_of_every_query():
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': PRESSURE})
+    interval, offset = lookup._locate(np.array([100.0, 500.0, 750.0, 1000.0, 2999.0, 3000.0, 4000.0]))
+    # Queries on a knot start its interval, queries outside the table use the first or the last interval
+    np.testing.assert_array_equal(interval, [0, 0, 0, 1, 4, 4, 4])
+    np.testing.assert_array_equal(offset, [-400.0, 0.0, 250.0, 0.0, 499.0, 500.0, 1500.0])
+
+
+def test_locate_puts_the_bubble_point_in_the_undersaturated_branch():
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': _kinked(PRESSURE)}, p_bubble=P_BUBBLE)
+    np.testing.assert_array_equal(lookup._pressure, [500, 1000, 1500, P_BUBBLE, P_BUBBLE, 2000, 2500, 3000])
+    interval, offset = lookup._locate(np.array([1699.0, P_BUBBLE, 1701.0]))
+    np.testing.assert_array_equal(interval, [2, 4, 4])
+    np.testing.assert_array_equal(offset, [199.0, 0.0, 1.0])
+
+
+def test_scalar_queries_return_scalars():
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': PRESSURE, 'Twice': 2 * PRESSURE})
+    assert np.ndim(lookup.interpolate(1250.0, 'Value')) == 0
+    assert lookup.interpolate(1250.0, 'Value') == 1250.0
+    assert lookup(1250.0) == {'Value': 1250.0, 'Twice': 2500.0}
+
+
+@pytest.mark.parametrize('method', PVT_Lookup.METHODS)
+def test_knots_are_reproduced(method):
+    values = np.array([1.0, 3.0, 2.0, 2.5, 7.0, 7.5])
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': values}, method=method)
+    np.testing.assert_allclose(lookup.interpolate(PRESSURE, 'Value'), values, rtol=1e-14)
+
+
+def test_linear_matches_np_interp():
+    values = np.array([1.0, 3.0, 2.0, 2.5, 7.0, 7.5])
+    query = np.random.default_rng(0).uniform(PRESSURE[0], PRESSURE[-1], 1000)
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': values})
+    np.testing.assert_allclose(lookup.interpolate(query, 'Value'), np.interp(query, PRESSURE, values), rtol=1e-14)
+
+
+def test_pchip_is_exact_for_lines_and_keeps_monotone_data_monotone():
+    query = np.linspace(PRESSURE[0], PRESSURE[-1], 1001)
+    line = PVT_Lookup.PVTLookup(PRESSURE, {'Value': 3 + 2e-3 * PRESSURE}, method='pchip')
+    np.testing.assert_allclose(line.interpolate(query, 'Value'), 3 + 2e-3 * query, rtol=1e-13)
+
+    steps = np.array([0.0, 0.0, 1.0, 1.0, 5.0, 5.1])
+    monotone = PVT_Lookup.PVTLookup(PRESSURE, {'Value': steps}, method='pchip').interpolate(query, 'Value')
+    assert np.all(np.diff(monotone) >= -1e-12)
+    assert monotone.min() >= steps.min() and monotone.max() <= steps.max()
+
+
+@pytest.mark.parametrize('method', PVT_Lookup.METHODS)
+def test_branches_meet_at_the_bubble_point_without_interpolating_across_it(method):
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': _kinked(PRESSURE)}, p_bubble=P_BUBBLE, method=method)
+    query = np.array([1500.0, 1600.0, 1699.0, P_BUBBLE, 1701.0, 1850.0, 2000.0])
+    np.testing.assert_allclose(lookup.interpolate(query, 'Value'), _kinked(query), rtol=1e-12)
+
+
+def test_bubble_point_knot_is_shared_by_both_branches():
+    pressure = np.array([500.0, 1000.0, P_BUBBLE, 2500.0, 3000.0])
+    lookup = PVT_Lookup.PVTLookup(pressure, {'Value': _kinked(pressure)}, p_bubble=P_BUBBLE)
+    query = np.array([1200.0, P_BUBBLE, 2200.0])
+    np.testing.assert_allclose(lookup.interpolate(query, 'Value'), _kinked(query), rtol=1e-14)
+
+
+@pytest.mark.parametrize('pressure', [[500.0, 1000.0, 1500.0, 2000.0], [1500.0, 2000.0, 2500.0, 3000.0]])
+def test_single_knot_side_takes_the_bubble_point_of_the_other_side(pressure):
+    pressure = np.array(pressure)
+    lookup = PVT_Lookup.PVTLookup(pressure, {'Value': _kinked(pressure)}, p_bubble=P_BUBBLE)
+    # Both bubble point knots hold the value extrapolated from the side with two knots, rather than the single knot
+    bubble_values = lookup._values[0, lookup._pressure == P_BUBBLE]
+    assert bubble_values.size == 2
+    np.testing.assert_allclose(bubble_values, _kinked(np.array([P_BUBBLE] * 2)), rtol=1e-14)
+
+
+def test_bubble_point_between_two_single_knots_is_an_error():
+    with pytest.raises(ValueError, match="bubble point"):
+        PVT_Lookup.PVTLookup([1500.0, 2000.0], {'Value': [1.0, 2.0]}, p_bubble=P_BUBBLE)
+
+
+def test_bubble_point_outside_the_table_gives_one_branch():
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': PRESSURE}, p_bubble=4000.0)
+    np.testing.assert_array_equal(lookup._pressure, PRESSURE)
+
+
+def test_from_table_skips_zero_pressure():
+    table = PVT_Table.pvt_table(3000, P_BUBBLE, 620, 35, 0.68, 120, 520, 31)
+    lookup = PVT_Lookup.PVTLookup.from_table(table, P_BUBBLE)
+    assert 'Pressure' not in lookup.columns
+    assert lookup._pressure[0] == table['Pressure'][1]
+    np.testing.assert_allclose(lookup.interpolate(table['Pressure'][1:], 'Oil FVF'), table['Oil FVF'][1:],
+                               rtol=1e-12)
+
+
+def test_invalid_lookups_are_errors():
+    with pytest.raises(ValueError):
+        PVT_Lookup.PVTLookup([1000.0, 1000.0], {'Value': [1.0, 2.0]})
+    with pytest.raises(ValueError):
+        PVT_Lookup.PVTLookup(PRESSURE, {'Value': PRESSURE}, method='cubic')
+    lookup = PVT_Lookup.PVTLookup(PRESSURE, {'Value': PRESSURE})
+    with pytest.raises(ValueError):
+        lookup.interpolate(1000.0, 'Other')
+    with pytest.raises(ValueError):
+        lookup(1000.0, ['Value', 'Other'])
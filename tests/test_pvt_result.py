@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import PVT_Result
+from pvt_correlations import PVT_Table
+
+CONDITIONS = (4000, 1700, 620, 35, 0.68, 120, 520, 11)
+
+
+def _result(dtype=np.float64):
+    return PVT_Result.PVTResult.from_columns({'Pressure': [0.0, 1000.0, 2000.0], 'Oil FVF': [1.05, 1.2, 1.19]},
+                                             dtype)
+
+
+def test_columns_are_views_of_one_buffer():
+    result = _result()
+    assert result.values.shape == (2, 3) and result.values.flags['C_CONTIGUOUS']
+    assert result.shape == (3, 2) and len(result) == 3
+    assert list(result) == ['Pressure', 'Oil FVF'] and 'Oil FVF' in result and 'Gas FVF' not in result
+    for row, column in enumerate(result):
+        assert np.shares_memory(result[column], result.values)
+        np.testing.assert_array_equal(result[column], result.values[row])
+    result['Oil FVF'] = 1.0
+    np.testing.assert_array_equal(result.values[1], [1.0, 1.0, 1.0])
+
+
+def test_to_pandas_shares_the_buffer_unless_copied():
+    result = _result()
+    table = result.to_pandas()
+    assert list(table.columns) == result.columns
+    for column in result:
+        assert np.shares_memory(table[column].to_numpy(), result.values)
+        np.testing.assert_array_equal(table[column].to_numpy(), result[column])
+    copied = result.to_pandas(copy=True)
+    assert not any(np.shares_memory(copied[column].to_numpy(), result.values) for column in result)
+    np.testing.assert_array_equal(copied.to_numpy(), table.to_numpy())
+
+
+def test_to_records_views_the_buffer():
+    result = _result(np.float32)
+    records = result.to_records()
+    assert np.shares_memory(records, result.values)
+    assert records.dtype.names == ('Pressure', 'Oil FVF')
+    assert records['Oil FVF'].dtype == np.float32
+    np.testing.assert_array_equal(records['Oil FVF'], result['Oil FVF'])
+    assert (float(records[1]['Pressure']), float(records[1]['Oil FVF'])) == (1000.0, float(np.float32(1.2)))
+
+
+def test_astype_copies_only_when_the_dtype_changes():
+    result = _result()
+    assert result.astype(np.float64) is result
+    single = result.astype(np.float32)
+    assert single.dtype == np.float32 and single.columns == result.columns
+    np.testing.assert_array_equal(single.values, result.values.astype(np.float32))
+
+
+def test_table_output_as_a_result_in_single_precision():
+    table = PVT_Table.pvt_table(*CONDITIONS)
+    result = PVT_Table.pvt_table(*CONDITIONS, output="result", dtype=np.float32)
+    assert isinstance(result, PVT_Result.PVTResult) and result.dtype == np.float32
+    assert result.columns == list(table.columns)
+    for column in table.columns:
+        np.testing.assert_array_equal(result[column], table[column].to_numpy().astype(np.float32))
+    assert result.nbytes == table.to_numpy().nbytes // 2
+
+
+def test_buffer_of_the_wrong_shape_is_an_error():
+    with pytest.raises(ValueError):
+        PVT_Result.PVTResult(np.zeros((3, 4)), ['Pressure', 'Oil FVF'])
+    with pytest.raises(KeyError):
+        _result()['Gas FVF']
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pvt_correlations import Property_Graph as Prop_Graph
+from pvt_correlations import PVT_Server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FLUID = {'temp': 620, 'oil_api': 35, 'sg_gas': 0.68, 'p_bubble': 1700, 'p_sep': 120, 't_sep': 520}
+HUGE = int('1' + '0' * 400)
+
+
+def test_integer_beyond_float_range_is_an_error_response():
+    responses = PVT_Server.evaluate_requests([{'id': 1, 'pressure': HUGE, **FLUID},
+                                              {'id': 2, 'pressure': 1000, **FLUID}])
+    assert responses[0] == {'id': 1, 'error': "Inputs must be within the range of a float"}
+    assert responses[1]['id'] == 2 and responses[1]['oil_fvf'] > 1
+
+
+@pytest.mark.parametrize('pressure, error', [(True, "Inputs must be numbers"), (False, "Inputs must be numbers"),
+                                             ("1000", "Inputs must be numbers"), (None, "Inputs must be numbers"),
+                                             (float('nan'), "Inputs must be finite"),
+                                             (float('inf'), "Inputs must be finite"),
+                                             (-float('inf'), "Inputs must be finite")])
+def test_invalid_input_is_an_error_response(pressure, error):
+    responses = PVT_Server.evaluate_requests([{'id': 1, 'pressure': pressure, **FLUID},
+                                              {'id': 2, 'pressure': 1000, **FLUID}])
+    assert responses[0] == {'id': 1, 'error': error}
+    assert responses[1]['id'] == 2 and responses[1]['oil_fvf'] > 1
+
+
+def test_json_literals_of_invalid_inputs_are_error_responses():
+    lines = ['{"id": 1, "pressure": true, "temp": 620, "oil_api": 35, "sg_gas": 0.68, "p_bubble": 1700, '
+             '"p_sep": 120, "t_sep": 520}',
+             '{"id": 2, "pressure": NaN, "temp": 620, "oil_api": 35, "sg_gas": 0.68, "p_bubble": 1700, '
+             '"p_sep": 120, "t_sep": 520}',
+             '{"id": 3, "pressure": 1e400, "temp": 620, "oil_api": 35, "sg_gas": 0.68, "p_bubble": 1700, '
+             '"p_sep": 120, "t_sep": 520}']
+    responses = PVT_Server.evaluate_requests([json.loads(line) for line in lines])
+    assert [response.get('error') for response in responses] == ["Inputs must be numbers", "Inputs must be finite",
+                                                                   "Inputs must be finite"]
+
+
+def test_failing_group_is_answered_with_errors(monkeypatch):
+    def fail(self, inputs, outputs, cache=None):
+        raise RuntimeError("broken correlation")
+
+    monkeypatch.setattr(Prop_Graph.PropertyGraph, 'evaluate', fail)
+    responses = PVT_Server.evaluate_requests([{'id': 1, 'pressure': 1000, **FLUID}])
+    assert responses[0]['id'] == 1 and "broken correlation" in responses[0]['error']
+
+
+def test_batcher_keeps_running_after_a_failed_batch(monkeypatch):
+    evaluate_requests = PVT_Server.evaluate_requests
+    calls = []
+
+    def fail_once(requests):
+        calls.append(len(requests))
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return evaluate_requests(requests)
+
+    monkeypatch.setattr(PVT_Server, 'evaluate_requests', fail_once)
+
+    async def run():
+        batcher = PVT_Server.MicroBatcher(window=0.0)
+        batching = asyncio.create_task(batcher.run())
+        try:
+            first = await asyncio.wait_for(batcher.submit({'id': 1, 'pressure': 1000, **FLUID}), 5)
+            second = await asyncio.wait_for(batcher.submit({'id': 2, 'pressure': 1000, **FLUID}), 5)
+        finally:
+            batching.cancel()
+        return first, second, batcher.stats
+
+    first, second, stats = asyncio.run(run())
+    assert first['id'] == 1 and "unexpected" in first['error']
+    assert second['id'] == 2 and 'oil_fvf' in second
+    assert stats.errors == 1 and stats.requests == 2
+
+
+def test_stdio_server_answers_after_an_invalid_request():
+    # An integer beyond the range of a float, nesting deeper than the JSON parser recurses, and a line longer than
+    # the limit of the stream
+    lines = [json.dumps({'id': 1, 'pressure': HUGE, **FLUID}), '[' * 10000, '[' * 200000,
+             json.dumps({'id': 2, 'pressure': 1000, **FLUID})]
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run([sys.executable, '-m', 'pvt_correlations.PVT_Server'], input="\n".join(lines) + "\n",
+                               capture_output=True, text=True, timeout=60, env=env)
+    responses = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert [response.get('id') for response in responses] == [1, None, None, 2]
+    assert all('error' in response for response in responses[:3]) and 'oil_fvf' in responses[3]
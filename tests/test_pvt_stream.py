@@ -0,0 +1,73 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+from pvt_correlations import PVT_Stream
+from pvt_correlations import PVT_Table
+
+requires_pyarrow = pytest.mark.skipif(importlib.util.find_spec("pyarrow") is None, reason="pyarrow is not installed")
+
+CONDITIONS = (3000, 1700, 620, 35, 0.68, 120, 520, 301)
+
+
+@pytest.mark.parametrize('num_points, chunk_size', [(301, 128), (301, 301), (301, 1000), (2, 1), (1, 4), (7, 3)])
+def test_pressure_chunks_are_the_full_range(num_points, chunk_size):
+    chunks = list(PVT_Stream.pressure_chunks(3000, num_points, chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks), np.linspace(0, 3000, num_points))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 128, 301, 1000])
+def test_chunks_put_together_are_the_table(chunk_size):
+    chunks = list(PVT_Stream.pvt_table_chunks(*CONDITIONS, chunk_size=chunk_size))
+    expected = PVT_Table.pvt_table(*CONDITIONS)
+    assert len(chunks) == -(-CONDITIONS[-1] // chunk_size)
+    for column in expected.columns:
+        np.testing.assert_array_equal(np.concatenate([chunk[column] for chunk in chunks]), expected[column])
+
+
+def _assert_table(table, expected):
+    assert list(table) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_array_equal(np.asarray(table[column]), expected[column].to_numpy())
+
+
+@pytest.mark.parametrize('file_format, name', [('npy', "table"), ('csv', "table.csv"),
+                                               pytest.param('parquet', "table.parquet", marks=requires_pyarrow)])
+def test_written_table_reads_back(tmp_path, file_format, name):
+    path = PVT_Stream.write_pvt_table(str(tmp_path / name), *CONDITIONS, file_format=file_format, chunk_size=128)
+    _assert_table(PVT_Stream.read_pvt_table(path), PVT_Table.pvt_table(*CONDITIONS))
+
+
+def test_npy_table_reads_back_into_memory(tmp_path):
+    path = PVT_Stream.write_pvt_table(str(tmp_path / "table"), *CONDITIONS, chunk_size=100)
+    table = PVT_Stream.read_pvt_table(path, mmap=False)
+    assert not any(isinstance(values, np.memmap) for values in table.values())
+    _assert_table(table, PVT_Table.pvt_table(*CONDITIONS))
+
+
+def test_npy_table_can_be_rewritten(tmp_path):
+    path = str(tmp_path / "table")
+    PVT_Stream.write_pvt_table(path, *CONDITIONS[:-1], 11)
+    PVT_Stream.write_pvt_table(path, *CONDITIONS, chunk_size=128)
+    _assert_table(PVT_Stream.read_pvt_table(path, mmap=False), PVT_Table.pvt_table(*CONDITIONS))
+
+
+def test_interrupted_rewrite_does_not_read_as_complete(tmp_path):
+    path = str(tmp_path / "table")
+    PVT_Stream.write_pvt_table(path, *CONDITIONS)
+
+    def failing_chunks():
+        yield from PVT_Stream.pvt_table_chunks(*CONDITIONS, chunk_size=128)
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        PVT_Stream._write_npy(path, failing_chunks(), CONDITIONS[-1])
+    with pytest.raises(FileNotFoundError):
+        PVT_Stream.read_pvt_table(path)
+
+
+def test_unknown_file_format_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        PVT_Stream.write_pvt_table(str(tmp_path / "table.txt"), *CONDITIONS, file_format="txt")
@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pvt_correlations import PVT_Table
+
+CONDITIONS = (4000, 1700, 620, 35, 0.68, 120, 520)
+
+# Table of the original row by row pvt_table for CONDITIONS and five pressures
+ORIGINAL_TABLE = {
+    'Pressure': [0.0, 1000.0, 2000.0, 3000.0, 4000.0],
+    'Gas Solubility': [0.0, 170.482944874163, 320.05440458383754, 320.05440458383754, 320.05440458383754],
+    'Gas Compressibility Factor': [0.0, 0.8934847284277695, 0.8329312325560074, 0.839781529623292, 0.897630731351391],
+    'Gas Density': [0.0, 2.9597273698642317, 5.919454739728463, 8.879182109592696, 11.838909479456927],
+    'Gas FVF': [np.nan, 0.015660464229044886, 0.007299559442751082, 0.00490639559410643, 0.0039332832201720925],
+    'Gas Viscosity': [np.nan, 0.013925364797425024, 0.0167289382675669, 0.020465507158485483, 0.02422192182047469],
+    'Oil FVF': [1.0564816170063993, 1.1372675319677972, 1.2031354557568645, 1.1907295266155944, 1.1820050367380468],
+    'Oil Viscosity': [2.7736843398431565, 1.3189457489664573, 0.9836872430184317, 1.1113025237740302,
+                      1.280608080722561],
+    'Oil Density': [50.19550721658171, 48.01619264584188, 46.53714882751888, 47.02200836773025, 47.3690822153666]
+}
+
+
+def _assert_same_table(table, expected, rtol=1e-12):
+    assert list(table.columns) == list(expected)
+    for column in expected:
+        np.testing.assert_allclose(table[column].to_numpy(), expected[column], rtol=rtol, err_msg=column)
+
+
+@pytest.mark.parametrize('columnar', [True, False])
+def test_table_matches_the_original_row_by_row_table(columnar):
+    _assert_same_table(PVT_Table.pvt_table(*CONDITIONS, 5, columnar=columnar), ORIGINAL_TABLE)
+
+
+@pytest.mark.parametrize('gas_sol_corr, gas_comp_corr, oil_fvf_corr', list(itertools.product(
+    ["Standing", "Vasquez Beggs"],
+    ["Carnahan Starling", "Carnahan Starling Tabulated", "Papay", "Beggs Brill", "Dranchuk Abou Kassem"],
+    ["Standing", "Vasquez Beggs"])))
+def test_columnar_table_matches_the_row_table(gas_sol_corr, gas_comp_corr, oil_fvf_corr):
+    correlations = {'gas_sol_corr': gas_sol_corr, 'gas_comp_corr': gas_comp_corr, 'oil_fvf_corr': oil_fvf_corr}
+    row_table = PVT_Table.pvt_table(*CONDITIONS, 41, columnar=False, **correlations)
+    columnar_table = PVT_Table.pvt_table(*CONDITIONS, 41, **correlations)
+    _assert_same_table(columnar_table, {column: row_table[column].to_numpy() for column in row_table.columns})
+
+
+def test_columns_keep_the_table_order_after_the_pressure():
+    for columnar in (True, False):
+        table = PVT_Table.pvt_table(*CONDITIONS, 5, columnar=columnar, columns=['Oil FVF', 'Gas Solubility'])
+        assert list(table.columns) == ['Pressure', 'Gas Solubility', 'Oil FVF']
+        np.testing.assert_array_equal(table['Oil FVF'], ORIGINAL_TABLE['Oil FVF'])
+
+
+def test_invalid_options_are_errors():
+    with pytest.raises(ValueError):
+        PVT_Table.pvt_table(*CONDITIONS, 5, output="numpy")
+    with pytest.raises(ValueError):
+        PVT_Table.pvt_table(*CONDITIONS, 5, grid="log")
+    with pytest.raises(ValueError):
+        PVT_Table.pvt_table(*CONDITIONS, 5, columnar=False, derivatives=True)
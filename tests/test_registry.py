@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from pvt_correlations import Oil_Formation_Volume_Factor as Oil_FVF
+from pvt_correlations import PVT_Table
+from pvt_correlations import Registry
+
+CONDITIONS = (4000, 1700, 620, 35, 0.68, 120, 520, 9)
+
+
+def linear_gas_solubility(pressure, p_bubble, slope=0.1):
+    # Third-party correlation of one point, the solubility grows linearly up to the bubble point
+    return slope * min(pressure, p_bubble)
+
+
+def linear_gas_solubility_vectorized(pressure, p_bubble):
+    return 0.1 * np.minimum(pressure, p_bubble)
+
+
+@pytest.fixture
+def registered():
+    registered = []
+
+    def register(correlation):
+        Registry.register_correlation(correlation)
+        registered.append(correlation)
+        return correlation
+
+    yield register
+    for correlation in registered:
+        Registry.unregister_correlation(correlation.prop, correlation.name)
+
+
+@pytest.mark.parametrize('columnar', [True, False])
+def test_registered_correlation_is_used_by_pvt_table(registered, columnar):
+    correlation = registered(Registry.Correlation('gas_sol', "Linear", linear_gas_solubility,
+                                                  array_func=linear_gas_solubility_vectorized))
+    assert correlation.required == ('pressure', 'p_bubble') and correlation.vectorized
+    assert "Linear" in Registry.available_correlations('gas_sol')['gas_sol']
+    assert Registry.get_correlation('gas_sol', "Linear") is correlation
+
+    table = PVT_Table.pvt_table(*CONDITIONS, gas_sol_corr="Linear", oil_fvf_corr="Standing", columnar=columnar)
+    pressure = table['Pressure'].to_numpy()
+    gas_sol = 0.1 * np.minimum(pressure, CONDITIONS[1])
+    np.testing.assert_allclose(table['Gas Solubility'], gas_sol, rtol=1e-15)
+    # The properties calculated from the solubility take the new one
+    np.testing.assert_allclose(table['Oil FVF'], Oil_FVF.standings_oil_fvf(gas_sol, 620, 35, 0.68), rtol=1e-13)
+    # The other properties are the ones of the default correlations
+    default = PVT_Table.pvt_table(*CONDITIONS, oil_fvf_corr="Standing", columnar=columnar)
+    for column in ['Gas Compressibility Factor', 'Gas FVF', 'Gas Viscosity']:
+        np.testing.assert_array_equal(table[column], default[column])
+
+
+def test_correlation_of_one_point_is_only_available_row_by_row(registered):
+    correlation = registered(Registry.Correlation('gas_sol', "Linear", linear_gas_solubility))
+    assert not correlation.vectorized
+    table = PVT_Table.pvt_table(*CONDITIONS, gas_sol_corr="Linear", columnar=False)
+    np.testing.assert_allclose(table['Gas Solubility'], 0.1 * np.minimum(table['Pressure'], CONDITIONS[1]))
+    with pytest.raises(ValueError, match="Linear"):
+        PVT_Table.pvt_table(*CONDITIONS, gas_sol_corr="Linear")
+
+
+def test_unregistered_correlation_is_gone():
+    Registry.register_correlation(Registry.Correlation('gas_sol', "Linear", linear_gas_solubility,
+                                                       array_func=linear_gas_solubility_vectorized))
+    Registry.unregister_correlation('gas_sol', "Linear")
+    assert Registry.available_correlations('gas_sol') == {'gas_sol': ["Standing", "Vasquez Beggs"]}
+    for columnar in (True, False):
+        with pytest.raises(ValueError, match="Unknown correlation"):
+            PVT_Table.pvt_table(*CONDITIONS, gas_sol_corr="Linear", columnar=columnar)
+
+
+def test_correlation_registered_again_with_other_code_has_another_fingerprint():
+    first = Registry.Correlation('gas_sol', "Linear", linear_gas_solubility)
+    assert first.fingerprint == Registry.Correlation('gas_sol', "Linear", linear_gas_solubility).fingerprint
+    assert first.fingerprint != Registry.Correlation('gas_sol', "Linear", lambda pressure, p_bubble: 0.0).fingerprint
+
+
+def test_bound_correlation_drops_the_values_it_does_not_take():
+    correlation = Registry.Correlation('gas_sol', "Linear", linear_gas_solubility)
+    rs = correlation.bind('pressure', p_bubble=1700.0, temp=620.0, oil_api=35.0)
+    assert correlation.plan(('pressure', 'p_bubble', 'temp', 'oil_api')) == ('pressure', 'p_bubble')
+    assert rs(1000.0) == 100.0 and rs(2000.0) == 170.0
+
+
+def test_invalid_registrations_are_errors():
+    with pytest.raises(ValueError, match="Unknown property"):
+        Registry.register_correlation(Registry.Correlation('water_fvf', "Linear", linear_gas_solubility))
+    with pytest.raises(ValueError, match="needs p_bubble"):
+        Registry.Correlation('gas_sol', "Linear", linear_gas_solubility).bind('pressure', temp=620.0)
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pytest
+
+from pvt_correlations import Simulator_Export
+
+# Two small regions with round numbers, Gas FVF in ft3/scf so that it is 2, 1, 0.8 ... rb/Mscf
+TABLES = [
+    {'Pressure': np.array([0.0, 1000.0, 2000.0, 3000.0, 4000.0]),
+     'Gas Solubility': np.array([0.0, 200.0, 400.0, 400.0, 400.0]),
+     'Oil FVF': np.array([1.0, 1.1, 1.2, 1.19, 1.18]),
+     'Oil Viscosity': np.array([2.0, 1.5, 1.0, 1.1, 1.2]),
+     'Gas FVF': np.array([np.nan, 0.01123, 0.005615, 0.004492, 0.003369]),
+     'Gas Viscosity': np.array([np.nan, 0.013, 0.016, 0.019, 0.022])},
+    {'Pressure': np.array([0.0, 1500.0, 3000.0]),
+     'Gas Solubility': np.array([0.0, 300.0, 300.0]),
+     'Oil FVF': np.array([1.0, 1.15, 1.14]),
+     'Oil Viscosity': np.array([2.0, 0.9, 1.0]),
+     'Gas FVF': np.array([np.nan, 0.005615, 0.0028075]),
+     'Gas Viscosity': np.array([np.nan, 0.015, 0.02])}
+]
+REGIONS = [{'table': TABLES[0], 'p_bubble': 2000.0, 'oil_api': 35, 'sg_gas': 0.7},
+           {'table': TABLES[1], 'p_bubble': 1500.0, 'oil_api': 30, 'sg_gas': 0.8}]
+
+# Rs in Mscf/stb, every undersaturated branch is the one of the bubble point shifted to its node and scaled by the
+# node's FVF and viscosity: 1.1 * 1.19 / 1.2 = 1.0908333 and 1.5 * 1.1 = 1.65
+GOLDEN_DECK = """\
+PVTO
+-- 2 PVT regions
+           0.2           1000            1.1            1.5
+                         2000      1.0908333           1.65
+                         3000      1.0816667            1.8 /
+           0.4           2000            1.2              1
+                         3000           1.19            1.1
+                         4000           1.18            1.2 /
+/
+           0.3           1500           1.15            0.9
+                         3000           1.14              1 /
+/
+
+PVDO
+-- 2 PVT regions
+          1000            1.1            1.5
+          2000            1.2              1
+          3000           1.19            1.1
+          4000           1.18            1.2 /
+          1500           1.15            0.9
+          3000           1.14              1 /
+
+PVDG
+-- 2 PVT regions
+          1000              2          0.013
+          2000              1          0.016
+          3000            0.8          0.019
+          4000            0.6          0.022 /
+          1500              1          0.015
+          3000            0.5           0.02 /
+
+DENSITY
+-- 2 PVT regions
+53.030631 62.4 0.05348 /
+54.672446 62.4 0.06112 /
+
+"""
+
+
+def test_deck_matches_the_golden_deck(tmp_path):
+    path = str(tmp_path / "pvt.inc")
+    assert Simulator_Export.write_deck(path, REGIONS, Simulator_Export.KEYWORDS) == path
+    with open(path) as deck:
+        assert deck.read() == GOLDEN_DECK
+
+
+def test_deck_streams_the_regions_once(tmp_path):
+    pulled = []
+
+    def regions():
+        for region in REGIONS:
+            pulled.append(region['p_bubble'])
+            yield region
+
+    path = str(tmp_path / "pvt.inc")
+    Simulator_Export.write_deck(path, regions(), Simulator_Export.KEYWORDS)
+    assert pulled == [2000.0, 1500.0]
+    with open(path) as deck:
+        assert deck.read() == GOLDEN_DECK
+    # The tables of every keyword are kept in temporary files that are gone once the deck is written
+    assert os.listdir(tmp_path) == ["pvt.inc"]
+
+
+def test_deck_has_only_the_requested_keywords(tmp_path):
+    path = str(tmp_path / "pvt.inc")
+    Simulator_Export.write_deck(path, REGIONS, ['PVDG'])
+    with open(path) as deck:
+        assert deck.read() == GOLDEN_DECK[GOLDEN_DECK.index("PVDG"):GOLDEN_DECK.index("DENSITY")]
+
+
+def test_pvto_with_an_undersaturated_branch_on_the_bubble_point_only():
+    assert Simulator_Export.pvto(TABLES[0], 2000.0, undersaturated='bubble') == (
+        "           0.2           1000            1.1            1.5 /\n"
+        "           0.4           2000            1.2              1\n"
+        "                         3000           1.19            1.1\n"
+        "                         4000           1.18            1.2 /\n"
+        "/\n")
+
+
+def test_pvto_bubble_point_between_knots_starts_the_undersaturated_branch():
+    table = {column: values[[0, 1, 3, 4]] for column, values in TABLES[0].items()}
+    records = Simulator_Export.pvto(table, 2000.0, undersaturated='bubble').splitlines()
+    # The bubble point node is extrapolated from the undersaturated side, 1.19 + (1.19 - 1.18)
+    assert records[1].split() == ['0.4', '2000', '1.2', '1']
+    assert [row.split()[0] for row in records[2:4]] == ['3000', '4000']
+
+
+def test_pvto_subsamples_the_undersaturated_branch():
+    pressure = np.linspace(0, 5000, 51)
+    table = {'Pressure': pressure, 'Gas Solubility': 0.2 * np.minimum(pressure, 1000),
+             'Oil FVF': 1 + 1e-4 * np.minimum(pressure, 1000) - 1e-6 * np.maximum(pressure - 1000, 0),
+             'Oil Viscosity': 1 + 1e-4 * np.maximum(pressure - 1000, 0)}
+    records = Simulator_Export.pvto(table, 1000.0, undersaturated='bubble', undersaturated_points=3).splitlines()
+    assert [row.split()[0] for row in records[-4:-1]] == ['1100', '3100', '5000']
+    assert len(records) == 9 + 1 + 3 + 1
+
+
+def test_unknown_options_are_errors(tmp_path):
+    with pytest.raises(ValueError):
+        Simulator_Export.pvto(TABLES[0], 2000.0, undersaturated='none')
+    with pytest.raises(ValueError):
+        Simulator_Export.write_deck(str(tmp_path / "pvt.inc"), REGIONS, ['PVTW'])
+    assert not os.listdir(tmp_path)
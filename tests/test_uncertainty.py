@@ -0,0 +1,48 @@
+import numpy as np
+
+from pvt_correlations import Uncertainty
+
+NUM_SAMPLES = 500
+
+
+def _distributions(p_bubble):
+    rng = np.random.default_rng(3)
+    return {'oil_api': rng.normal(35, 2, p_bubble.size), 'sg_gas': rng.uniform(0.65, 0.75, p_bubble.size),
+            'p_bubble': p_bubble, 'temp': 620, 'p_sep': 120, 't_sep': 520}
+
+
+def test_bands_leave_out_samples_with_impossible_inputs():
+    # A negative bubble point gives NaN oil properties, which np.percentile spread into every band
+    p_bubble = np.random.default_rng(4).uniform(1000, 2500, NUM_SAMPLES)
+    p_bubble[::10] = -500.0
+    valid = p_bubble > 0
+    result = Uncertainty.pvt_uncertainty(_distributions(p_bubble), 3000, 31, num_samples=NUM_SAMPLES,
+                                         columns=['Oil FVF'])
+    expected = Uncertainty.pvt_uncertainty({name: values[valid] if np.ndim(values) else values
+                                            for name, values in _distributions(p_bubble).items()},
+                                           3000, 31, num_samples=int(valid.sum()), columns=['Oil FVF'])
+    np.testing.assert_allclose(result.bands['Oil FVF'], expected.bands['Oil FVF'], rtol=1e-12)
+    assert result.stats['non_finite'] == {'Oil FVF': int((~valid).sum()) * 31}
+    assert expected.stats['non_finite'] == {'Oil FVF': 0}
+
+
+def test_bands_are_nan_where_no_sample_is_finite():
+    result = Uncertainty.pvt_uncertainty(_distributions(np.full(NUM_SAMPLES, -500.0)), 3000, 11,
+                                         num_samples=NUM_SAMPLES, columns=['Oil FVF'], chunk_size=2 * NUM_SAMPLES)
+    assert np.isnan(result.bands['Oil FVF']).all()
+    assert result.stats['non_finite'] == {'Oil FVF': NUM_SAMPLES * 11}
+    assert result.stats['chunks'] == 6
+
+
+def test_finite_percentiles_match_nanpercentile():
+    rng = np.random.default_rng(5)
+    values = rng.normal(size=(1000, 40))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:, 7] = np.nan
+    values[:3, 8] = np.inf
+    finite = np.isfinite(values)
+    percentiles = (0.0, 10.0, 50.0, 90.0, 100.0)
+    actual = Uncertainty._finite_percentiles(values, finite, percentiles)
+    expected = np.nanpercentile(np.where(finite, values, np.nan)[:, np.r_[:7, 8:40]], percentiles, axis=0)
+    assert np.isnan(actual[:, 7]).all()
+    np.testing.assert_allclose(actual[:, np.r_[:7, 8:40]], expected, rtol=1e-14)